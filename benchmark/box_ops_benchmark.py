@@ -0,0 +1,130 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Time sorted_boxes and merge_fragmented on synthetic pages of 1k to 10k boxes,
+next to the previous list based implementations for the smaller sizes.
+
+    python benchmark/box_ops_benchmark.py --sizes 1000 2000 5000 10000
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(__dir__, "..")))
+
+from tools.infer.utility import merge_boxes, merge_fragmented
+from tools.infer.predict_system import sorted_boxes
+
+
+def legacy_sorted_boxes(dt_boxes):
+    _boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
+    for i in range(len(_boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
+                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            ):
+                _boxes[j], _boxes[j + 1] = _boxes[j + 1], _boxes[j]
+            else:
+                break
+    return _boxes
+
+
+def legacy_merge_fragmented(boxes, x_threshold=10, y_threshold=10):
+    merged_boxes = []
+    visited = set()
+    for i, box1 in enumerate(boxes):
+        if i in visited:
+            continue
+        merged_box = [point[:] for point in box1]
+        for j, box2 in enumerate(boxes[i + 1 :], start=i + 1):
+            if j not in visited:
+                merged_result = merge_boxes(merged_box, box2, x_threshold, y_threshold)
+                if merged_result:
+                    merged_box = merged_result
+                    visited.add(j)
+        merged_boxes.append(merged_box)
+    if len(merged_boxes) == len(boxes):
+        return np.array(merged_boxes)
+    return legacy_merge_fragmented(merged_boxes, x_threshold, y_threshold)
+
+
+def make_page(num_boxes, seed=0):
+    # text lines of about 60 boxes, like a dense page detected in slices
+    rng = np.random.RandomState(seed)
+    rows = max(num_boxes // 60, 1)
+    x = rng.randint(0, 4000, num_boxes)
+    y = rng.randint(0, rows, num_boxes) * 30 + rng.randint(0, 6, num_boxes)
+    w = rng.randint(20, 80, num_boxes)
+    h = rng.randint(14, 20, num_boxes)
+    return np.stack(
+        [
+            np.stack([x, y], axis=1),
+            np.stack([x + w, y], axis=1),
+            np.stack([x + w, y + h], axis=1),
+            np.stack([x, y + h], axis=1),
+        ],
+        axis=1,
+    ).astype("int32")
+
+
+def timeit(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 10000]
+    )
+    parser.add_argument(
+        "--max_legacy_size",
+        type=int,
+        default=2000,
+        help="Larger inputs skip the quadratic implementations",
+    )
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>12} {:>12} {:>12} {:>12}".format(
+            "boxes", "sort", "legacy sort", "merge", "legacy merge"
+        )
+    )
+    for size in args.sizes:
+        boxes = make_page(size)
+        ordered, sort_time = timeit(sorted_boxes, boxes)
+        merged, merge_time = timeit(merge_fragmented, boxes)
+        legacy_sort_time = legacy_merge_time = float("nan")
+        if size <= args.max_legacy_size:
+            legacy_ordered, legacy_sort_time = timeit(legacy_sorted_boxes, boxes)
+            legacy_merged, legacy_merge_time = timeit(legacy_merge_fragmented, boxes)
+            assert np.array_equal(np.array(ordered), np.array(legacy_ordered))
+            assert np.array_equal(merged, legacy_merged)
+        print(
+            "{:>8} {:>11.4f}s {:>11.4f}s {:>11.4f}s {:>11.4f}s".format(
+                size, sort_time, legacy_sort_time, merge_time, legacy_merge_time
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Time the TIA augmentations with the array based WarpMLS against the previous
+loop based implementation on synthetic text line images, and report how far
+their outputs are apart.
+
+    python benchmark/warp_mls_benchmark.py --shapes 32x320 48x320 64x640 --repeat 200
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(__dir__, "..")))
+
+from ppocr.data.imaug.text_image_aug import augment
+from ppocr.data.imaug.text_image_aug.warp_mls import WarpMLS
+
+
+class LegacyWarpMLS:
+    def __init__(self, src, src_pts, dst_pts, dst_w, dst_h, trans_ratio=1.0):
+        self.src = src
+        self.src_pts = src_pts
+        self.dst_pts = dst_pts
+        self.pt_count = len(self.dst_pts)
+        self.dst_w = dst_w
+        self.dst_h = dst_h
+        self.trans_ratio = trans_ratio
+        self.grid_size = 100
+        self.rdx = np.zeros((self.dst_h, self.dst_w))
+        self.rdy = np.zeros((self.dst_h, self.dst_w))
+
+    @staticmethod
+    def _bilinear_interp(x, y, v11, v12, v21, v22):
+        return (v11 * (1 - y) + v12 * y) * (1 - x) + (v21 * (1 - y) + v22 * y) * x
+
+    def generate(self):
+        self.calc_delta()
+        return self.gen_img()
+
+    def calc_delta(self):
+        w = np.zeros(self.pt_count, dtype=np.float32)
+
+        if self.pt_count < 2:
+            return
+
+        i = 0
+        while 1:
+            if self.dst_w <= i < self.dst_w + self.grid_size - 1:
+                i = self.dst_w - 1
+            elif i >= self.dst_w:
+                break
+
+            j = 0
+            while 1:
+                if self.dst_h <= j < self.dst_h + self.grid_size - 1:
+                    j = self.dst_h - 1
+                elif j >= self.dst_h:
+                    break
+
+                sw = 0
+                swp = np.zeros(2, dtype=np.float32)
+                swq = np.zeros(2, dtype=np.float32)
+                new_pt = np.zeros(2, dtype=np.float32)
+                cur_pt = np.array([i, j], dtype=np.float32)
+
+                k = 0
+                for k in range(self.pt_count):
+                    if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
+                        break
+
+                    w[k] = 1.0 / (
+                        (i - self.dst_pts[k][0]) * (i - self.dst_pts[k][0])
+                        + (j - self.dst_pts[k][1]) * (j - self.dst_pts[k][1])
+                    )
+
+                    sw += w[k]
+                    swp = swp + w[k] * np.array(self.dst_pts[k])
+                    swq = swq + w[k] * np.array(self.src_pts[k])
+
+                if k == self.pt_count - 1:
+                    pstar = 1 / sw * swp
+                    qstar = 1 / sw * swq
+
+                    miu_s = 0
+                    for k in range(self.pt_count):
+                        if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
+                            continue
+                        pt_i = self.dst_pts[k] - pstar
+                        miu_s += w[k] * np.sum(pt_i * pt_i)
+
+                    cur_pt -= pstar
+                    cur_pt_j = np.array([-cur_pt[1], cur_pt[0]])
+
+                    for k in range(self.pt_count):
+                        if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
+                            continue
+
+                        pt_i = self.dst_pts[k] - pstar
+                        pt_j = np.array([-pt_i[1], pt_i[0]])
+
+                        tmp_pt = np.zeros(2, dtype=np.float32)
+                        tmp_pt[0] = (
+                            np.sum(pt_i * cur_pt) * self.src_pts[k][0]
+                            - np.sum(pt_j * cur_pt) * self.src_pts[k][1]
+                        )
+                        tmp_pt[1] = (
+                            -np.sum(pt_i * cur_pt_j) * self.src_pts[k][0]
+                            + np.sum(pt_j * cur_pt_j) * self.src_pts[k][1]
+                        )
+                        tmp_pt *= w[k] / miu_s
+                        new_pt += tmp_pt
+
+                    new_pt += qstar
+                else:
+                    new_pt = self.src_pts[k]
+
+                self.rdx[j, i] = new_pt[0] - i
+                self.rdy[j, i] = new_pt[1] - j
+
+                j += self.grid_size
+            i += self.grid_size
+
+    def gen_img(self):
+        src_h, src_w = self.src.shape[:2]
+        dst = np.zeros_like(self.src, dtype=np.float32)
+
+        for i in np.arange(0, self.dst_h, self.grid_size):
+            for j in np.arange(0, self.dst_w, self.grid_size):
+                ni = i + self.grid_size
+                nj = j + self.grid_size
+                w = h = self.grid_size
+                if ni >= self.dst_h:
+                    ni = self.dst_h - 1
+                    h = ni - i + 1
+                if nj >= self.dst_w:
+                    nj = self.dst_w - 1
+                    w = nj - j + 1
+
+                di = np.reshape(np.arange(h), (-1, 1))
+                dj = np.reshape(np.arange(w), (1, -1))
+                delta_x = self._bilinear_interp(
+                    di / h,
+                    dj / w,
+                    self.rdx[i, j],
+                    self.rdx[i, nj],
+                    self.rdx[ni, j],
+                    self.rdx[ni, nj],
+                )
+                delta_y = self._bilinear_interp(
+                    di / h,
+                    dj / w,
+                    self.rdy[i, j],
+                    self.rdy[i, nj],
+                    self.rdy[ni, j],
+                    self.rdy[ni, nj],
+                )
+                nx = j + dj + delta_x * self.trans_ratio
+                ny = i + di + delta_y * self.trans_ratio
+                nx = np.clip(nx, 0, src_w - 1)
+                ny = np.clip(ny, 0, src_h - 1)
+                nxi = np.array(np.floor(nx), dtype=np.int32)
+                nyi = np.array(np.floor(ny), dtype=np.int32)
+                nxi1 = np.array(np.ceil(nx), dtype=np.int32)
+                nyi1 = np.array(np.ceil(ny), dtype=np.int32)
+
+                if len(self.src.shape) == 3:
+                    x = np.tile(np.expand_dims(ny - nyi, axis=-1), (1, 1, 3))
+                    y = np.tile(np.expand_dims(nx - nxi, axis=-1), (1, 1, 3))
+                else:
+                    x = ny - nyi
+                    y = nx - nxi
+                dst[i : i + h, j : j + w] = self._bilinear_interp(
+                    x,
+                    y,
+                    self.src[nyi, nxi],
+                    self.src[nyi, nxi1],
+                    self.src[nyi1, nxi],
+                    self.src[nyi1, nxi1],
+                )
+
+        dst = np.clip(dst, 0, 255)
+        dst = np.array(dst, dtype=np.uint8)
+
+        return dst
+
+
+def make_text_line(h, w, seed=0):
+    rng = np.random.RandomState(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    scale = h / 40.0
+    for x in range(0, w - int(20 * scale), int(60 * scale) + 1):
+        color = (int(rng.randint(0, 80)),) * 3
+        cv2.putText(
+            img,
+            "AB12",
+            (x, int(h * 0.75)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            scale,
+            color,
+            max(int(scale), 1),
+        )
+    return img
+
+
+def capture_warps(img, repeat, seed=0):
+    """WarpMLS arguments of repeat tia_distort, tia_stretch and tia_perspective"""
+    np.random.seed(seed)
+    calls = []
+    warp_cls = augment.WarpMLS
+
+    class Capture(object):
+        def __init__(self, *args):
+            calls.append(args)
+
+        def generate(self):
+            return args_src
+
+    args_src = img
+    augment.WarpMLS = Capture
+    try:
+        for i in range(repeat):
+            augment.tia_distort(img, 4)
+            augment.tia_stretch(img, 4)
+            augment.tia_perspective(img)
+    finally:
+        augment.WarpMLS = warp_cls
+    return calls
+
+
+def run(warp_cls, calls):
+    start = time.time()
+    outputs = [warp_cls(*args).generate() for args in calls]
+    return outputs, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shapes", nargs="+", default=["32x320", "48x320", "64x640"])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(
+        "{:>8} {:>8} {:>12} {:>12} {:>8} {:>10} {:>8}".format(
+            "shape", "warps", "warp_mls", "legacy", "speedup", "mean diff", "max diff"
+        )
+    )
+    for shape in args.shapes:
+        h, w = [int(v) for v in shape.split("x")]
+        calls = capture_warps(make_text_line(h, w), args.repeat)
+        outputs, new_time = run(WarpMLS, calls)
+        legacy_outputs, legacy_time = run(LegacyWarpMLS, calls)
+        diffs = [
+            np.abs(a.astype(np.int32) - b.astype(np.int32))
+            for a, b in zip(outputs, legacy_outputs)
+        ]
+        print(
+            "{:>8} {:>8} {:>11.4f}s {:>11.4f}s {:>7.1f}x {:>10.3f} {:>8}".format(
+                shape,
+                len(calls),
+                new_time,
+                legacy_time,
+                legacy_time / new_time,
+                np.mean([d.mean() for d in diffs]),
+                max(d.max() for d in diffs),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
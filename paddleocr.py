@@ -681,6 +681,7 @@ class PaddleOCR(predict_system.TextSystem):
         inv=False,
         alpha_color=(255, 255, 255),
         slice={},
+        crop=None,
     ):
         """
         OCR with PaddleOCR
@@ -693,12 +694,11 @@ class PaddleOCR(predict_system.TextSystem):
             bin: binarize image to black and white. Default is False.
             inv: invert image colors. Default is False.
             alpha_color: set RGB color Tuple for transparent parts replacement. Default is pure white.
-            slice: use sliding window inference for large images, det and rec must be True. Requires int values for slice["horizontal_stride"], slice["vertical_stride"], slice["merge_x_thres"], slice["merge_y_thres] (See doc/doc_en/slice_en.md). Default is {}.
+            slice: use sliding window inference for large images, det and rec must be True. Requires int values for slice["horizontal_stride"], slice["vertical_stride"], slice["merge_x_thres"], slice["merge_y_thres] (See doc/doc_en/slice_en.md). Optional slice["overlap"] makes the slices overlap by that many pixels, the boxes found twice are dropped above slice["nms_thres"] overlap. Default is {}.
+            crop: the inputs are cropped plates, skip detection and split two row plates by their projection profile. None follows the crop_mode param, which can also detect plate crops automatically. Default is None.
+            A list of images with det=True is treated as a burst of frames: detection runs in batches of max_batch_size and the text of all frames is recognized together. With slice the frames are processed one by one. The result of an entry that cannot be read is None.
         """
         assert isinstance(img, (np.ndarray, list, str, bytes))
-        if isinstance(img, list) and det == True:
-            logger.error("When input a list of images, det must be false")
-            exit(0)
         if cls == True and self.use_angle_cls == False:
             logger.warning(
                 "Since the angle classifier is not initialized, it will not be used during the forward process"
@@ -722,11 +722,57 @@ class PaddleOCR(predict_system.TextSystem):
                 _image = binarize_img(_image)
             return _image
 
-        if det and rec:
+        if det and isinstance(img, list) and not flag_pdf:
+            # a list of frames, detected and recognized in batches, the
+            # result of an entry that cannot be read is None
+            frames, valid = [], []
+            for idx, _img in enumerate(img):
+                _img = check_img(_img, alpha_color)[0]
+                if not isinstance(_img, np.ndarray):
+                    logger.error(
+                        "skip image {} of the list, cannot read it".format(idx)
+                    )
+                    continue
+                frames.append(preprocess_image(_img))
+                valid.append(idx)
+            ocr_res = [None] * len(img)
+            if not frames:
+                return ocr_res
+            if not rec:
+                if slice:
+                    logger.warning("slice needs det and rec, it is not used")
+                dt_boxes_list, _ = self.text_detector.predict_batch(frames)
+                for idx, dt_boxes in zip(valid, dt_boxes_list):
+                    if dt_boxes is not None and dt_boxes.size:
+                        ocr_res[idx] = [box.tolist() for box in dt_boxes]
+                return ocr_res
+            if slice:
+                # sliding windows are planned per image
+                results = [
+                    self.__call__(frame, cls, slice, crop)[:2] for frame in frames
+                ]
+            else:
+                results, _ = self.predict_frames(frames, cls, crop)
+            for idx, (boxes, rec_res) in zip(valid, results):
+                if boxes is not None:
+                    ocr_res[idx] = [
+                        [box.tolist(), res] for box, res in zip(boxes, rec_res)
+                    ] or None
+            return ocr_res
+        elif det and rec and len(imgs) > 1 and not slice:
+            # pdf pages
+            results, _ = self.predict_frames(
+                [preprocess_image(img) for img in imgs], cls, crop
+            )
+            return [
+                [[box.tolist(), res] for box, res in zip(boxes, rec_res)] or None
+                for boxes, rec_res in results
+            ]
+        elif det and rec:
             ocr_res = []
             for idx, img in enumerate(imgs):
                 img = preprocess_image(img)
-                dt_boxes, rec_res, _ = self.__call__(img, cls, slice)
+                dt_boxes, rec_res, _ = self.__call__(img, cls, slice, crop)
                 if not dt_boxes and not rec_res:
                     ocr_res.append(None)
                     continue
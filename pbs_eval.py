@@ -1,42 +1,88 @@
 import os
-import cv2
-import pandas as pd
+import io
+import csv
 import json
+import time
+import argparse
+import multiprocessing
 
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+import numpy as np
 from PIL import Image
 
-def create_pdf_with_reportlab(output_path, discrepancy_data):
+try:
+    from rapidfuzz.distance import LCSseq
+except ImportError:
+    LCSseq = None
+
+DISCREPANCY_BUCKETS = ["0D", "1D", "2D", "3D", "4D+"]
+
+
+def _load_thumbnail(task):
+    # runs in the report workers: decode, shrink and re-encode one image
+    img_path, max_width = task
+    if not os.path.exists(img_path):
+        return None
+    img = Image.open(img_path).convert("RGB")
+    img_width, img_height = img.size
+    img.thumbnail((max_width, max_width * img_height / float(img_width)))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue(), img_width, img_height
+
+
+def create_pdf_with_reportlab(
+    output_path, discrepancy_data, image_dir, num_workers=None
+):
+    """
+    One page per discrepancy. The images are decoded and downscaled by a pool
+    of processes, the pages themselves only embed the ready JPEG bytes.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import ImageReader
+
     os.makedirs(output_path, exist_ok=True)
     # Create a canvas object with landscape orientation
     output_pdf_path = os.path.join(output_path, "ocr_results.pdf")
     text_file_path = os.path.join(output_path, "review_files.txt")
     c = canvas.Canvas(output_pdf_path, pagesize=landscape(letter))
     width, height = landscape(letter)
+    display_width = width * 0.4
+    # render at twice the page resolution so the plates stay readable
+    tasks = [
+        (os.path.join(image_dir, data[0]), int(display_width * 2))
+        for data in discrepancy_data
+    ]
+    num_workers = num_workers or os.cpu_count()
 
-    with open(text_file_path, "w") as text_file:
-        for data in discrepancy_data:
+    with open(text_file_path, "w") as text_file, multiprocessing.Pool(
+        num_workers
+    ) as pool:
+        thumbnails = pool.imap(_load_thumbnail, tasks, chunksize=16)
+        for data, thumbnail in zip(discrepancy_data, thumbnails):
             filename, actual_plate, predicted_plate, discrepancy = data
             # Add image
-            img_path = os.path.join(image_dir, filename)
-            img = Image.open(img_path)
-            img_width, img_height = img.size
-            aspect = img_height / float(img_width)
-            display_width = width * 0.4
-            display_height = display_width * aspect
-            c.drawImage(ImageReader(img), width * 0.05, height * 0.5 - display_height / 2, width=display_width, height=display_height)
-
-            #Add name
-            c.setFont("Helvetica-Bold",15)
-            text_name = width*0.2
+            if thumbnail is not None:
+                jpeg, img_width, img_height = thumbnail
+                aspect = img_height / float(img_width)
+                display_height = display_width * aspect
+                c.drawImage(
+                    ImageReader(io.BytesIO(jpeg)),
+                    width * 0.05,
+                    height * 0.5 - display_height / 2,
+                    width=display_width,
+                    height=display_height,
+                )
+
+            # Add name
+            c.setFont("Helvetica-Bold", 15)
+            text_name = width * 0.2
             c.drawString(text_name, height * 0.8, f"{filename}")
 
             # Add text
             c.setFont("Helvetica", 12)
-            text_x = width * 0.5 
-            c.drawString(text_x, height * 0.65,f"Real Plate: {actual_plate}")
+            text_x = width * 0.5
+            c.drawString(text_x, height * 0.65, f"Real Plate: {actual_plate}")
             c.drawString(text_x, height * 0.6, f"Predicted Plate: {predicted_plate}")
             c.drawString(text_x, height * 0.55, f"Discrepancy: {discrepancy}")
 
@@ -50,6 +96,7 @@ def create_pdf_with_reportlab(output_path, discrepancy_data):
     # Save the PDF
     c.save()
 
+
 def longest_common_subsequence(real, predicted):
     m, n = len(real), len(predicted)
     dp = [[0] * (n + 1) for _ in range(m + 1)]
@@ -65,84 +112,223 @@ def longest_common_subsequence(real, predicted):
     discrepancy = (len(real) - lcs_length) + max(0, len(predicted) - len(real))
     return lcs_length, discrepancy
 
-def process_results(results_file, image_dir, output_path):
-    with open(results_file, 'r') as file:
-        lines = file.readlines()
-    
-    all_discrepancy_data = []
-    discrepancy_counts = {'0D': 0, '1D': 0, '2D': 0, '3D': 0, '4D+': 0}
-    count = 0
-    # train_data = os.path.join(train_data_path,"train_data_cleaned.txt")
-    # with open(train_data,'w') as train_file:
-    for idx,line in enumerate(lines):
-        line = line.strip()
-        if(count%100==0):
-            print(f'Processed {count} images')
-        if line:
-            # predicted_plate, actual_plate = line.split()
-            parts = line.split()
-            if len(parts) < 2:
+
+def _encode(texts):
+    # fixed width unicode array viewed as code points, zero padded
+    arr = np.array(texts, dtype="U")
+    width = max(arr.dtype.itemsize // 4, 1)
+    codes = np.zeros((len(texts), width), dtype=np.uint32)
+    if arr.dtype.itemsize:
+        codes[:] = arr.view(np.uint32).reshape(len(texts), -1)
+    return codes
+
+
+def _lcs_lengths_numpy(reals, preds, chunk_size=8192):
+    """
+    The LCS dynamic program run for all pairs at once, one numpy operation
+    per cell of the longest pair. dp[i][j] only depends on cells up to
+    (i, j), so the padding never changes the value read at the real lengths.
+    """
+    lcs = np.zeros(len(reals), dtype=np.int64)
+    for beg in range(0, len(reals), chunk_size):
+        end = min(beg + chunk_size, len(reals))
+        a = _encode(reals[beg:end])
+        b = _encode(preds[beg:end])
+        len_a = np.array([len(x) for x in reals[beg:end]])
+        len_b = np.array([len(x) for x in preds[beg:end]])
+        rows = np.arange(end - beg)
+        res = np.zeros(end - beg, dtype=np.int64)
+        prev = np.zeros((end - beg, b.shape[1] + 1), dtype=np.int32)
+        for i in range(1, len_a.max(initial=0) + 1):
+            cur = np.zeros_like(prev)
+            match = a[:, i - 1 : i] == b
+            for j in range(1, b.shape[1] + 1):
+                cur[:, j] = np.where(
+                    match[:, j - 1],
+                    prev[:, j - 1] + 1,
+                    np.maximum(prev[:, j], cur[:, j - 1]),
+                )
+            done = len_a == i
+            res[done] = cur[rows[done], len_b[done]]
+            prev = cur
+        lcs[beg:end] = res
+    return lcs
+
+
+def lcs_lengths(reals, preds):
+    """LCS length of every (real, predicted) pair, rapidfuzz when installed."""
+    if LCSseq is not None:
+        return np.array(
+            [LCSseq.similarity(a, b) for a, b in zip(reals, preds)], dtype=np.int64
+        )
+    return _lcs_lengths_numpy(reals, preds)
+
+
+def compute_discrepancies(reals, preds):
+    len_real = np.array([len(x) for x in reals], dtype=np.int64)
+    len_pred = np.array([len(x) for x in preds], dtype=np.int64)
+    lcs = lcs_lengths(reals, preds)
+    return (len_real - lcs) + np.maximum(0, len_pred - len_real)
+
+
+def read_results(results_file):
+    """Return (image_path, predicted_plate) pairs from an `image_path\\tplate` file."""
+    results = []
+    with open(results_file, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            if "\t" in line:
+                img_path, predicted_plate = line.split("\t", 1)
+            else:
+                parts = line.split(maxsplit=1)
                 # Handle case where predicted plate is empty
                 img_path = parts[0]
-                predicted_plate = ""
-            else:
-                img_path, predicted_plate = parts
-            image_name = os.path.basename(img_path)
-            actual_plate = file_name_to_plate[image_name]
-            if os.path.exists(img_path):
-                img = cv2.imread(img_path)
-                
-                # Perform LCS and discrepancy analysis
-                lcs_length, discrepancy = longest_common_subsequence(actual_plate, predicted_plate)
-                
-                # Update discrepancy counts
-                if discrepancy == 0:
-                    discrepancy_counts['0D'] += 1
-                    # train_file.write(f"{image_name}\t{actual_plate}\n")
-                elif discrepancy == 1:
-                    discrepancy_counts['1D'] += 1
-                elif discrepancy == 2:
-                    discrepancy_counts['2D'] += 1
-                elif discrepancy == 3:
-                    discrepancy_counts['3D'] += 1
-                else:
-                    discrepancy_counts['4D+'] += 1
-                
-                # Generate PDF only if discrepancy is non-zero
-                if discrepancy > 0:
-                    all_discrepancy_data.append([image_name, actual_plate, predicted_plate, discrepancy])
-
-            count = count+1
-    print(f'Processed {count} images\n')
-    # Calculate accuracy
-    total_discrepancies = sum(discrepancy_counts.values())
-    accuracy = discrepancy_counts['0D'] / total_discrepancies if total_discrepancies > 0 else 1
-
-    create_pdf_with_reportlab(output_path,all_discrepancy_data)
+                predicted_plate = parts[1] if len(parts) > 1 else ""
+            results.append((img_path, predicted_plate.strip()))
+    return results
+
+
+def evaluate(results, file_name_to_plate, skip_missing_images=True):
+    """
+    Score the predictions against the plate map without reading any image.
+    As before, a result whose image path does not exist is skipped, unless
+    skip_missing_images is False.
+    return the discrepancy rows [image name, actual, predicted, discrepancy]
+    of every scored image, the names missing from the plate map and the
+    number of results skipped for a missing image.
+    """
+    num_results = len(results)
+    if skip_missing_images:
+        results = [r for r in results if os.path.exists(r[0])]
+    skipped = num_results - len(results)
+    results = [(os.path.basename(path), pred) for path, pred in results]
+    scored = [r for r in results if r[0] in file_name_to_plate]
+    missing = [r[0] for r in results if r[0] not in file_name_to_plate]
+    names = [r[0] for r in scored]
+    preds = [r[1] for r in scored]
+    reals = [file_name_to_plate[name] for name in names]
+    discrepancies = compute_discrepancies(reals, preds)
+    rows = [list(row) for row in zip(names, reals, preds, discrepancies.tolist())]
+    return rows, missing, skipped
+
+
+def summarize(discrepancies):
+    counts = np.bincount(
+        np.minimum(discrepancies, len(DISCREPANCY_BUCKETS) - 1),
+        minlength=len(DISCREPANCY_BUCKETS),
+    )
+    discrepancy_counts = dict(zip(DISCREPANCY_BUCKETS, counts.tolist()))
+    total = int(counts.sum())
+    accuracy = discrepancy_counts["0D"] / total if total > 0 else 1
+    return discrepancy_counts, total, accuracy
+
+
+def process_results(
+    results_file,
+    image_dir,
+    output_path,
+    file_name_to_plate,
+    num_workers=None,
+    skip_report=False,
+    skip_missing_images=True,
+):
+    start = time.time()
+    results = read_results(results_file)
+    rows, missing, skipped = evaluate(results, file_name_to_plate, skip_missing_images)
+    discrepancy_counts, total, accuracy = summarize(
+        np.array([row[3] for row in rows], dtype=np.int64)
+    )
+    all_discrepancy_data = [row for row in rows if row[3] > 0]
+    print(f"Processed {total} images in {time.time() - start:.2f}s")
+    if skipped:
+        print(f"Skipped {skipped} results whose image does not exist")
+    if missing:
+        print(f"{len(missing)} images not found in the plate map, e.g. {missing[0]}")
 
-    # Save discrepancy data to CSV
     os.makedirs(output_path, exist_ok=True)
-    discrepancy_df = pd.DataFrame(all_discrepancy_data, columns=['Image Name', 'Actual Number', 'Detected Number', 'Discrepancy'])
+    # Save discrepancy data to CSV
     discrepancy_path = os.path.join(output_path, "discrepancies.csv")
-    discrepancy_df.to_csv(discrepancy_path, index=False)
+    with open(discrepancy_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Image Name", "Actual Number", "Detected Number", "Discrepancy"]
+        )
+        writer.writerows(all_discrepancy_data)
+
+    summary = {
+        "results_file": results_file,
+        "total": total,
+        "skipped_missing_image": skipped,
+        "missing_from_map": len(missing),
+        "discrepancy_counts": discrepancy_counts,
+        "accuracy": accuracy,
+    }
+    with open(os.path.join(output_path, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(output_path, "summary.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Discrepancy", "Count", "Ratio"])
+        for bucket, count in discrepancy_counts.items():
+            writer.writerow([bucket, count, count / total if total > 0 else 0])
+
+    if not skip_report:
+        create_pdf_with_reportlab(
+            output_path, all_discrepancy_data, image_dir, num_workers
+        )
+        print(f"PDF file saved to: {output_path}")
+    print(f"Discrepancy details saved to: {discrepancy_path}")
+    print(f"Discrepancy counts: {discrepancy_counts}")
+    print(f"Accuracy: {accuracy:.2%}")
+    return summary
 
-    print(f'PDF file saved to: {output_path}')
-    print(f'Discrepancy details saved to: /Output_pbs/Test_GMDA/discrepancies.csv')
-    print(f'Discrepancy counts: {discrepancy_counts}')
-    print(f'Accuracy: {accuracy:.2%}')
 
 def load_license_plate_map(map_file):
-    with open(map_file, 'r') as file:
+    with open(map_file, "r") as file:
         file_name_to_plate = json.load(file)
     return file_name_to_plate
 
 
 if __name__ == "__main__":
-    results_file = 'license_plates.txt'
-    image_dir = '/nfs/nas2VehiScan/IMPData/bharatp/Test_dump/images'
-    map_file = '/nfs/nas2VehiScan/IMPData/bharatp/PaddleOCR/test_data/test_Bench/license_plate_map.json'
-    output_path = '/nfs/nas2VehiScan/IMPData/bharatp/PaddleOCR/Output_pbs/Test_Bench_ModelV1/'
-    # train_data_path = '/nfs/nas2VehiScan/IMPData/bharatp/PaddleOCR/train_data/data_cleaned'
-    
-    file_name_to_plate = load_license_plate_map(map_file)
-    process_results(results_file, image_dir, output_path)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results_file", type=str, default="license_plates.txt")
+    parser.add_argument(
+        "--image_dir",
+        type=str,
+        default="/nfs/nas2VehiScan/IMPData/bharatp/Test_dump/images",
+    )
+    parser.add_argument(
+        "--map_file",
+        type=str,
+        default="/nfs/nas2VehiScan/IMPData/bharatp/PaddleOCR/test_data/test_Bench/license_plate_map.json",
+    )
+    parser.add_argument(
+        "--output_path",
+        type=str,
+        default="/nfs/nas2VehiScan/IMPData/bharatp/PaddleOCR/Output_pbs/Test_Bench_ModelV1/",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=None,
+        help="Processes rendering the report images, all cores by default",
+    )
+    parser.add_argument("--skip_report", action="store_true")
+    parser.add_argument(
+        "--score_missing_images",
+        action="store_true",
+        help="Also score the results whose image path does not exist, they are skipped by default",
+    )
+    args = parser.parse_args()
+
+    file_name_to_plate = load_license_plate_map(args.map_file)
+    process_results(
+        args.results_file,
+        args.image_dir,
+        args.output_path,
+        file_name_to_plate,
+        num_workers=args.num_workers,
+        skip_report=args.skip_report,
+        skip_missing_images=not args.score_missing_images,
+    )
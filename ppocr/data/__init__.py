@@ -37,7 +37,9 @@ from ppocr.data.simple_dataset import SimpleDataSet, MultiScaleDataSet
 from ppocr.data.lmdb_dataset import LMDBDataSet, LMDBDataSetSR, LMDBDataSetTableMaster
 from ppocr.data.pgnet_dataset import PGDataSet
 from ppocr.data.pubtab_dataset import PubTabDataSet
+from ppocr.data.packed_dataset import PackedDataSet
 from ppocr.data.multi_scale_sampler import MultiScaleSampler
+from ppocr.data.width_bucket_sampler import WidthBucketSampler
 
 # for PaddleX dataset_type
 TextDetDataset = SimpleDataSet
@@ -94,6 +96,7 @@ def build_dataloader(config, mode, device, logger, seed=None):
         "MSTextRecDataset",
         "PubTabTableRecDataset",
         "KieDataset",
+        "PackedDataSet",
     ]
     module_name = config[mode]["dataset"]["name"]
     assert module_name in support_dict, Exception(
@@ -134,7 +137,13 @@ def build_dataloader(config, mode, device, logger, seed=None):
     if "collate_fn" in loader_config:
         from . import collate_fn
 
-        collate_fn = getattr(collate_fn, loader_config["collate_fn"])()
+        collate_config = loader_config["collate_fn"]
+        if isinstance(collate_config, dict):
+            collate_config = copy.deepcopy(collate_config)
+            collate_name = collate_config.pop("name")
+        else:
+            collate_name, collate_config = collate_config, {}
+        collate_fn = getattr(collate_fn, collate_name)(**collate_config)
     else:
         collate_fn = None
     data_loader = DataLoader(
@@ -12,10 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import cv2
 import paddle
 import numbers
 import numpy as np
 from collections import defaultdict
+from paddle.io.dataloader.collate import default_collate_fn
+
+from .imaug.rec_img_aug import (
+    batch_blur,
+    batch_hsv_aug,
+    batch_jitter,
+    batch_gasuss_noise,
+)
 
 
 class DictCollator(object):
@@ -116,3 +126,118 @@ class DyMaskCollator(object):
             label_masks[i][:l] = 1
 
         return images, image_masks, labels, label_masks
+
+
+class RecAugCollator(object):
+    """
+    Collate recognition samples like the default collate_fn of the
+    DataLoader, then apply the photometric ops of RecAug (blur, hsv, jitter,
+    noise and reverse) to the whole image batch with per-sample random
+    choices and parameters. Use it with RecAug(batch_photometric=True), so
+    only the geometric tia and crop ops run per sample in the workers.
+    The images are either the normalized float (N, C, H, W) output of
+    RecResizeImg or uint8 (N, H, W, C) pixels. Gaussian noise is read at
+    random offsets of a bank of noise_bank_size normals drawn once per
+    worker, drawing fresh normals for every pixel costs more than all other
+    ops together.
+    args:
+        image_index(int|str): index of the image in the KeepKeys list, or its
+            key when the samples are dicts
+        noise_bank_size(int): normals in the noise bank, 0 draws fresh noise
+    """
+
+    def __init__(
+        self,
+        reverse_prob=0.4,
+        noise_prob=0.4,
+        jitter_prob=0.4,
+        blur_prob=0.4,
+        hsv_aug_prob=0.4,
+        image_index=0,
+        noise_bank_size=1 << 20,
+        **kwargs,
+    ):
+        self.reverse_prob = reverse_prob
+        self.noise_prob = noise_prob
+        self.jitter_prob = jitter_prob
+        self.blur_prob = blur_prob
+        self.hsv_aug_prob = hsv_aug_prob
+        self.image_index = image_index
+        self.noise_bank_size = noise_bank_size
+        self.fil = cv2.getGaussianKernel(ksize=5, sigma=1, ktype=cv2.CV_32F)
+        self._rng = None
+        self._rng_pid = None
+        self._noise_bank = None
+
+    @property
+    def rng(self):
+        # seeded from np.random in every DataLoader worker, which the
+        # DataLoader seeds differently per worker
+        if self._rng_pid != os.getpid():
+            self._rng = np.random.default_rng(np.random.randint(2**31))
+            self._rng_pid = os.getpid()
+            self._noise_bank = None
+        return self._rng
+
+    def normal_noise(self, shape):
+        rng = self.rng
+        size = int(np.prod(shape[1:]))
+        # small banks would repeat the same noise in most samples
+        if size * 4 > self.noise_bank_size:
+            return rng.standard_normal(shape, dtype=np.float32)
+        if self._noise_bank is None:
+            self._noise_bank = rng.standard_normal(
+                self.noise_bank_size, dtype=np.float32
+            )
+        offsets = rng.integers(0, self.noise_bank_size - size, shape[0])
+        windows = np.lib.stride_tricks.sliding_window_view(self._noise_bank, size)
+        return windows[offsets].reshape(shape)
+
+    def __call__(self, batch):
+        batch = default_collate_fn(batch)
+        batch[self.image_index] = self.augment(batch[self.image_index])
+        return batch
+
+    def augment(self, images):
+        """augmented copy of images, a float32 batch is changed in place"""
+        is_uint8 = images.dtype == np.uint8
+        if is_uint8:
+            imgs = images.transpose(0, 3, 1, 2).astype(np.float32)
+        else:
+            # the collated batch is a new array, so it is changed in place
+            imgs = images.astype(np.float32, copy=False)
+            imgs *= 127.5
+            imgs += 127.5
+        n, _, h, w = imgs.shape
+        rng = self.rng
+
+        def choose(prob):
+            return np.flatnonzero(rng.random(n) <= prob)
+
+        idx = choose(self.blur_prob)
+        if len(idx):
+            imgs[idx] = batch_blur(imgs[idx], self.fil)
+        idx = choose(self.hsv_aug_prob)
+        if len(idx):
+            signs = np.where(rng.random(len(idx)) > 0.5000001, 1, -1)
+            deltas = 0.001 * rng.random(len(idx)) * signs
+            imgs[idx] = batch_hsv_aug(imgs[idx], deltas)
+        idx = choose(self.jitter_prob)
+        if len(idx) and h > 10 and w > 10:
+            shifts = (rng.random(len(idx)) * min(h, w) * 0.01).astype(np.int64)
+            imgs[idx] = batch_jitter(imgs[idx], shifts)
+        idx = choose(self.noise_prob)
+        if len(idx):
+            noise = self.normal_noise((len(idx),) + imgs.shape[1:])
+            imgs[idx] = batch_gasuss_noise(imgs[idx], noise)
+        idx = choose(self.reverse_prob)
+        if len(idx):
+            imgs[idx] = 255 - imgs[idx]
+
+        np.clip(imgs, 0, 255, out=imgs)
+        if is_uint8:
+            imgs = np.rint(imgs).astype(np.uint8).transpose(0, 2, 3, 1)
+            return np.ascontiguousarray(imgs)
+        imgs -= 127.5
+        imgs /= 127.5
+        return imgs
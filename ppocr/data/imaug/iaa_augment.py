@@ -21,8 +21,6 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import numpy as np
-import imgaug
-import imgaug.augmenters as iaa
 
 
 class AugmenterBuilder(object):
@@ -30,6 +28,9 @@ class AugmenterBuilder(object):
         pass
 
     def build(self, args, root=True):
+        # imgaug is slow to import and only needed by training pipelines
+        import imgaug.augmenters as iaa
+
         if args is None or len(args) == 0:
             return None
         elif isinstance(args, list):
@@ -84,6 +85,8 @@ class IaaAugment:
         return data
 
     def may_augment_poly(self, aug, img_shape, poly):
+        import imgaug
+
         keypoints = [imgaug.Keypoint(p[0], p[1]) for p in poly]
         keypoints = aug.augment_keypoints(
             [imgaug.KeypointsOnImage(keypoints, shape=img_shape)]
@@ -45,7 +45,7 @@ class DecodeImage(object):
             ), "invalid input 'img' in DecodeImage"
         else:
             assert (
-                type(img) is bytes and len(img) > 0
+                isinstance(img, (bytes, np.ndarray)) and len(img) > 0
             ), "invalid input 'img' in DecodeImage"
         img = np.frombuffer(img, dtype="uint8")
         if self.ignore_orientation:
@@ -15,7 +15,6 @@
 import math
 import cv2
 import numpy as np
-from skimage.morphology._skeletonize import thin
 from ppocr.utils.e2e_utils.extract_textpoint_fast import (
     sort_and_expand_with_direction_v2,
 )
@@ -325,6 +324,8 @@ class PGProcessTrain(object):
         det_mask = np.array(det_mask > 1e-3, dtype="float32")
 
         f_direction = self.f_direction
+        from skimage.morphology._skeletonize import thin
+
         skeleton_map = thin(det_mask.astype(np.uint8))
         instance_count, instance_label_map = cv2.connectedComponents(
             skeleton_map.astype(np.uint8), connectivity=8
@@ -41,9 +41,14 @@ class RecAug(object):
         jitter_prob=0.4,
         blur_prob=0.4,
         hsv_aug_prob=0.4,
+        batch_photometric=False,
         **kwargs,
     ):
         self.tia_prob = tia_prob
+        if batch_photometric:
+            # blur, hsv, jitter, noise and reverse run on the collated batch
+            # in RecAugCollator, only tia and crop stay per sample
+            reverse_prob = noise_prob = jitter_prob = blur_prob = hsv_aug_prob = 0
         self.bda = BaseDataAugmentation(
             crop_prob, reverse_prob, noise_prob, jitter_prob, blur_prob, hsv_aug_prob
         )
@@ -815,6 +820,54 @@ def get_crop(image):
     return crop_img
 
 
+def batch_blur(imgs, kernel):
+    """
+    separable blur of a (N, C, H, W) float32 batch with the 1d kernel, as
+    cv2.sepFilter2D of every sample: the rows of all samples are filtered as
+    one image, then the columns
+    """
+    n, c, h, w = imgs.shape
+    kernel = np.asarray(kernel, dtype=np.float32).reshape(-1, 1)
+    one = np.ones((1, 1), dtype=np.float32)
+    out = cv2.sepFilter2D(np.ascontiguousarray(imgs).reshape(-1, w), -1, kernel, one)
+    cols = out.reshape(n * c, h, w).transpose(1, 0, 2).reshape(h, -1)
+    out = cv2.sepFilter2D(cols, -1, one, kernel)
+    return out.reshape(h, n * c, w).transpose(1, 0, 2).reshape(n, c, h, w)
+
+
+def batch_hsv_aug(imgs, deltas):
+    """
+    hsv_aug of a (N, C, H, W) float batch, scaling V by 1 + delta keeps hue
+    and saturation, so every channel of a sample is scaled by the same factor
+    """
+    return imgs * (1 + np.asarray(deltas, dtype=np.float32))[:, None, None, None]
+
+
+def batch_jitter(imgs, shifts):
+    """
+    jitter of a (N, C, H, W) float batch, shifts are the per-sample loop
+    counts of jitter, whose last iteration moves the image down and right by
+    shift - 1 pixels and repeats its top rows and left columns
+    """
+    n, c, h, w = imgs.shape
+    offsets = np.maximum(np.asarray(shifts, dtype=np.int64) - 1, 0)
+    if not offsets.any():
+        return imgs
+    ys, xs = np.mgrid[0:h, 0:w]
+    d = np.minimum(np.minimum(ys, xs)[None], offsets[:, None, None])
+    rows, cols = ys[None] - d, xs[None] - d
+    out = imgs[np.arange(n)[:, None, None], :, rows, cols]
+    return out.transpose(0, 3, 1, 2)
+
+
+def batch_gasuss_noise(imgs, noise, mean=0, var=0.1):
+    """
+    add_gasuss_noise of a (N, C, H, W) float batch, noise are standard
+    normal samples of the same shape
+    """
+    return imgs + 0.5 * (noise * var**0.5 + mean)
+
+
 def rad(x):
     """
     rad
@@ -16,10 +16,18 @@ This code is refer from:
 https://github.com/RubanSeven/Text-Image-Augmentation-python/blob/master/warp_mls.py
 """
 
+import cv2
 import numpy as np
 
 
 class WarpMLS:
+    """
+    Moving least squares warp that moves the src_pts control points of src
+    to dst_pts. The source offsets are solved for all nodes of a grid of
+    grid_size pixels and all control points at once, interpolated to per
+    pixel remap fields and sampled with cv2.remap.
+    """
+
     def __init__(self, src, src_pts, dst_pts, dst_w, dst_h, trans_ratio=1.0):
         self.src = src
         self.src_pts = src_pts
@@ -29,158 +37,107 @@ class WarpMLS:
         self.dst_h = dst_h
         self.trans_ratio = trans_ratio
         self.grid_size = 100
-        self.rdx = np.zeros((self.dst_h, self.dst_w))
-        self.rdy = np.zeros((self.dst_h, self.dst_w))
+        # grid node coordinates and the offsets solved at those nodes
+        self.grid_x = self.grid_nodes(dst_w, self.grid_size)
+        self.grid_y = self.grid_nodes(dst_h, self.grid_size)
+        self.rdx = np.zeros((len(self.grid_y), len(self.grid_x)))
+        self.rdy = np.zeros((len(self.grid_y), len(self.grid_x)))
 
     @staticmethod
-    def __bilinear_interp(x, y, v11, v12, v21, v22):
-        return (v11 * (1 - y) + v12 * y) * (1 - x) + (v21 * (1 - y) + v22 * y) * x
+    def grid_nodes(size, grid_size):
+        """Multiples of grid_size below size, followed by the last pixel"""
+        nodes = np.arange(0, size, grid_size)
+        if nodes[-1] != size - 1:
+            nodes = np.append(nodes, size - 1)
+        return nodes
 
     def generate(self):
         self.calc_delta()
         return self.gen_img()
 
     def calc_delta(self):
-        w = np.zeros(self.pt_count, dtype=np.float32)
-
         if self.pt_count < 2:
             return
 
-        i = 0
-        while 1:
-            if self.dst_w <= i < self.dst_w + self.grid_size - 1:
-                i = self.dst_w - 1
-            elif i >= self.dst_w:
-                break
-
-            j = 0
-            while 1:
-                if self.dst_h <= j < self.dst_h + self.grid_size - 1:
-                    j = self.dst_h - 1
-                elif j >= self.dst_h:
-                    break
-
-                sw = 0
-                swp = np.zeros(2, dtype=np.float32)
-                swq = np.zeros(2, dtype=np.float32)
-                new_pt = np.zeros(2, dtype=np.float32)
-                cur_pt = np.array([i, j], dtype=np.float32)
-
-                k = 0
-                for k in range(self.pt_count):
-                    if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
-                        break
-
-                    w[k] = 1.0 / (
-                        (i - self.dst_pts[k][0]) * (i - self.dst_pts[k][0])
-                        + (j - self.dst_pts[k][1]) * (j - self.dst_pts[k][1])
-                    )
-
-                    sw += w[k]
-                    swp = swp + w[k] * np.array(self.dst_pts[k])
-                    swq = swq + w[k] * np.array(self.src_pts[k])
-
-                if k == self.pt_count - 1:
-                    pstar = 1 / sw * swp
-                    qstar = 1 / sw * swq
-
-                    miu_s = 0
-                    for k in range(self.pt_count):
-                        if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
-                            continue
-                        pt_i = self.dst_pts[k] - pstar
-                        miu_s += w[k] * np.sum(pt_i * pt_i)
-
-                    cur_pt -= pstar
-                    cur_pt_j = np.array([-cur_pt[1], cur_pt[0]])
-
-                    for k in range(self.pt_count):
-                        if i == self.dst_pts[k][0] and j == self.dst_pts[k][1]:
-                            continue
-
-                        pt_i = self.dst_pts[k] - pstar
-                        pt_j = np.array([-pt_i[1], pt_i[0]])
-
-                        tmp_pt = np.zeros(2, dtype=np.float32)
-                        tmp_pt[0] = (
-                            np.sum(pt_i * cur_pt) * self.src_pts[k][0]
-                            - np.sum(pt_j * cur_pt) * self.src_pts[k][1]
-                        )
-                        tmp_pt[1] = (
-                            -np.sum(pt_i * cur_pt_j) * self.src_pts[k][0]
-                            + np.sum(pt_j * cur_pt_j) * self.src_pts[k][1]
-                        )
-                        tmp_pt *= w[k] / miu_s
-                        new_pt += tmp_pt
-
-                    new_pt += qstar
-                else:
-                    new_pt = self.src_pts[k]
-
-                self.rdx[j, i] = new_pt[0] - i
-                self.rdy[j, i] = new_pt[1] - j
-
-                j += self.grid_size
-            i += self.grid_size
+        p = np.asarray(self.dst_pts, dtype=np.float64)
+        q = np.asarray(self.src_pts, dtype=np.float64)
+        gx, gy = np.meshgrid(self.grid_x, self.grid_y)
+        v = np.stack([gx.ravel(), gy.ravel()], axis=1).astype(np.float64)
+
+        # (nodes, points) inverse squared distances, zero on coincident points
+        d2 = ((v[:, None, :] - p[None, :, :]) ** 2).sum(axis=-1)
+        coincident = d2 == 0
+        w = 1.0 / np.where(coincident, 1.0, d2)
+        w[coincident] = 0
+
+        sw = w.sum(axis=1, keepdims=True)
+        pstar = w.dot(p) / sw
+        qstar = w.dot(q) / sw
+        phat = p[None] - pstar[:, None]
+        miu_s = (w * (phat**2).sum(axis=-1)).sum(axis=1, keepdims=True)
+        vhat = v - pstar
+        # phat . vhat and phat_perp . vhat, phat_perp = (-phat_y, phat_x)
+        a = phat[..., 0] * vhat[:, None, 0] + phat[..., 1] * vhat[:, None, 1]
+        b = phat[..., 0] * vhat[:, None, 1] - phat[..., 1] * vhat[:, None, 0]
+        wm = w / miu_s
+        new_pt = np.stack(
+            [
+                (wm * (a * q[:, 0] - b * q[:, 1])).sum(axis=1),
+                (wm * (b * q[:, 0] + a * q[:, 1])).sum(axis=1),
+            ],
+            axis=1,
+        )
+        new_pt += qstar
+
+        # a node on a control point maps to its source point, except on the
+        # last one, where the other points are used
+        first = coincident.argmax(axis=1)
+        snap = coincident.any(axis=1) & (first < self.pt_count - 1)
+        new_pt[snap] = q[first[snap]]
+
+        shape = (len(self.grid_y), len(self.grid_x))
+        self.rdx = (new_pt[:, 0] - v[:, 0]).reshape(shape)
+        self.rdy = (new_pt[:, 1] - v[:, 1]).reshape(shape)
+
+    def interp_matrix(self, size, nodes):
+        """
+        (size, len(nodes)) weights interpolating node values to every pixel
+        within the grid cell starting at the node before it
+        """
+        pos = np.arange(size)
+        lo = pos // self.grid_size
+        start = nodes[lo]
+        end = start + self.grid_size
+        length = np.full(size, self.grid_size)
+        last = end >= size
+        end[last] = size - 1
+        length[last] = end[last] - start[last] + 1
+        hi = np.minimum(lo + 1, len(nodes) - 1)
+        t = (pos - start) / length
+        weights = np.zeros((size, len(nodes)))
+        weights[pos, lo] = 1 - t
+        weights[pos, hi] += t
+        return weights
 
     def gen_img(self):
         src_h, src_w = self.src.shape[:2]
-        dst = np.zeros_like(self.src, dtype=np.float32)
-
-        for i in np.arange(0, self.dst_h, self.grid_size):
-            for j in np.arange(0, self.dst_w, self.grid_size):
-                ni = i + self.grid_size
-                nj = j + self.grid_size
-                w = h = self.grid_size
-                if ni >= self.dst_h:
-                    ni = self.dst_h - 1
-                    h = ni - i + 1
-                if nj >= self.dst_w:
-                    nj = self.dst_w - 1
-                    w = nj - j + 1
-
-                di = np.reshape(np.arange(h), (-1, 1))
-                dj = np.reshape(np.arange(w), (1, -1))
-                delta_x = self.__bilinear_interp(
-                    di / h,
-                    dj / w,
-                    self.rdx[i, j],
-                    self.rdx[i, nj],
-                    self.rdx[ni, j],
-                    self.rdx[ni, nj],
-                )
-                delta_y = self.__bilinear_interp(
-                    di / h,
-                    dj / w,
-                    self.rdy[i, j],
-                    self.rdy[i, nj],
-                    self.rdy[ni, j],
-                    self.rdy[ni, nj],
-                )
-                nx = j + dj + delta_x * self.trans_ratio
-                ny = i + di + delta_y * self.trans_ratio
-                nx = np.clip(nx, 0, src_w - 1)
-                ny = np.clip(ny, 0, src_h - 1)
-                nxi = np.array(np.floor(nx), dtype=np.int32)
-                nyi = np.array(np.floor(ny), dtype=np.int32)
-                nxi1 = np.array(np.ceil(nx), dtype=np.int32)
-                nyi1 = np.array(np.ceil(ny), dtype=np.int32)
-
-                if len(self.src.shape) == 3:
-                    x = np.tile(np.expand_dims(ny - nyi, axis=-1), (1, 1, 3))
-                    y = np.tile(np.expand_dims(nx - nxi, axis=-1), (1, 1, 3))
-                else:
-                    x = ny - nyi
-                    y = nx - nxi
-                dst[i : i + h, j : j + w] = self.__bilinear_interp(
-                    x,
-                    y,
-                    self.src[nyi, nxi],
-                    self.src[nyi, nxi1],
-                    self.src[nyi1, nxi],
-                    self.src[nyi1, nxi1],
-                )
-
+        wy = self.interp_matrix(self.dst_h, self.grid_y)
+        wx = self.interp_matrix(self.dst_w, self.grid_x)
+        delta_x = wy.dot(self.rdx).dot(wx.T)
+        delta_y = wy.dot(self.rdy).dot(wx.T)
+
+        map_x = np.arange(self.dst_w) + delta_x * self.trans_ratio
+        map_y = np.arange(self.dst_h)[:, None] + delta_y * self.trans_ratio
+        map_x = np.clip(map_x, 0, src_w - 1).astype(np.float32)
+        map_y = np.clip(map_y, 0, src_h - 1).astype(np.float32)
+
+        dst = cv2.remap(
+            self.src.astype(np.float32),
+            map_x,
+            map_y,
+            interpolation=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
         dst = np.clip(dst, 0, 255)
         dst = np.array(dst, dtype=np.uint8)
 
@@ -0,0 +1,323 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Packed shards keep the encoded images of a dataset in one file, so reading
+a sample is a slice of a memory map instead of a stat and an open of a small
+file, which dominates the epoch time on network file systems. A shard with
+prefix p is made of
+    p.bin      the encoded images, back to back
+    p.idx.npy  offset, length, width and height of every image, width and
+               height are 0 when they were not computed
+    p.txt      "file_name\\tlabel" of every image, in the same order, which
+               is also a label file of SimpleDataSet
+"""
+
+import io
+import os
+import mmap
+import random
+import traceback
+
+import numpy as np
+from PIL import Image
+from paddle.io import Dataset
+
+from .imaug import transform, create_operators
+from .simple_dataset import MultiScaleDataSet
+
+__all__ = ["PackedShardWriter", "PackedShard", "PackedDataSet", "image_size"]
+
+INDEX_DTYPE = np.dtype(
+    [("offset", "<i8"), ("length", "<i8"), ("width", "<i4"), ("height", "<i4")]
+)
+
+# exif orientations that swap width and height when the image is decoded
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def image_size(buf):
+    """(width, height) of the encoded image as decoded by cv2, from its header"""
+    with Image.open(io.BytesIO(buf)) as img:
+        width, height = img.size
+        if img.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+    return width, height
+
+
+class PackedShardWriter(object):
+    """
+    Write a packed shard. The files are written under temporary names and
+    renamed when the writer is closed, so readers never see a partial shard.
+    args:
+        prefix(str): path of the shard without extension
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        dirname = os.path.dirname(prefix)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._tmp = ".tmp{}".format(os.getpid())
+        self._blob = open(prefix + ".bin" + self._tmp, "wb")
+        self._labels = open(prefix + ".txt" + self._tmp, "w", encoding="utf-8")
+        self._index = []
+        self._offset = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, buf, file_name, label, size=None):
+        """
+        Append an encoded image. size is its (width, height), None leaves it
+        unknown
+        """
+        width, height = size if size is not None else (0, 0)
+        self._blob.write(buf)
+        self._index.append((self._offset, len(buf), width, height))
+        self._offset += len(buf)
+        label = label.replace("\n", " ")
+        self._labels.write("{}\t{}\n".format(file_name, label))
+
+    def close(self):
+        if self._blob is None:
+            return
+        self._blob.close()
+        self._labels.close()
+        index = np.array(self._index, dtype=INDEX_DTYPE)
+        with open(self.prefix + ".idx.npy" + self._tmp, "wb") as f:
+            np.save(f, index)
+        # the index goes last, a shard is complete once its index exists
+        for ext in (".bin", ".txt", ".idx.npy"):
+            os.replace(self.prefix + ext + self._tmp, self.prefix + ext)
+        self._blob = None
+
+    def abort(self):
+        if self._blob is None:
+            return
+        self._blob.close()
+        self._labels.close()
+        for ext in (".bin", ".txt"):
+            os.remove(self.prefix + ext + self._tmp)
+        self._blob = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PackedShard(object):
+    """
+    Read only view of a packed shard. The image file is memory mapped on
+    first access in every process, so a shard can be shared with the
+    DataLoader workers, and read returns the encoded image without a copy.
+    """
+
+    def __init__(self, prefix):
+        if prefix.endswith(".idx.npy"):
+            prefix = prefix[: -len(".idx.npy")]
+        self.prefix = prefix
+        self.index = np.load(prefix + ".idx.npy")
+        with open(prefix + ".txt", "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == len(self.index), "{} has {} labels for {} images".format(
+            prefix, len(lines), len(self.index)
+        )
+        self.file_names, self.labels = [], []
+        for line in lines:
+            file_name, label = line.split("\t", 1)
+            self.file_names.append(file_name)
+            self.labels.append(label)
+        self._blob = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_blob"] = None
+        state["_pid"] = None
+        return state
+
+    @property
+    def blob(self):
+        if self._pid != os.getpid():
+            with open(self.prefix + ".bin", "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._blob = b""
+                else:
+                    self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._pid = os.getpid()
+        return self._blob
+
+    def read(self, idx):
+        """the encoded image idx, a uint8 array backed by the memory map"""
+        entry = self.index[idx]
+        return np.frombuffer(
+            self.blob,
+            dtype=np.uint8,
+            count=int(entry["length"]),
+            offset=int(entry["offset"]),
+        )
+
+    @property
+    def wh_ratio(self):
+        """width / height of the images, 0 where the size is unknown"""
+        height = self.index["height"].astype(np.float32)
+        width = self.index["width"].astype(np.float32)
+        return np.divide(width, height, out=np.zeros_like(width), where=height > 0)
+
+
+class PackedDataSet(Dataset):
+    """
+    Dataset of packed shards, see PackedShardWriter and
+    tools/pack_dataset.py. It takes the options of SimpleDataSet
+    with shard_list, the shard prefixes relative to data_dir, in place of
+    label_file_list.
+    """
+
+    def __init__(self, config, mode, logger, seed=None):
+        super(PackedDataSet, self).__init__()
+        self.logger = logger
+        self.mode = mode.lower()
+
+        global_config = config["Global"]
+        dataset_config = config[mode]["dataset"]
+        loader_config = config[mode]["loader"]
+
+        shard_list = dataset_config.pop("shard_list")
+        if isinstance(shard_list, str):
+            shard_list = [shard_list]
+        data_source_num = len(shard_list)
+        ratio_list = dataset_config.get("ratio_list", 1.0)
+        if isinstance(ratio_list, (float, int)):
+            ratio_list = [float(ratio_list)] * int(data_source_num)
+
+        assert (
+            len(ratio_list) == data_source_num
+        ), "The length of ratio_list should be the same as the shard_list."
+        self.data_dir = dataset_config.get("data_dir", "")
+        self.do_shuffle = loader_config["shuffle"]
+        self.seed = seed
+        logger.info("Initialize indexs of datasets:%s" % shard_list)
+        self.shards = [
+            PackedShard(os.path.join(self.data_dir, prefix)) for prefix in shard_list
+        ]
+        self.data_samples = self.get_sample_list(ratio_list)
+        self.data_idx_order_list = list(range(len(self.data_samples)))
+        if self.mode == "train" and self.do_shuffle:
+            self.shuffle_data_random()
+        ratios = [shard.wh_ratio for shard in self.shards]
+        self.wh_ratio = np.array(
+            [ratios[shard_idx][idx] for shard_idx, idx in self.data_samples],
+            dtype=np.float32,
+        )
+
+        self.ops = create_operators(dataset_config["transforms"], global_config)
+        self.ext_op_transform_idx = dataset_config.get("ext_op_transform_idx", 2)
+        self.need_reset = True in [x < 1 for x in ratio_list]
+
+    def get_sample_list(self, ratio_list):
+        data_samples = []
+        for shard_idx, shard in enumerate(self.shards):
+            samples = [(shard_idx, idx) for idx in range(len(shard))]
+            if self.mode == "train" or ratio_list[shard_idx] < 1.0:
+                random.seed(self.seed)
+                samples = random.sample(
+                    samples, round(len(samples) * ratio_list[shard_idx])
+                )
+            data_samples.extend(samples)
+        return data_samples
+
+    def shuffle_data_random(self):
+        random.seed(self.seed)
+        random.shuffle(self.data_samples)
+        return
+
+    def load_sample(self, file_idx):
+        shard_idx, idx = self.data_samples[file_idx]
+        shard = self.shards[shard_idx]
+        return {
+            "img_path": shard.file_names[idx],
+            "label": shard.labels[idx],
+            "image": shard.read(idx),
+        }
+
+    def get_ext_data(self):
+        ext_data_num = 0
+        for op in self.ops:
+            if hasattr(op, "ext_data_num"):
+                ext_data_num = getattr(op, "ext_data_num")
+                break
+        load_data_ops = self.ops[: self.ext_op_transform_idx]
+        ext_data = []
+
+        while len(ext_data) < ext_data_num:
+            file_idx = self.data_idx_order_list[np.random.randint(self.__len__())]
+            data = transform(self.load_sample(file_idx), load_data_ops)
+            if data is None:
+                continue
+            if "polys" in data.keys():
+                if data["polys"].shape[1] != 4:
+                    continue
+            ext_data.append(data)
+        return ext_data
+
+    # resizes a sample to the width and height chosen by the batch sampler
+    resize_norm_img = MultiScaleDataSet.resize_norm_img
+
+    def __getitem__(self, idx):
+        # MultiScaleSampler and WidthBucketSampler pass the tuple
+        # (width, height, index, wh_ratio), the last transform is then
+        # applied after resizing the sample to width x height
+        properties = None
+        if isinstance(idx, (list, tuple)):
+            properties, idx = idx, idx[2]
+        file_idx = self.data_idx_order_list[idx]
+        try:
+            data = self.load_sample(file_idx)
+            data["ext_data"] = self.get_ext_data()
+            if properties is None:
+                outs = transform(data, self.ops)
+            else:
+                outs = transform(data, self.ops[:-1])
+                if outs is not None:
+                    outs = self.resize_norm_img(outs, properties[0], properties[1])
+                    outs = transform(outs, self.ops[-1:])
+        except:
+            self.logger.error(
+                "When parsing sample {}, error happened with msg: {}".format(
+                    self.data_samples[file_idx], traceback.format_exc()
+                )
+            )
+            outs = None
+        if outs is None:
+            # during evaluation, we should fix the idx to get same results for many times of evaluation.
+            rnd_idx = (
+                np.random.randint(self.__len__())
+                if self.mode == "train"
+                else (idx + 1) % self.__len__()
+            )
+            if properties is not None:
+                rnd_idx = [properties[0], properties[1], rnd_idx, properties[3]]
+            return self.__getitem__(rnd_idx)
+        return outs
+
+    def __len__(self):
+        return len(self.data_idx_order_list)
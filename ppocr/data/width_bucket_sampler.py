@@ -0,0 +1,176 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import math
+import random
+
+import numpy as np
+from paddle.io import Sampler
+import paddle.distributed as dist
+
+from .packed_dataset import image_size
+
+
+class WidthBucketSampler(Sampler):
+    def __init__(
+        self,
+        data_source,
+        image_shape=[3, 48, 320],
+        batch_size=128,
+        bucket_widths=None,
+        num_buckets=4,
+        width_factor=8,
+        fix_bs=True,
+        is_training=True,
+        drop_last=False,
+        ratio_cache=None,
+        seed=None,
+    ):
+        """
+        Distributed batch sampler that groups recognition samples of similar
+        aspect ratio, so a batch is resized and padded to the width of its
+        bucket instead of the full width of image_shape. Batches are yielded
+        as (width, height, index, None) tuples like MultiScaleSampler, for
+        MultiScaleDataSet and PackedDataSet. Samples are shuffled within
+        their bucket and the batches of all buckets are shuffled every epoch,
+        all ranks see batches of the same bucket at the same step.
+        Args:
+            data_source(dataset)
+            image_shape(list): [c, h, w] of the widest bucket
+            batch_size(int): batch size per card of the widest bucket
+            bucket_widths(list): widths of the buckets, by default num_buckets
+                widths evenly spaced up to w
+            width_factor(int): bucket widths are rounded up to a multiple of it
+            fix_bs(bool): same batch size in every bucket, otherwise narrower
+                buckets get larger batches of the same number of pixels
+            ratio_cache(str): npz file caching the aspect ratios read from
+                the image headers, for datasets whose index has none
+        """
+        self.data_source = data_source
+        self.seed = data_source.seed if seed is None else seed
+        _, self.height, max_width = image_shape
+        if bucket_widths is None:
+            bucket_widths = [
+                max_width * (i + 1) / num_buckets for i in range(num_buckets)
+            ]
+        self.bucket_widths = sorted(
+            {int(math.ceil(w / width_factor) * width_factor) for w in bucket_widths}
+        )
+        max_width = self.bucket_widths[-1]
+        if fix_bs:
+            self.batch_sizes = [batch_size] * len(self.bucket_widths)
+        else:
+            self.batch_sizes = [
+                max(1, int(batch_size * max_width / w)) for w in self.bucket_widths
+            ]
+        self.shuffle = is_training
+        self.drop_last = drop_last
+        self.num_replicas = dist.get_world_size()
+        self.rank = dist.get_rank()
+        self.epoch = 0
+
+        self.wh_ratio = self.get_wh_ratio(data_source, ratio_cache)
+        # smallest bucket holding the resized width, unknown ratios go last
+        resized_w = np.ceil(self.wh_ratio * self.height)
+        bucket_ids = np.searchsorted(self.bucket_widths, resized_w, side="left")
+        bucket_ids[self.wh_ratio <= 0] = len(self.bucket_widths) - 1
+        bucket_ids = np.minimum(bucket_ids, len(self.bucket_widths) - 1)
+        self.buckets = [
+            np.flatnonzero(bucket_ids == i).tolist()
+            for i in range(len(self.bucket_widths))
+        ]
+        self.length = len(self.iter(0))
+
+    def get_wh_ratio(self, data_source, ratio_cache=None):
+        """width / height of every sample index of data_source, 0 if unknown"""
+        order = np.array(data_source.data_idx_order_list)
+        wh_ratio = getattr(data_source, "wh_ratio", None)
+        if wh_ratio is not None:
+            return np.asarray(wh_ratio, dtype=np.float32)[order]
+
+        data_lines = [data_source.data_lines[i] for i in order]
+        names = [
+            line.decode("utf-8").strip("\n").split(data_source.delimiter)[0]
+            for line in data_lines
+        ]
+        cached = {}
+        if ratio_cache and os.path.exists(ratio_cache):
+            with np.load(ratio_cache) as f:
+                cached = dict(zip(f["names"].tolist(), f["ratios"].tolist()))
+        ratios = np.zeros(len(names), dtype=np.float32)
+        num_cached = len(cached)
+        for i, name in enumerate(names):
+            if name not in cached:
+                try:
+                    path = os.path.join(data_source.data_dir, name)
+                    with open(path, "rb") as f:
+                        width, height = image_size(f.read())
+                    cached[name] = width / height
+                except Exception:
+                    cached[name] = 0.0
+            ratios[i] = cached[name]
+        if ratio_cache and len(cached) > num_cached:
+            tmp_path = "{}.tmp{}.npz".format(ratio_cache, os.getpid())
+            np.savez(
+                tmp_path,
+                names=np.array(list(cached.keys())),
+                ratios=np.array(list(cached.values()), dtype=np.float32),
+            )
+            os.replace(tmp_path, ratio_cache)
+        return ratios
+
+    def iter(self, epoch):
+        rng = random.Random(epoch if self.seed is None else self.seed + epoch)
+        step_batches = []
+        for width, bsz, indices in zip(
+            self.bucket_widths, self.batch_sizes, self.buckets
+        ):
+            if not indices:
+                continue
+            indices = list(indices)
+            if self.shuffle:
+                rng.shuffle(indices)
+            # one step takes bsz samples of the bucket on every rank
+            step_size = bsz * self.num_replicas
+            if len(indices) % step_size:
+                # the last step is filled up with samples of the same bucket,
+                # drop_last drops it unless it is the only one
+                if self.drop_last and len(indices) > step_size:
+                    indices = indices[: len(indices) - len(indices) % step_size]
+                else:
+                    num_steps = int(math.ceil(len(indices) / step_size))
+                    pad = num_steps * step_size - len(indices)
+                    indices += (indices * int(math.ceil(pad / len(indices))))[:pad]
+            for start in range(0, len(indices), step_size):
+                step = indices[start : start + step_size]
+                step_batches.append((width, step[self.rank :: self.num_replicas]))
+        if self.shuffle:
+            rng.shuffle(step_batches)
+        return [
+            [(width, self.height, idx, None) for idx in batch]
+            for width, batch in step_batches
+        ]
+
+    def __iter__(self):
+        batches = self.iter(self.epoch)
+        self.epoch += 1
+        for batch in batches:
+            yield batch
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __len__(self):
+        return self.length
@@ -36,8 +36,12 @@ class DistillationMetric(object):
         self.metrics = dict()
         mod = importlib.import_module(__name__)
         for key in preds:
+            kwargs = self.kwargs
+            if self.base_metric_name == "RecMetric" and key != self.key:
+                # only the main model writes its predictions
+                kwargs = dict(self.kwargs, prediction_path=None)
             self.metrics[key] = getattr(mod, self.base_metric_name)(
-                main_indicator=self.main_indicator, **self.kwargs
+                main_indicator=self.main_indicator, **kwargs
             )
             self.metrics[key].reset()
 
@@ -15,18 +15,43 @@
 from rapidfuzz.distance import Levenshtein
 from difflib import SequenceMatcher
 
+import os
 import numpy as np
 import string
+import paddle.distributed as dist
+
+from ppocr.utils.prediction_sink import PredictionSink
 
 
 class RecMetric(object):
     def __init__(
-        self, main_indicator="acc", is_filter=False, ignore_space=True, **kwargs
+        self,
+        main_indicator="acc",
+        is_filter=False,
+        ignore_space=True,
+        prediction_path="license_plates.txt",
+        prediction_format="txt",
+        **kwargs,
     ):
         self.main_indicator = main_indicator
         self.is_filter = is_filter
         self.ignore_space = ignore_space
         self.eps = 1e-5
+        # predictions of the current pass are buffered and the file is
+        # replaced when the metric is read, set prediction_path to None to
+        # disable it
+        if (
+            prediction_path
+            and dist.get_world_size() > 1
+            and "{rank}" not in prediction_path
+            and "{pid}" not in prediction_path
+        ):
+            # every eval rank sees its own part of the data, keep them apart
+            root, ext = os.path.splitext(prediction_path)
+            prediction_path = root + ".rank{rank}" + ext
+        self.prediction_path = prediction_path
+        self.prediction_format = prediction_format
+        self.prediction_sink = None
         self.reset()
 
     def _normalize_text(self, text):
@@ -37,9 +62,17 @@ class RecMetric(object):
 
     def __call__(self, pred_label, *args, **kwargs):
         preds, labels = pred_label
-        with open('license_plates.txt', 'a') as f:
-            for (pred, pred_conf), (target, _) in zip(preds, labels):
-                f.write(f'{pred} {target}\n')
+        if self.prediction_path:
+            if self.prediction_sink is None:
+                self.prediction_sink = PredictionSink(
+                    self.prediction_path,
+                    fields=("pred", "label"),
+                    format=self.prediction_format,
+                )
+            self.prediction_sink.write_many(
+                {"pred": pred, "label": target, "conf": float(pred_conf)}
+                for (pred, pred_conf), (target, _) in zip(preds, labels)
+            )
         correct_num = 0
         all_num = 0
         norm_edit_dis = 0.0
@@ -71,6 +104,9 @@ class RecMetric(object):
         """
         acc = 1.0 * self.correct_num / (self.all_num + self.eps)
         norm_edit_dis = 1 - self.norm_edit_dis / (self.all_num + self.eps)
+        if self.prediction_sink is not None:
+            self.prediction_sink.close()
+            self.prediction_sink = None
         self.reset()
         return {"acc": acc, "norm_edit_dis": norm_edit_dis}
 
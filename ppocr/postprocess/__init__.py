@@ -18,46 +18,59 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import copy
+import importlib
 
 __all__ = ["build_post_process"]
 
-from .db_postprocess import DBPostProcess, DistillationDBPostProcess
-from .east_postprocess import EASTPostProcess
-from .sast_postprocess import SASTPostProcess
-from .fce_postprocess import FCEPostProcess
-from .rec_postprocess import (
-    CTCLabelDecode,
-    AttnLabelDecode,
-    SRNLabelDecode,
-    DistillationCTCLabelDecode,
-    NRTRLabelDecode,
-    SARLabelDecode,
-    SEEDLabelDecode,
-    PRENLabelDecode,
-    ViTSTRLabelDecode,
-    ABINetLabelDecode,
-    SPINLabelDecode,
-    VLLabelDecode,
-    RFLLabelDecode,
-    SATRNLabelDecode,
-    ParseQLabelDecode,
-    CPPDLabelDecode,
-)
-from .cls_postprocess import ClsPostProcess
-from .pg_postprocess import PGPostProcess
-from .vqa_token_ser_layoutlm_postprocess import (
-    VQASerTokenLayoutLMPostProcess,
-    DistillationSerPostProcess,
-)
-from .vqa_token_re_layoutlm_postprocess import (
-    VQAReTokenLayoutLMPostProcess,
-    DistillationRePostProcess,
-)
-from .table_postprocess import TableMasterLabelDecode, TableLabelDecode
-from .picodet_postprocess import PicoDetPostProcess
-from .ct_postprocess import CTPostProcess
-from .drrg_postprocess import DRRGPostprocess
-from .rec_postprocess import CANLabelDecode
+# post process classes and their modules, a module is imported the first
+# time one of its classes is used, so e.g. the recognizer does not load the
+# detection post processes with shapely and pyclipper
+_POST_PROCESS_MODULES = {
+    "DBPostProcess": "db_postprocess",
+    "DistillationDBPostProcess": "db_postprocess",
+    "EASTPostProcess": "east_postprocess",
+    "SASTPostProcess": "sast_postprocess",
+    "FCEPostProcess": "fce_postprocess",
+    "CTCLabelDecode": "rec_postprocess",
+    "AttnLabelDecode": "rec_postprocess",
+    "SRNLabelDecode": "rec_postprocess",
+    "DistillationCTCLabelDecode": "rec_postprocess",
+    "NRTRLabelDecode": "rec_postprocess",
+    "SARLabelDecode": "rec_postprocess",
+    "DistillationSARLabelDecode": "rec_postprocess",
+    "SEEDLabelDecode": "rec_postprocess",
+    "PRENLabelDecode": "rec_postprocess",
+    "ViTSTRLabelDecode": "rec_postprocess",
+    "ABINetLabelDecode": "rec_postprocess",
+    "SPINLabelDecode": "rec_postprocess",
+    "VLLabelDecode": "rec_postprocess",
+    "RFLLabelDecode": "rec_postprocess",
+    "SATRNLabelDecode": "rec_postprocess",
+    "ParseQLabelDecode": "rec_postprocess",
+    "CPPDLabelDecode": "rec_postprocess",
+    "CANLabelDecode": "rec_postprocess",
+    "ClsPostProcess": "cls_postprocess",
+    "PGPostProcess": "pg_postprocess",
+    "VQASerTokenLayoutLMPostProcess": "vqa_token_ser_layoutlm_postprocess",
+    "DistillationSerPostProcess": "vqa_token_ser_layoutlm_postprocess",
+    "VQAReTokenLayoutLMPostProcess": "vqa_token_re_layoutlm_postprocess",
+    "DistillationRePostProcess": "vqa_token_re_layoutlm_postprocess",
+    "TableMasterLabelDecode": "table_postprocess",
+    "TableLabelDecode": "table_postprocess",
+    "PicoDetPostProcess": "picodet_postprocess",
+    "CTPostProcess": "ct_postprocess",
+    "DRRGPostprocess": "drrg_postprocess",
+    "PlateCTCLabelDecode": "plate_postprocess",
+    "PSEPostProcess": "pse_postprocess",
+}
+
+
+def __getattr__(name):
+    # keeps "from ppocr.postprocess import DBPostProcess" working
+    if name in _POST_PROCESS_MODULES:
+        module = importlib.import_module("." + _POST_PROCESS_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 
 def build_post_process(config, global_config=None):
@@ -96,11 +109,10 @@ def build_post_process(config, global_config=None):
         "SATRNLabelDecode",
         "ParseQLabelDecode",
         "CPPDLabelDecode",
+        "PlateCTCLabelDecode",
     ]
 
     if config["name"] == "PSEPostProcess":
-        from .pse_postprocess import PSEPostProcess
-
         support_dict.append("PSEPostProcess")
 
     config = copy.deepcopy(config)
@@ -113,6 +125,6 @@ def build_post_process(config, global_config=None):
     assert module_name in support_dict, Exception(
         "post process only support {}".format(support_dict)
     )
-    module_class = eval(module_name)(**config)
+    module_class = __getattr__(module_name)(**config)
     # print(f'MOdule class from init , {eval(module_name),{**config}}')
     return module_class
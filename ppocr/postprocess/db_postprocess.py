@@ -15,6 +15,7 @@
 This code is refered from:
 https://github.com/WenmuZhou/DBNet.pytorch/blob/master/post_processing/seg_detector_representer.py
 """
+
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
@@ -22,8 +23,6 @@ from __future__ import print_function
 import numpy as np
 import cv2
 import paddle
-from shapely.geometry import Polygon
-import pyclipper
 
 
 class DBPostProcess(object):
@@ -52,7 +51,10 @@ class DBPostProcess(object):
         assert score_mode in [
             "slow",
             "fast",
-        ], "Score mode must be in [slow, fast] but got: {}".format(score_mode)
+            "component",
+        ], "Score mode must be in [slow, fast, component] but got: {}".format(
+            score_mode
+        )
 
         self.dilation_kernel = None if not use_dilation else np.array([[1, 1], [1, 1]])
 
@@ -68,11 +70,17 @@ class DBPostProcess(object):
         boxes = []
         scores = []
 
-        contours, _ = cv2.findContours(
-            (bitmap * 255).astype(np.uint8), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE
-        )
+        if self.score_mode == "component":
+            contours = self.component_contours(bitmap)
+        else:
+            contours, _ = cv2.findContours(
+                (bitmap * 255).astype(np.uint8),
+                cv2.RETR_LIST,
+                cv2.CHAIN_APPROX_SIMPLE,
+            )
+        contours = contours[: self.max_candidates]
 
-        for contour in contours[: self.max_candidates]:
+        for contour in contours:
             epsilon = 0.002 * cv2.arcLength(contour, True)
             approx = cv2.approxPolyDP(contour, epsilon, True)
             points = approx.reshape((-1, 2))
@@ -115,6 +123,9 @@ class DBPostProcess(object):
         bitmap = _bitmap
         height, width = bitmap.shape
 
+        if self.score_mode == "component":
+            return self.boxes_from_components(pred, bitmap, dest_width, dest_height)
+
         outs = cv2.findContours(
             (bitmap * 255).astype(np.uint8), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE
         )
@@ -157,7 +168,138 @@ class DBPostProcess(object):
             scores.append(score)
         return np.array(boxes, dtype="int32"), scores
 
+    def component_contours(self, bitmap):
+        """
+        The outer contour of every connected text region. RETR_CCOMP puts the
+        boundaries of the holes of a region on a second level, so those are
+        dropped while regions lying inside a hole are kept.
+        """
+        outs = cv2.findContours(
+            bitmap.astype(np.uint8) * 255, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE
+        )
+        contours, hierarchy = outs[-2], outs[-1]
+        if hierarchy is None:
+            return []
+        return [
+            contour
+            for contour, parent in zip(contours, hierarchy[0, :, 3].tolist())
+            if parent < 0
+        ]
+
+    def boxes_from_components(self, pred, bitmap, dest_width, dest_height):
+        """
+        Batched boxes_from_bitmap for score_mode "component": one contour per
+        text region, scored like score_mode "fast" over its rotated
+        rectangle by rect_scores, then the rectangles are unclipped, ordered and rescaled as
+        arrays instead of one pyclipper offset per box.
+        """
+        height, width = bitmap.shape
+        contours = self.component_contours(bitmap)[: self.max_candidates]
+        rects = [cv2.minAreaRect(contour) for contour in contours]
+        rects = [rect for rect in rects if min(rect[1]) >= self.min_size]
+        scores = self.rect_scores(pred, rects)
+        keep = scores >= self.box_thresh
+        rects = [rect for rect, flag in zip(rects, keep.tolist()) if flag]
+        if len(rects) == 0:
+            return np.zeros((0, 4, 2), dtype="int32"), []
+        scores = scores[keep]
+        centers = np.array([rect[0] for rect in rects], dtype="float64")
+        sizes = np.array([rect[1] for rect in rects], dtype="float64")
+        angles = np.array([rect[2] for rect in rects], dtype="float64")
+
+        # offsetting a w x h rectangle by d and taking the min area rect again
+        # gives the (w + 2d) x (h + 2d) rectangle with the same center and angle
+        distance = sizes.prod(axis=1) * self.unclip_ratio / (2 * sizes.sum(axis=1))
+        sizes = sizes + 2 * distance[:, None]
+        keep = sizes.min(axis=1) >= self.min_size + 2
+        centers, sizes, angles, scores = (
+            centers[keep],
+            sizes[keep],
+            angles[keep],
+            scores[keep],
+        )
+
+        boxes = self.order_box_points(self.rect_points(centers, sizes, angles))
+        boxes[:, :, 0] = np.clip(
+            np.round(boxes[:, :, 0] / width * dest_width), 0, dest_width
+        )
+        boxes[:, :, 1] = np.clip(
+            np.round(boxes[:, :, 1] / height * dest_height), 0, dest_height
+        )
+        return boxes.astype("int32"), scores.tolist()
+
+    def rect_scores(self, pred, rects):
+        """
+        box_score_fast of every rotated rectangle in one pass: the rectangles
+        are drawn into one label map and the mean of pred under every label
+        comes from np.bincount. Rectangles whose bounding boxes overlap would
+        hide each other's pixels, those are scored by box_score_fast.
+        """
+        if len(rects) == 0:
+            return np.zeros((0,), dtype="float64")
+        h, w = pred.shape[:2]
+        points = np.array([cv2.boxPoints(rect) for rect in rects])
+        # the bounding boxes and polygon pixels of box_score_fast
+        lo = np.floor(points.min(axis=1)).astype("int32")
+        hi = np.ceil(points.max(axis=1)).astype("int32")
+        lo = np.clip(lo, 0, [w - 1, h - 1])
+        hi = np.clip(hi, 0, [w - 1, h - 1])
+        polys = (points - lo[:, None, :]).astype("int32") + lo[:, None, :]
+
+        overlap = (lo[:, None, :] <= hi[None, :, :]) & (
+            hi[:, None, :] >= lo[None, :, :]
+        )
+        overlap = overlap.all(axis=2)
+        np.fill_diagonal(overlap, False)
+        shared = overlap.any(axis=1)
+
+        labels = np.zeros((h, w), dtype=np.int32)
+        for label in np.flatnonzero(~shared).tolist():
+            cv2.fillPoly(labels, polys[label][None], label + 1)
+        num_labels = len(rects) + 1
+        sums = np.bincount(labels.ravel(), weights=pred.ravel(), minlength=num_labels)
+        counts = np.bincount(labels.ravel(), minlength=num_labels)
+        scores = sums[1:] / np.maximum(counts[1:], 1)
+        for index in np.flatnonzero(shared).tolist():
+            scores[index] = self.box_score_fast(pred, points[index])
+        return scores
+
+    @staticmethod
+    def rect_points(centers, sizes, angles):
+        """cv2.boxPoints for [N] rotated rectangles at once, returns [N, 4, 2]."""
+        theta = np.deg2rad(angles)
+        b = np.cos(theta) * 0.5
+        a = np.sin(theta) * 0.5
+        w, h = sizes[:, 0], sizes[:, 1]
+        cx, cy = centers[:, 0], centers[:, 1]
+        p0 = np.stack([cx - a * h - b * w, cy + b * h - a * w], axis=1)
+        p1 = np.stack([cx + a * h - b * w, cy - b * h - a * w], axis=1)
+        p2 = 2 * centers - p0
+        p3 = 2 * centers - p1
+        return np.stack([p0, p1, p2, p3], axis=1)
+
+    @staticmethod
+    def order_box_points(points):
+        """
+        The corner order of get_mini_boxes for [N, 4, 2] points: top-left,
+        top-right, bottom-right, bottom-left.
+        """
+        order = np.argsort(points[:, :, 0], axis=1, kind="stable")
+        points = np.take_along_axis(points, order[:, :, None], axis=1)
+        left_swap = points[:, 1, 1] <= points[:, 0, 1]
+        right_swap = points[:, 3, 1] <= points[:, 2, 1]
+        rows = np.arange(len(points))
+        top_left = points[rows, left_swap.astype(int)]
+        bottom_left = points[rows, 1 - left_swap.astype(int)]
+        top_right = points[rows, 2 + right_swap.astype(int)]
+        bottom_right = points[rows, 3 - right_swap.astype(int)]
+        return np.stack([top_left, top_right, bottom_right, bottom_left], axis=1)
+
     def unclip(self, box, unclip_ratio):
+        # only needed for the boxes of a detection, not when importing
+        from shapely.geometry import Polygon
+        import pyclipper
+
         poly = Polygon(box)
         distance = poly.area * unclip_ratio / poly.length
         offset = pyclipper.PyclipperOffset()
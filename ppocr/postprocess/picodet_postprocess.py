@@ -13,7 +13,6 @@
 # limitations under the License.
 
 import numpy as np
-from scipy.special import softmax
 
 
 def hard_nms(box_scores, iou_threshold, top_k=-1, candidate_size=200):
@@ -190,7 +189,10 @@ class PicoDetPostProcess(object):
                 ct_col = (ww.flatten() + 0.5) * stride
                 center = np.stack((ct_col, ct_row, ct_col, ct_row), axis=1)
 
-                # box distribution to distance
+                # box distribution to distance, scipy is only imported by
+                # the layout model
+                from scipy.special import softmax
+
                 reg_range = np.arange(reg_max + 1)
                 box_distance = box_distribute.reshape((-1, reg_max + 1))
                 box_distance = softmax(box_distance, axis=1)
@@ -0,0 +1,356 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import string
+
+import numpy as np
+import paddle
+
+from .rec_postprocess import CTCLabelDecode
+
+__all__ = ["PlateGrammar", "PlateCTCLabelDecode"]
+
+# character classes usable in a plate grammar
+PLATE_SYMBOLS = {
+    "D": string.digits,
+    "L": string.ascii_uppercase,
+    "S": string.ascii_uppercase,
+    "A": string.digits + string.ascii_uppercase,
+}
+
+# Indian plates, e.g. MH12AB1234, DL3CAB1234 and the BH series 22BH1234AA
+INDIAN_PLATE_GRAMMAR = "SS D(D) (L(L(L))) DDDD | DD 'BH' DDDD L(L)"
+
+
+class PlateGrammar(object):
+    """
+    Compile a plate format into a DFA over the indices of a CTC character list.
+    syntax:
+        D digit, L letter, S state code letter, A digit or letter,
+        'XY' literal characters, (...) optional group, | alternatives,
+        whitespace is ignored.
+    args:
+        grammar(str): plate format, e.g. "SS DD L(L) DDDD"
+        character(list): decoder characters, index 0 is the CTC blank
+    attributes:
+        transitions(ndarray): int32 [num_states, num_classes], next state or -1
+        accept(ndarray): bool [num_states]
+    """
+
+    def __init__(self, grammar, character):
+        self.grammar = grammar
+        self.char_to_idx = {}
+        for idx, char in enumerate(character):
+            if idx > 0:
+                self.char_to_idx.setdefault(char, idx)
+        self.num_classes = len(character)
+        alternatives = self._parse(grammar)
+        self.transitions, self.accept = self._compile(alternatives)
+
+    def _parse(self, grammar):
+        pos = 0
+
+        def parse_seq(depth):
+            nonlocal pos
+            alternatives = [[]]
+            while pos < len(grammar):
+                ch = grammar[pos]
+                pos += 1
+                if ch.isspace():
+                    continue
+                elif ch == "(":
+                    alternatives[-1].append(("opt", parse_seq(depth + 1)))
+                elif ch == ")":
+                    if depth == 0:
+                        raise ValueError(
+                            "unbalanced ')' in plate grammar: {}".format(grammar)
+                        )
+                    return alternatives
+                elif ch == "|":
+                    alternatives.append([])
+                elif ch == "'":
+                    end = grammar.find("'", pos)
+                    if end < 0:
+                        raise ValueError(
+                            "unterminated literal in plate grammar: {}".format(grammar)
+                        )
+                    for literal in grammar[pos:end]:
+                        alternatives[-1].append(("set", literal))
+                    pos = end + 1
+                elif ch in PLATE_SYMBOLS:
+                    alternatives[-1].append(("set", PLATE_SYMBOLS[ch]))
+                else:
+                    raise ValueError(
+                        "unknown symbol {!r} in plate grammar: {}".format(ch, grammar)
+                    )
+            if depth > 0:
+                raise ValueError("unbalanced '(' in plate grammar: {}".format(grammar))
+            return alternatives
+
+        return parse_seq(0)
+
+    def _compile(self, alternatives):
+        # Thompson NFA, then subset construction
+        nfa_trans, nfa_eps = [], []
+
+        def new_state():
+            nfa_trans.append({})
+            nfa_eps.append(set())
+            return len(nfa_trans) - 1
+
+        def emit_alternatives(alternatives, start):
+            end = new_state()
+            for seq in alternatives:
+                nfa_eps[emit_seq(seq, start)].add(end)
+            return end
+
+        def emit_seq(seq, cur):
+            for kind, value in seq:
+                if kind == "set":
+                    nxt = new_state()
+                    for char in value:
+                        idx = self.char_to_idx.get(char)
+                        if idx is not None:
+                            nfa_trans[cur].setdefault(idx, set()).add(nxt)
+                    cur = nxt
+                else:
+                    end = emit_alternatives(value, cur)
+                    nfa_eps[cur].add(end)
+                    cur = end
+            return cur
+
+        start = new_state()
+        final = emit_alternatives(alternatives, start)
+
+        def closure(states):
+            stack, seen = list(states), set(states)
+            while stack:
+                for nxt in nfa_eps[stack.pop()]:
+                    if nxt not in seen:
+                        seen.add(nxt)
+                        stack.append(nxt)
+            return frozenset(seen)
+
+        dfa_ids = {closure([start]): 0}
+        queue = [closure([start])]
+        rows, accept = [], []
+        while queue:
+            states = queue.pop(0)
+            row = np.full(self.num_classes, -1, dtype=np.int32)
+            moves = {}
+            for state in states:
+                for idx, targets in nfa_trans[state].items():
+                    moves.setdefault(idx, set()).update(targets)
+            for idx, targets in moves.items():
+                target = closure(targets)
+                if target not in dfa_ids:
+                    dfa_ids[target] = len(dfa_ids)
+                    queue.append(target)
+                row[idx] = dfa_ids[target]
+            rows.append(row)
+            accept.append(final in states)
+        accept = np.array(accept, dtype=bool)
+        if not accept[1:].any():
+            raise ValueError(
+                "plate grammar {} accepts no text with the given characters".format(
+                    self.grammar
+                )
+            )
+        return np.stack(rows), accept
+
+    def match(self, text):
+        state = 0
+        for char in text:
+            idx = self.char_to_idx.get(char)
+            if idx is None:
+                return False
+            state = self.transitions[state, idx]
+            if state < 0:
+                return False
+        return bool(self.accept[state])
+
+
+class PlateCTCLabelDecode(CTCLabelDecode):
+    """
+    CTC prefix beam search constrained by a plate grammar. Prefixes that the
+    grammar cannot complete are pruned as soon as they are extended, and the
+    best prefix ending in an accepting state is returned. Rows without any
+    accepted prefix fall back to the greedy result.
+    args:
+        grammar(str): plate format, see PlateGrammar
+        beam_width(int): number of prefixes kept per frame
+        prune_prob(float): characters below this probability are not expanded
+        blank_skip_prob(float): frames whose blank probability is above this
+            only update the scores of the current prefixes
+    """
+
+    def __init__(
+        self,
+        character_dict_path=None,
+        use_space_char=False,
+        grammar=INDIAN_PLATE_GRAMMAR,
+        beam_width=10,
+        prune_prob=1e-3,
+        blank_skip_prob=0.999,
+        **kwargs,
+    ):
+        super(PlateCTCLabelDecode, self).__init__(character_dict_path, use_space_char)
+        self.grammar = PlateGrammar(grammar, self.character)
+        self.beam_width = beam_width
+        self.log_prune_prob = np.log(prune_prob)
+        self.log_blank_skip_prob = np.log(blank_skip_prob)
+
+    def __call__(self, preds, label=None, *args, **kwargs):
+        if isinstance(preds, tuple) or isinstance(preds, list):
+            preds = preds[-1]
+        if isinstance(preds, paddle.Tensor):
+            preds = preds.numpy()
+        preds_idx = preds.argmax(axis=2)
+        preds_prob = np.take_along_axis(preds, preds_idx[:, :, None], axis=2)[:, :, 0]
+        greedy = self.decode(preds_idx, preds_prob, is_remove_duplicate=True)
+        log_probs = np.log(np.maximum(preds.astype(np.float64), 1e-30))
+        beam = self.beam_search(log_probs)
+        text = [g if b is None else b for g, b in zip(greedy, beam)]
+        if label is None:
+            return text
+        label = self.decode(label)
+        return text, label
+
+    def beam_search(self, log_probs):
+        """
+        Prefix beam search over the whole batch at once, every beam array is
+        [batch_size, beam_width].
+        log_probs: float64 [batch_size, seq_len, num_classes] log softmax.
+        return a list with (text, conf) per row, or None when no prefix of the
+        row matches the grammar. conf is the mean probability of the frames
+        that added the characters of the prefix, the confidence greedy
+        decoding reports for the same path, so drop_score means the same with
+        and without a grammar.
+        """
+        batch_size, seq_len, num_classes = log_probs.shape
+        beam = self.beam_width
+        num_cand = min(beam, num_classes - 1)
+        neg_inf = -np.inf
+        rows = np.arange(batch_size)[:, None]
+        transitions = self.grammar.transitions
+
+        # the most likely characters of every frame, best first
+        cand_all = np.argsort(-log_probs[:, :, 1:], axis=2)[:, :, :num_cand] + 1
+        cand_lp_all = np.take_along_axis(log_probs, cand_all, axis=2)
+        cand_lp_all[cand_lp_all < self.log_prune_prob] = neg_inf
+        cand_lp_all[log_probs[:, :, 0] >= self.log_blank_skip_prob] = neg_inf
+        # number of characters worth expanding per frame over the batch
+        cand_num = np.isfinite(cand_lp_all).sum(axis=2).max(axis=0)
+
+        lp_blank = np.full((batch_size, beam), neg_inf)
+        lp_blank[:, 0] = 0.0
+        lp_char = np.full((batch_size, beam), neg_inf)
+        last = np.zeros((batch_size, beam), dtype=np.int64)
+        states = np.zeros((batch_size, beam), dtype=np.int64)
+        # prefixes are preselected by a base num_classes rolling hash, empty
+        # beams use -1. The labels of every prefix are kept zero padded with
+        # the summed probability of the frames that added them
+        hashes = np.full((batch_size, beam), -1, dtype=np.int64)
+        hashes[:, 0] = 0
+        prefix = np.zeros((batch_size, beam, seq_len), dtype=np.int64)
+        prefix_len = np.zeros((batch_size, beam), dtype=np.int64)
+        prefix_prob = np.zeros((batch_size, beam))
+
+        for t in range(seq_len):
+            frame = log_probs[:, t]
+            lp_total = np.logaddexp(lp_blank, lp_char)
+            stay_blank = lp_total + frame[:, :1]
+            # a repeated character without a blank in between extends nothing
+            stay_char = np.where(
+                last > 0, lp_char + np.take_along_axis(frame, last, axis=1), neg_inf
+            )
+            k = cand_num[t]
+            if k == 0:
+                lp_blank, lp_char = stay_blank, stay_char
+                continue
+
+            cand = cand_all[:, t, :k]
+            next_states = transitions[states[:, :, None], cand[:, None, :]]
+            ext = np.where(
+                cand[:, None, :] == last[:, :, None],
+                lp_blank[:, :, None],
+                lp_total[:, :, None],
+            )
+            ext = ext + cand_lp_all[:, t, None, :k]
+            ext[next_states < 0] = neg_inf
+
+            # merge extensions that reproduce an existing prefix into its
+            # score. The rolling hash only preselects, every hit is checked
+            # against the labels so long prefixes never merge by collision
+            ext_hash = (hashes[:, :, None] * num_classes + cand[:, None, :]) & (
+                (1 << 62) - 1
+            )
+            same = ext_hash[:, :, :, None] == hashes[:, None, None, :]
+            hits = np.nonzero(same)
+            if len(hits[0]):
+                b, i, c, j = hits
+                width = prefix_len.max() + 1
+                child = prefix[b, j, :width].copy()
+                child[np.arange(len(b)), prefix_len[b, i]] -= cand[b, c]
+                same[hits] = (prefix_len[b, j] == prefix_len[b, i] + 1) & (
+                    child == prefix[b, i, :width]
+                ).all(axis=1)
+            if same.any():
+                merged = np.where(same, ext[:, :, :, None], neg_inf)
+                stay_char = np.logaddexp(
+                    stay_char, np.logaddexp.reduce(merged, axis=(1, 2))
+                )
+                ext[same.any(axis=3)] = neg_inf
+
+            scores = np.concatenate(
+                [np.logaddexp(stay_blank, stay_char), ext.reshape(batch_size, -1)],
+                axis=1,
+            )
+            keep = np.argpartition(-scores, beam - 1, axis=1)[:, :beam]
+            is_stay = keep < beam
+            src = np.where(is_stay, keep, (keep - beam) // k)
+            col = np.where(is_stay, 0, (keep - beam) % k)
+
+            new_char = rows, src, col
+            lp_blank = np.where(is_stay, stay_blank[rows, src], neg_inf)
+            lp_char = np.where(is_stay, stay_char[rows, src], ext[new_char])
+            added = cand[rows, col]
+            last = np.where(is_stay, last[rows, src], added)
+            states = np.where(is_stay, states[rows, src], next_states[new_char])
+            hashes = np.where(is_stay, hashes[rows, src], ext_hash[new_char])
+            hashes[np.isneginf(np.logaddexp(lp_blank, lp_char))] = -1
+            prefix = prefix[rows, src]
+            prefix_len = prefix_len[rows, src]
+            extended = ~is_stay
+            prefix[extended, prefix_len[extended]] = added[extended]
+            prefix_len = prefix_len + extended
+            prefix_prob = prefix_prob[rows, src] + np.where(
+                extended, np.exp(frame[rows, added]), 0.0
+            )
+
+        scores = np.where(
+            self.grammar.accept[states], np.logaddexp(lp_blank, lp_char), neg_inf
+        )
+        best = scores.argmax(axis=1)
+        result = []
+        for batch_idx, beam_idx in enumerate(best):
+            score = scores[batch_idx, beam_idx]
+            if score == neg_inf:
+                result.append(None)
+                continue
+            length = prefix_len[batch_idx, beam_idx]
+            chars = self.character_table[prefix[batch_idx, beam_idx, :length]]
+            conf = float(prefix_prob[batch_idx, beam_idx] / max(length, 1))
+            result.append(("".join(chars), conf))
+        return result
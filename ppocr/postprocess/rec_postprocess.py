@@ -50,6 +50,8 @@ class BaseRecLabelDecode(object):
         for i, char in enumerate(dict_character):
             self.dict[char] = i
         self.character = dict_character
+        # index -> character table used by the batched decode
+        self.character_table = np.array(dict_character, dtype=object)
 
     def pred_reverse(self, pred):
         pred_re = []
@@ -144,6 +146,68 @@ class BaseRecLabelDecode(object):
         return_word_box=False,
     ):
         """convert text-index into text-label."""
+        if isinstance(text_index, paddle.Tensor):
+            text_index = text_index.numpy()
+        if isinstance(text_prob, paddle.Tensor):
+            text_prob = text_prob.numpy()
+        if not isinstance(text_index, np.ndarray) or text_index.ndim != 2:
+            return self.decode_rows(
+                text_index, text_prob, is_remove_duplicate, return_word_box
+            )
+
+        # duplicate and ignored-token masks for the whole batch at once
+        batch_size, seq_len = text_index.shape
+        selection = np.ones(text_index.shape, dtype=bool)
+        if is_remove_duplicate:
+            selection[:, 1:] = text_index[:, 1:] != text_index[:, :-1]
+        selection &= ~np.isin(text_index, self.get_ignored_tokens())
+        char_num = selection.sum(axis=1)
+        if text_prob is not None:
+            conf = np.where(selection, text_prob, 0).sum(axis=1) / np.maximum(
+                char_num, 1
+            )
+        else:
+            conf = np.full(batch_size, 1.0 if seq_len > 0 else 0.0)
+        chars = self.character_table[text_index[selection]]
+        char_end = np.cumsum(char_num)
+        char_beg = char_end - char_num
+
+        result_list = []
+        for batch_idx in range(batch_size):
+            text = "".join(chars[char_beg[batch_idx] : char_end[batch_idx]])
+            score = conf[batch_idx].tolist()
+
+            if self.reverse:  # for arabic rec
+                text = self.pred_reverse(text)
+
+            if return_word_box:
+                word_list, word_col_list, state_list = self.get_word_info(
+                    text, selection[batch_idx]
+                )
+                result_list.append(
+                    (
+                        text,
+                        score,
+                        [
+                            seq_len,
+                            word_list,
+                            word_col_list,
+                            state_list,
+                        ],
+                    )
+                )
+            else:
+                result_list.append((text, score))
+        return result_list
+
+    def decode_rows(
+        self,
+        text_index,
+        text_prob=None,
+        is_remove_duplicate=False,
+        return_word_box=False,
+    ):
+        """convert text-index into text-label row by row, for ragged inputs."""
         result_list = []
         ignored_tokens = self.get_ignored_tokens()
         batch_size = len(text_index)
@@ -165,7 +229,6 @@ class BaseRecLabelDecode(object):
                 conf_list = [0]
 
             text = "".join(char_list)
-            # print(f'Text : {text}, conf_list " {conf_list}')
 
             if self.reverse:  # for arabic rec
                 text = self.pred_reverse(text)
@@ -208,7 +271,8 @@ class CTCLabelDecode(BaseRecLabelDecode):
         if isinstance(preds, paddle.Tensor):
             preds = preds.numpy()
         preds_idx = preds.argmax(axis=2)
-        preds_prob = preds.max(axis=2)
+        # gather the max instead of a second full reduction over the classes
+        preds_prob = np.take_along_axis(preds, preds_idx[:, :, None], axis=2)[:, :, 0]
         if pbs_debug:
             print(f'pred_idx: {preds_idx.shape, preds_idx}\npred_prob, {preds_prob.shape,preds_prob}\n')
         text = self.decode(
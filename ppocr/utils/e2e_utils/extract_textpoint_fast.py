@@ -21,7 +21,6 @@ import math
 
 import numpy as np
 from itertools import groupby
-from skimage.morphology._skeletonize import thin
 
 
 def get_dict(character_dict_path):
@@ -423,6 +422,9 @@ def generate_pivot_list_fast(
     p_score = p_score[0]
     f_direction = f_direction.transpose(1, 2, 0)
     p_tcl_map = (p_score > score_thresh) * 1.0
+    # skimage is slow to import and only needed by PGNet
+    from skimage.morphology._skeletonize import thin
+
     skeleton_map = thin(p_tcl_map.astype(np.uint8))
     instance_count, instance_label_map = cv2.connectedComponents(
         skeleton_map.astype(np.uint8), connectivity=8
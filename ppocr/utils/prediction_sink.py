@@ -0,0 +1,155 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+
+__all__ = ["PredictionSink"]
+
+SUPPORTED_FORMATS = ["txt", "jsonl", "parquet"]
+
+
+def format_run_path(path):
+    """
+    Expand the {run_id}, {pid} and {rank} placeholders of an output path, so
+    every run or trainer can write to its own file.
+    """
+    run_id = time.strftime("%Y%m%d_%H%M%S")
+    # rank of the trainer set by paddle.distributed.launch
+    rank = int(os.environ.get("PADDLE_TRAINER_ID", 0))
+    return path.format(run_id=run_id, pid=os.getpid(), rank=rank)
+
+
+class PredictionSink(object):
+    """
+    Buffer prediction records in memory and write them in large chunks to
+    `path + ".tmp"`, which is renamed to path when the sink is closed. A run
+    therefore replaces the previous file instead of appending to it, and
+    readers never see a half written file.
+    args:
+        path(str): output file, may contain {run_id}, {pid} and {rank}
+        fields(list): record keys written by the txt format, tab separated
+        format(str): txt, jsonl or parquet, parquet requires pyarrow
+        flush_every(int): flush once this many records are buffered
+        flush_interval(float): flush on write once this many seconds passed
+            since the last flush
+    """
+
+    def __init__(
+        self,
+        path,
+        fields=("image", "pred"),
+        format="txt",
+        flush_every=1000,
+        flush_interval=30.0,
+    ):
+        if format not in SUPPORTED_FORMATS:
+            raise ValueError(
+                "prediction format only support {}, but got {}".format(
+                    SUPPORTED_FORMATS, format
+                )
+            )
+        if format == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError(
+                    "pyarrow is required for parquet predictions, "
+                    "please install it with `pip install pyarrow`"
+                )
+            self._pa = pyarrow
+        self.path = format_run_path(path)
+        self.tmp_path = self.path + ".tmp"
+        self.fields = list(fields)
+        self.format = format
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.num_records = 0
+        self._buffer = []
+        self._file = None
+        self._writer = None
+        self._last_flush = time.time()
+
+    def write(self, record):
+        self._buffer.append(record)
+        if (
+            len(self._buffer) >= self.flush_every
+            or time.time() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def write_many(self, records):
+        self._buffer.extend(records)
+        if (
+            len(self._buffer) >= self.flush_every
+            or time.time() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def _open(self):
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        if self.format != "parquet":
+            self._file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def flush(self):
+        self._last_flush = time.time()
+        if self._file is None and self._writer is None:
+            self._open()
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        if self.format == "txt":
+            self._file.writelines(
+                "\t".join(str(record.get(key, "")) for key in self.fields) + "\n"
+                for record in records
+            )
+        elif self.format == "jsonl":
+            self._file.writelines(
+                json.dumps(record, ensure_ascii=False) + "\n" for record in records
+            )
+        else:
+            table = self._pa.Table.from_pylist(records)
+            if self._writer is None:
+                self._writer = self._pa.parquet.ParquetWriter(
+                    self.tmp_path, table.schema
+                )
+            self._writer.write_table(table)
+        if self._file is not None:
+            self._file.flush()
+        self.num_records += len(records)
+
+    def close(self, commit=True):
+        """
+        Write the buffered records and move the file to its final path. With
+        commit=False the partial results are left in the .tmp file.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if commit and os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(commit=exc_type is None)
@@ -0,0 +1,222 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ["ResultCache", "image_digest", "config_fingerprint", "build_result_cache"]
+
+# args that only control where inputs are read or outputs are written
+_IGNORED_ARGS = {
+    "image_dir",
+    "page_num",
+    "draw_img_save_dir",
+    "save_crop_res",
+    "crop_res_save_dir",
+    "save_log_path",
+    "show_log",
+    "benchmark",
+    "warmup",
+    "use_mp",
+    "total_process_num",
+    "process_id",
+    "predictor_pool_size",
+}
+
+
+def image_digest(img):
+    """blake2b digest of the decoded pixels, their shape and dtype"""
+    img = np.ascontiguousarray(img)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((img.shape, img.dtype.str)).encode("utf-8"))
+    h.update(memoryview(img).cast("B"))
+    return h.hexdigest()
+
+
+def config_fingerprint(args):
+    """
+    Hash the inference args that change results together with the name, size
+    and modification time of the model files, so the cached results of one
+    model or configuration are never returned for another one.
+    """
+    params = {
+        key: value
+        for key, value in sorted(vars(args).items())
+        if key not in _IGNORED_ARGS and not key.startswith(("result_cache", "serve_"))
+    }
+    models = []
+    for key in sorted(params):
+        model_dir = params[key]
+        if not key.endswith("_model_dir") or not isinstance(model_dir, str):
+            continue
+        if os.path.isdir(model_dir):
+            paths = [os.path.join(model_dir, name) for name in os.listdir(model_dir)]
+        else:
+            paths = [model_dir]
+        for path in sorted(paths):
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                models.append((path, stat.st_size, int(stat.st_mtime)))
+    payload = json.dumps([params, models], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Content addressed cache of OCR results. Entries are keyed by the digest of
+    the decoded image plus a model and config fingerprint and the call
+    options, and stored pickled so callers never share result objects. The
+    in-memory tier is an LRU holding at most max_entries results for ttl
+    seconds, the optional sqlite tier at db_path keeps results across runs,
+    e.g. for evaluation reruns.
+    args:
+        fingerprint(str): model and config fingerprint, see config_fingerprint
+        max_entries(int): results kept in memory, 0 disables the memory tier
+        ttl(float): seconds a result stays valid, 0 never expires
+        db_path(str): sqlite file of the on-disk tier, None disables it
+    """
+
+    def __init__(self, fingerprint="", max_entries=1024, ttl=0, db_path=None):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            dirname = os.path.dirname(db_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value BLOB, created REAL)"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, img, **options):
+        """Cache key of img processed with the keyword options"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.fingerprint.encode("utf-8"))
+        h.update(image_digest(img).encode("utf-8"))
+        h.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def _expired(self, created, now):
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key):
+        """The cached result of key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return pickle.loads(value)
+                del self._entries[key]
+                self.expirations += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._remember(key, value, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return pickle.loads(value)
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expirations += 1
+            self.misses += 1
+        return None
+
+    def put(self, key, result):
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                    (key, value, created),
+                )
+                self._db.commit()
+
+    def _remember(self, key, value, created):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def build_result_cache(args):
+    """The ResultCache configured by the result_cache args, or None"""
+    max_entries = getattr(args, "result_cache_size", 0)
+    db_path = getattr(args, "result_cache_db", None)
+    if max_entries <= 0 and not db_path:
+        return None
+    return ResultCache(
+        fingerprint=config_fingerprint(args),
+        max_entries=max_entries,
+        ttl=getattr(args, "result_cache_ttl", 0),
+        db_path=db_path,
+    )
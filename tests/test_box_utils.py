@@ -0,0 +1,154 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from tools.infer.utility import (
+    merge_boxes,
+    merge_fragmented,
+    nms_boxes,
+    slice_generator,
+)
+from tools.infer.predict_system import sorted_boxes
+
+
+def reference_sorted_boxes(dt_boxes):
+    _boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
+    for i in range(len(_boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
+                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            ):
+                _boxes[j], _boxes[j + 1] = _boxes[j + 1], _boxes[j]
+            else:
+                break
+    return _boxes
+
+
+def reference_merge_fragmented(boxes, x_threshold=10, y_threshold=10):
+    merged_boxes = []
+    visited = set()
+    for i, box1 in enumerate(boxes):
+        if i in visited:
+            continue
+        merged_box = [point[:] for point in box1]
+        for j, box2 in enumerate(boxes[i + 1 :], start=i + 1):
+            if j not in visited:
+                merged_result = merge_boxes(merged_box, box2, x_threshold, y_threshold)
+                if merged_result:
+                    merged_box = merged_result
+                    visited.add(j)
+        merged_boxes.append(merged_box)
+    if len(merged_boxes) == len(boxes):
+        return np.array(merged_boxes)
+    return reference_merge_fragmented(merged_boxes, x_threshold, y_threshold)
+
+
+def make_boxes(seed, num_boxes, row_height, width=600, rows=20):
+    rng = np.random.RandomState(seed)
+    x = rng.randint(0, width, num_boxes)
+    y = rng.randint(0, rows, num_boxes) * row_height + rng.randint(0, 8, num_boxes)
+    w = rng.randint(5, 60, num_boxes)
+    h = rng.randint(10, 20, num_boxes)
+    return np.stack(
+        [
+            np.stack([x, y], axis=1),
+            np.stack([x + w, y], axis=1),
+            np.stack([x + w, y + h], axis=1),
+            np.stack([x, y + h], axis=1),
+        ],
+        axis=1,
+    ).astype("int32")
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("row_height", [30, 6])
+def test_sorted_boxes_matches_reference(seed, row_height):
+    # 30px rows take the lexsort path, 6px rows chain into the swap fallback
+    boxes = make_boxes(seed, 300, row_height)
+    result = np.array(sorted_boxes(boxes))
+    expected = np.array(reference_sorted_boxes(boxes))
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_sorted_boxes_empty():
+    assert sorted_boxes(np.zeros((0, 4, 2), dtype="float32")) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_merge_fragmented_matches_reference(seed):
+    boxes = make_boxes(seed, 400, 25)
+    result = merge_fragmented(boxes, x_threshold=10, y_threshold=10)
+    expected = reference_merge_fragmented(boxes, x_threshold=10, y_threshold=10)
+    assert len(result) < len(boxes)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_merge_fragmented_split_line():
+    boxes = np.array(
+        [
+            [[0, 0], [50, 0], [50, 20], [0, 20]],
+            [[200, 100], [260, 100], [260, 118], [200, 118]],
+            [[55, 2], [120, 2], [120, 21], [55, 21]],
+            [[118, 1], [150, 1], [150, 19], [118, 19]],
+        ]
+    )
+    result = merge_fragmented(boxes)
+    np.testing.assert_array_equal(
+        result,
+        [
+            [[0, 0], [150, 0], [150, 21], [0, 21]],
+            [[200, 100], [260, 100], [260, 118], [200, 118]],
+        ],
+    )
+
+
+@pytest.mark.parametrize("overlap", [0, 16])
+def test_slice_generator_overlap(overlap):
+    image = np.zeros((100, 250, 3), dtype=np.uint8)
+    slices = list(slice_generator(image, 100, 60, overlap=overlap))
+    assert [(v, h) for _, v, h in slices] == [
+        (v, h) for v in (0, 60) for h in (0, 100, 200)
+    ]
+    for crop, v_start, h_start in slices:
+        assert crop.shape[0] == min(60 + overlap, 100 - v_start)
+        assert crop.shape[1] == min(100 + overlap, 250 - h_start)
+
+
+def rect(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_nms_boxes_keeps_whole_text():
+    boxes = np.array(
+        [
+            rect(90, 10, 120, 30),  # fragment cut by a slice border
+            rect(300, 10, 360, 30),
+            rect(60, 10, 140, 30),  # the same text found whole
+            rect(61, 11, 139, 31),  # and again in another slice
+            rect(130, 10, 200, 30),  # its neighbour, touching it
+        ]
+    )
+    np.testing.assert_array_equal(nms_boxes(boxes, 0.5), [1, 2, 4])
+    assert len(nms_boxes(np.zeros((0, 4, 2)))) == 0
+
+
+def test_nms_boxes_matches_brute_force():
+    boxes = make_boxes(0, 300, 12).astype("float32")
+    keep = nms_boxes(boxes, 0.3)
+    x0, y0 = boxes[:, 0, 0], boxes[:, 0, 1]
+    x1, y1 = boxes[:, 2, 0], boxes[:, 2, 1]
+    areas = (x1 - x0) * (y1 - y0)
+    expected = []
+    for i in np.argsort(-areas, kind="stable"):
+        inter = np.maximum(
+            np.minimum(x1[i], x1[expected]) - np.maximum(x0[i], x0[expected]), 0
+        ) * np.maximum(
+            np.minimum(y1[i], y1[expected]) - np.maximum(y0[i], y0[expected]), 0
+        )
+        if not np.any(inter / np.minimum(areas[i], areas[expected]) > 0.3):
+            expected.append(i)
+    np.testing.assert_array_equal(keep, sorted(expected))
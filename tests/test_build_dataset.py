@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.data.packed_dataset import PackedShard
+from tools.build_dataset import build_dataset
+
+
+def write_sample(src_dir, name, label, value, ext=".jpg", size=(24, 80)):
+    img = np.full(size + (3,), value, dtype=np.uint8)
+    cv2.imwrite(str(src_dir / (name + ext)), img)
+    (src_dir / (name + ".txt")).write_text(label + "\n")
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    for i in range(5):
+        write_sample(src_dir, "plate_{}".format(i), "KA0{}AB1234".format(i), 30 * i)
+    cv2.imwrite(str(src_dir / "nolabel.png"), np.zeros((8, 8, 3), np.uint8))
+    return src_dir
+
+
+def read_labels(path):
+    with open(path) as f:
+        return [line.rstrip("\n").split("\t") for line in f]
+
+
+def build(src_dir, out_dir, **kwargs):
+    return build_dataset(
+        str(src_dir), str(src_dir), str(out_dir), "trainB", logger=lambda m: 0, **kwargs
+    )
+
+
+def test_build_and_rebuild_incrementally(source_dir, tmp_path):
+    out_dir = tmp_path / "out"
+    stats = build(source_dir, out_dir, workers=4)
+    assert stats == {
+        "total": 5,
+        "processed": 5,
+        "unchanged": 0,
+        "removed": 0,
+        "errors": 1,
+    }
+    labels = read_labels(out_dir / "trainB.txt")
+    assert labels == [
+        ["plate_{}.jpg".format(i), "KA0{}AB1234".format(i)] for i in range(5)
+    ]
+    for name, _ in labels:
+        assert (out_dir / "trainB" / name).read_bytes() == (
+            source_dir / name
+        ).read_bytes()
+    with open(out_dir / "license_plate_map.json") as f:
+        assert json.load(f)["KA03AB1234"] == "plate_3.jpg"
+    assert (out_dir / "error_log.txt").read_text() == "Missing file: nolabel.png\n"
+    assert not [name for name in os.listdir(out_dir) if ".tmp" in name]
+
+    stats = build(source_dir, out_dir)
+    assert (stats["processed"], stats["unchanged"]) == (0, 5)
+
+    write_sample(source_dir, "plate_1", "DL01CA0001", 200)
+    os.utime(source_dir / "plate_1.txt", ns=(1, 1))
+    os.remove(source_dir / "plate_4.jpg")
+    stats = build(source_dir, out_dir)
+    assert (stats["processed"], stats["unchanged"], stats["removed"]) == (1, 3, 1)
+    labels = dict(read_labels(out_dir / "trainB.txt"))
+    assert labels["plate_1.jpg"] == "DL01CA0001"
+    assert "plate_4.jpg" not in labels
+    assert not (out_dir / "trainB" / "plate_4.jpg").exists()
+
+
+def test_contrast_and_pack(source_dir, tmp_path):
+    out_dir = tmp_path / "out"
+    build(source_dir, out_dir, contrast=True, pack=True)
+    contrasted = sorted(os.listdir(out_dir / "trainB" / "contrasted"))
+    assert contrasted == ["plate_{}.jpg".format(i) for i in range(5)]
+
+    shard = PackedShard(str(out_dir / "packed" / "trainB"))
+    assert shard.file_names == contrasted
+    np.testing.assert_allclose(shard.wh_ratio, 80 / 24, rtol=1e-6)
+    for i, name in enumerate(shard.file_names):
+        expected = (source_dir / name).read_bytes()
+        assert shard.read(i).tobytes() == expected
+
+    write_sample(source_dir, "plate_2", "KA02AB1234", 250, size=(32, 64))
+    build(source_dir, out_dir, contrast=True, pack=True)
+    shard = PackedShard(str(out_dir / "packed" / "trainB"))
+    assert shard.read(2).tobytes() == (source_dir / "plate_2.jpg").read_bytes()
+    assert shard.wh_ratio[2] == pytest.approx(2.0)
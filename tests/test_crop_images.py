@@ -0,0 +1,80 @@
+import os
+import sys
+import math
+import pytest
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from tools.infer.utility import (
+    get_rotate_crop_image,
+    get_rotate_crop_images,
+    perspective_transforms,
+)
+
+
+def make_image(seed, height=240, width=320):
+    rng = np.random.RandomState(seed)
+    img = rng.randint(0, 255, (height, width, 3)).astype(np.uint8)
+    return cv2.GaussianBlur(img, (9, 9), 0)
+
+
+def make_boxes(seed, num_boxes=40, rotated=True, height=240, width=320):
+    rng = np.random.RandomState(seed)
+    boxes = []
+    for _ in range(num_boxes):
+        center = (rng.uniform(40, width - 40), rng.uniform(30, height - 30))
+        size = (rng.uniform(20, 60), rng.uniform(8, 20))
+        if rng.rand() < 0.2:
+            size = size[::-1]
+        # at least 2 degrees, nearly level boxes take the slicing fast path
+        angle = rng.choice([-1, 1]) * rng.uniform(2, 25) if rotated else 0.0
+        points = cv2.boxPoints((center, size, angle))
+        # top-left, top-right, bottom-right, bottom-left like the detector
+        by_x = points[np.argsort(points[:, 0], kind="stable")]
+        left = by_x[:2][np.argsort(by_x[:2, 1])]
+        right = by_x[2:][np.argsort(by_x[2:, 1])]
+        box = np.array([left[0], right[0], right[1], left[1]])
+        boxes.append(box if rotated else np.round(box))
+    return np.array(boxes, dtype=np.float32)
+
+
+def test_perspective_transforms_match_opencv():
+    boxes = make_boxes(0)
+    dst = np.array([[0, 0], [40, 0], [40, 12], [0, 12]], dtype=np.float32)
+    result = perspective_transforms(boxes, np.repeat(dst[None], len(boxes), axis=0))
+    for box, transform in zip(boxes, result):
+        expected = cv2.getPerspectiveTransform(box, dst)
+        np.testing.assert_allclose(transform, expected, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize("rotated", [False, True])
+def test_crops_match_single_crops(rotated):
+    img = make_image(0)
+    boxes = make_boxes(1, rotated=rotated)
+    result = get_rotate_crop_images(img, boxes)
+    assert len(result) == len(boxes)
+    for box, crop in zip(boxes, result):
+        expected = get_rotate_crop_image(img, box.copy())
+        assert crop.shape == expected.shape
+        diff = np.abs(crop.astype(int) - expected.astype(int)).max()
+        # axis aligned boxes are sliced, the warp of the region can round
+        # differently from the warp of the whole image
+        assert diff == 0 if not rotated else diff <= 2
+
+
+def test_crops_at_target_height():
+    img = make_image(1)
+    boxes = make_boxes(2)
+    for box, crop in zip(boxes, get_rotate_crop_images(img, boxes, 48)):
+        expected = get_rotate_crop_image(img, box.copy())
+        assert crop.shape[0] == 48
+        # the width the recognizer would resize the native crop to
+        ratio = expected.shape[1] / expected.shape[0]
+        assert abs(crop.shape[1] - math.ceil(48 * ratio)) <= 1
+
+
+def test_crops_empty():
+    assert get_rotate_crop_images(make_image(0), np.zeros((0, 4, 2))) == []
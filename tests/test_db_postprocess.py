@@ -0,0 +1,112 @@
+import os
+import sys
+import pytest
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.postprocess.db_postprocess import DBPostProcess
+
+
+def make_pred(seed, num_boxes=40, size=320):
+    rng = np.random.RandomState(seed)
+    pred = np.zeros((size, size), dtype=np.float32)
+    for _ in range(num_boxes):
+        center = (rng.randint(20, size - 20), rng.randint(10, size - 10))
+        box_size = (rng.randint(8, 40), rng.randint(4, 12))
+        angle = rng.choice([0.0, rng.uniform(-30, 30)])
+        points = cv2.boxPoints((center, box_size, angle)).astype(np.int32)
+        cv2.fillPoly(pred, [points], float(rng.uniform(0.75, 0.99)))
+    return pred
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("box_thresh", [0.0, 0.85])
+def test_component_boxes_match_contour_boxes(seed, box_thresh):
+    pred = make_pred(seed)
+    bitmap = pred > 0.3
+    expected, expected_scores = DBPostProcess(
+        box_thresh=box_thresh, unclip_ratio=1.5
+    ).boxes_from_bitmap(pred, bitmap, 320, 320)
+    result, scores = DBPostProcess(
+        box_thresh=box_thresh, unclip_ratio=1.5, score_mode="component"
+    ).boxes_from_bitmap(pred, bitmap, 320, 320)
+    assert result.shape == expected.shape
+    # the regions are scored like score_mode "fast"
+    assert sorted(scores) == pytest.approx(sorted(expected_scores))
+    # pair every box with the expected box closest to its center
+    centers = expected.mean(axis=1)
+    nearest = [np.argmin(((centers - box.mean(axis=0)) ** 2).sum(1)) for box in result]
+    assert sorted(nearest) == list(range(len(expected)))
+    # pyclipper offsets on an integer grid, the closed form does not
+    assert np.abs(result - expected[nearest]).max() <= 2
+
+
+def test_rect_scores_match_box_score_fast():
+    rng = np.random.RandomState(0)
+    pred = rng.uniform(0, 1, size=(120, 160)).astype(np.float32)
+    rects = [
+        (
+            (float(rng.uniform(-5, 165)), float(rng.uniform(-5, 125))),
+            (float(rng.uniform(2, 30)), float(rng.uniform(2, 12))),
+            float(rng.choice([0.0, 90.0, rng.uniform(-45, 45)])),
+        )
+        for _ in range(60)
+    ]
+    # overlapping rectangles fall back to box_score_fast
+    rects += [((40.0, 40.0), (20.0, 8.0), 0.0), ((45.0, 42.0), (20.0, 8.0), 30.0)]
+    postprocess = DBPostProcess(score_mode="component")
+    expected = [postprocess.box_score_fast(pred, cv2.boxPoints(rect)) for rect in rects]
+    assert postprocess.rect_scores(pred, rects) == pytest.approx(expected)
+    assert postprocess.rect_scores(pred, []).shape == (0,)
+
+
+def test_component_box_thresh():
+    pred = np.zeros((60, 60), dtype=np.float32)
+    pred[10:20, 5:40] = 0.9
+    pred[10:20, 40:50] = 0.5
+    pred[35:45, 10:30] = 0.4
+    postprocess = DBPostProcess(thresh=0.3, box_thresh=0.6, score_mode="component")
+    boxes, scores = postprocess.boxes_from_bitmap(pred, pred > 0.3, 60, 60)
+    assert boxes.shape == (1, 4, 2)
+    assert boxes[0, 0, 1] < 10 and boxes[0, 2, 1] > 19
+    # the mean over the rectangle of the region, as box_score_fast
+    assert scores == pytest.approx([(35 * 0.9 + 10 * 0.5) / 45], abs=0.02)
+
+
+def test_component_inside_a_hole():
+    pred = np.zeros((80, 120), dtype=np.float32)
+    cv2.rectangle(pred, (5, 5), (114, 74), 0.9, 4)
+    pred[30:45, 30:90] = 0.9
+    bitmap = pred > 0.3
+    postprocess = DBPostProcess(box_thresh=0.0, score_mode="component")
+    assert len(postprocess.component_contours(bitmap)) == 2
+    boxes, _ = postprocess.boxes_from_bitmap(pred, bitmap, 120, 80)
+    assert len(boxes) == 2
+    inner = boxes[np.argmin([box[:, 0].max() - box[:, 0].min() for box in boxes])]
+    # the unclipped box of the inner region, inside the ring
+    assert inner[:, 0].min() > 10 and inner[:, 0].max() < 110
+    assert inner[:, 1].min() > 10 and inner[:, 1].max() < 70
+
+
+def test_rect_points_and_order():
+    rects = [((30.5, 20.0), (25.0, 8.0), angle) for angle in (0.0, 15.0, 75.0, 90.0)]
+    points = DBPostProcess.rect_points(
+        np.array([rect[0] for rect in rects]),
+        np.array([rect[1] for rect in rects]),
+        np.array([rect[2] for rect in rects]),
+    )
+    postprocess = DBPostProcess()
+    for rect, result in zip(rects, DBPostProcess.order_box_points(points)):
+        contour = cv2.boxPoints(rect).reshape(-1, 1, 2)
+        expected, _ = postprocess.get_mini_boxes(contour)
+        np.testing.assert_allclose(result, np.array(expected), atol=1e-3)
+
+
+def test_component_empty_map():
+    pred = np.zeros((32, 32), dtype=np.float32)
+    postprocess = DBPostProcess(score_mode="component")
+    boxes, scores = postprocess.boxes_from_bitmap(pred, pred > 0.3, 32, 32)
+    assert boxes.shape == (0, 4, 2) and scores == []
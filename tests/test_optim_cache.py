@@ -0,0 +1,125 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import tools.infer.utility as utility
+from ppocr.utils.logging import get_logger
+
+logger = get_logger()
+
+
+SAVE_MODELS = """
+import sys
+import paddle
+
+for seed, model_dir in enumerate(sys.argv[1:]):
+    paddle.seed(seed)
+    layer = paddle.nn.Conv2D(3, 2, 3, padding=1)
+    layer.eval()
+    paddle.jit.save(
+        layer,
+        model_dir + "/inference",
+        input_spec=[paddle.static.InputSpec([None, 3, None, None], "float32")],
+    )
+"""
+
+
+@pytest.fixture(scope="module")
+def model_dirs(tmp_path_factory):
+    """Two toy det models in the .pdmodel format create_predictor loads"""
+    root = tmp_path_factory.mktemp("models")
+    model_dirs = [str(root / "a"), str(root / "b")]
+    env = dict(os.environ, FLAGS_enable_pir_api="0")
+    subprocess.run(
+        [sys.executable, "-c", SAVE_MODELS] + model_dirs, env=env, check=True
+    )
+    return model_dirs
+
+
+def make_args(model_dir, cache_dir):
+    return utility.init_args().parse_args(
+        [
+            "--use_gpu=False",
+            "--det_model_dir={}".format(model_dir),
+            "--optim_cache_dir={}".format(cache_dir),
+        ]
+    )
+
+
+def run(args):
+    predictor, input_tensor, output_tensors, _ = utility.create_predictor(
+        args, "det", logger
+    )
+    x = np.linspace(0, 1, 3 * 8 * 8, dtype=np.float32).reshape((1, 3, 8, 8))
+    input_tensor.copy_from_cpu(x)
+    predictor.run()
+    return output_tensors[0].copy_to_cpu()
+
+
+def test_optimized_model_is_cached_and_invalidated(tmp_path, model_dirs):
+    model_dir = str(tmp_path / "det")
+    cache_dir = str(tmp_path / "cache")
+    shutil.copytree(model_dirs[0], model_dir)
+    args = make_args(model_dir, cache_dir)
+
+    out = run(args)
+    entries = os.listdir(cache_dir)
+    assert len(entries) == 1 and entries[0].startswith("det_")
+    entry = os.path.join(cache_dir, entries[0])
+    assert os.path.exists(os.path.join(entry, "_optimized.pdmodel"))
+
+    # loaded from the cache
+    np.testing.assert_allclose(run(args), out, rtol=1e-5, atol=1e-6)
+    assert os.listdir(cache_dir) == entries
+
+    # other flags get their own entry, both stay valid
+    args.min_subgraph_size += 1
+    run(args)
+    assert len(os.listdir(cache_dir)) == 2
+    args.min_subgraph_size -= 1
+    run(args)
+    assert len(os.listdir(cache_dir)) == 2
+
+    # a changed model gets a new key and replaces the stale entries
+    shutil.copy(os.path.join(model_dirs[1], "inference.pdiparams"), model_dir)
+    new_out = run(args)
+    assert not np.allclose(new_out, out)
+    new_entries = os.listdir(cache_dir)
+    assert len(new_entries) == 1 and new_entries != entries
+
+
+@pytest.mark.skipif(os.name != "posix", reason="checks the pid of the tmp dirs")
+def test_stale_tmp_dirs_are_removed(tmp_path, model_dirs):
+    cache_dir = tmp_path / "cache"
+    # left by a dead process and by one still saving
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    dead = cache_dir / "det_0123.tmp{}".format(proc.pid)
+    alive = cache_dir / "det_4567.tmp{}".format(os.getppid())
+    for path in (dead, alive):
+        path.mkdir(parents=True)
+    run(make_args(model_dirs[0], str(cache_dir)))
+    names = os.listdir(cache_dir)
+    assert dead.name not in names and alive.name in names
+    assert len(names) == 2
+
+
+def test_optim_cache_key_flags(tmp_path, model_dirs):
+    model_dir = model_dirs[0]
+    args = make_args(model_dir, str(tmp_path / "cache"))
+    files = [
+        os.path.join(model_dir, "inference.pdmodel"),
+        os.path.join(model_dir, "inference.pdiparams"),
+    ]
+    key = utility.get_optim_cache_key(args, "det", *files)
+    assert utility.get_optim_cache_key(args, "det", *files) == key
+    assert utility.get_optim_cache_key(args, "rec", *files) != key
+    args.enable_mkldnn = not args.enable_mkldnn
+    assert utility.get_optim_cache_key(args, "det", *files) != key
@@ -0,0 +1,114 @@
+import os
+import sys
+import logging
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.data.packed_dataset import PackedDataSet, PackedShard, PackedShardWriter
+from tools.pack_dataset import pack_label_files
+
+SIZES = [(96, 32), (160, 40), (64, 48)]
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    data_dir = tmp_path / "images"
+    data_dir.mkdir()
+    lines = []
+    for i, (w, h) in enumerate(SIZES):
+        img = np.full((h, w, 3), 40 * i, dtype=np.uint8)
+        ext = ".png" if i % 2 else ".jpg"
+        cv2.imwrite(str(data_dir / "img_{}{}".format(i, ext)), img)
+        lines.append("img_{}{}\tPLATE{}".format(i, ext, i))
+    lines.append("missing.jpg\tNONE")
+    label_file = tmp_path / "train.txt"
+    label_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return data_dir, label_file
+
+
+def test_writer_and_shard_round_trip(tmp_path):
+    prefix = str(tmp_path / "shards" / "part")
+    blobs = [b"first", b"", b"third image"]
+    with PackedShardWriter(prefix) as writer:
+        for i, buf in enumerate(blobs):
+            writer.add(buf, "f{}.jpg".format(i), "label\n{}".format(i), (2 * i, 4))
+    assert sorted(os.listdir(tmp_path / "shards")) == [
+        "part.bin",
+        "part.idx.npy",
+        "part.txt",
+    ]
+    shard = PackedShard(prefix + ".idx.npy")
+    assert len(shard) == 3
+    for i, buf in enumerate(blobs):
+        data = shard.read(i)
+        assert data.dtype == np.uint8
+        assert data.tobytes() == buf
+        assert not data.flags.owndata
+    assert shard.labels == ["label {}".format(i) for i in range(3)]
+    np.testing.assert_allclose(shard.wh_ratio, [0.0, 0.5, 1.0])
+
+    clone = pickle.loads(pickle.dumps(shard))
+    assert clone.read(2).tobytes() == b"third image"
+
+
+def test_failed_writer_leaves_no_shard(tmp_path):
+    prefix = str(tmp_path / "part")
+    with pytest.raises(RuntimeError):
+        with PackedShardWriter(prefix) as writer:
+            writer.add(b"data", "a.jpg", "a")
+            raise RuntimeError("stop")
+    assert os.listdir(tmp_path) == []
+
+
+def test_pack_label_files(image_dir, tmp_path):
+    data_dir, label_file = image_dir
+    prefix = str(tmp_path / "packed" / "train")
+    packed, skipped = pack_label_files(
+        [str(label_file)], str(data_dir), prefix, logger=lambda msg: None
+    )
+    assert (packed, skipped) == (3, 1)
+    shard = PackedShard(prefix)
+    assert shard.file_names == ["img_0.jpg", "img_1.png", "img_2.jpg"]
+    np.testing.assert_allclose(shard.wh_ratio, [w / h for w, h in SIZES], rtol=1e-6)
+    for i, name in enumerate(shard.file_names):
+        with open(os.path.join(data_dir, name), "rb") as f:
+            assert shard.read(i).tobytes() == f.read()
+
+
+@pytest.mark.parametrize("mode", ["Train", "Eval"])
+def test_packed_dataset(image_dir, tmp_path, mode):
+    data_dir, label_file = image_dir
+    pack_label_files(
+        [str(label_file)], str(data_dir), str(tmp_path / "train"), logger=lambda m: 0
+    )
+    config = {
+        "Global": {},
+        mode: {
+            "dataset": {
+                "name": "PackedDataSet",
+                "data_dir": str(tmp_path),
+                "shard_list": ["train"],
+                "transforms": [
+                    {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
+                    {"KeepKeys": {"keep_keys": ["image", "label"]}},
+                ],
+            },
+            "loader": {"shuffle": True},
+        },
+    }
+    dataset = PackedDataSet(config, mode, logging.getLogger(), seed=0)
+    assert len(dataset) == 3
+    seen = {}
+    for idx in range(len(dataset)):
+        image, label = dataset[idx]
+        seen[label] = image.shape[:2]
+        assert dataset.wh_ratio[dataset.data_idx_order_list[idx]] == pytest.approx(
+            image.shape[1] / image.shape[0]
+        )
+    assert seen == {"PLATE{}".format(i): (h, w) for i, (w, h) in enumerate(SIZES)}
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import random
+import string
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import pbs_eval
+
+
+def random_plates(num, seed):
+    rng = random.Random(seed)
+    chars = string.ascii_uppercase + string.digits
+    return ["".join(rng.choices(chars, k=rng.randint(0, 12))) for _ in range(num)]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_discrepancies_match_python_lcs(seed):
+    reals = random_plates(500, seed)
+    preds = random_plates(500, seed + 100)
+    preds[:50] = reals[:50]
+    expected = [
+        pbs_eval.longest_common_subsequence(real, pred)[1]
+        for real, pred in zip(reals, preds)
+    ]
+    assert pbs_eval.compute_discrepancies(reals, preds).tolist() == expected
+    lcs = pbs_eval._lcs_lengths_numpy(reals, preds, chunk_size=64)
+    assert lcs.tolist() == [
+        pbs_eval.longest_common_subsequence(real, pred)[0]
+        for real, pred in zip(reals, preds)
+    ]
+
+
+def test_process_results(tmp_path):
+    results_file = tmp_path / "license_plates.txt"
+    results_file.write_text(
+        "imgs/a_lp.jpg\tMH12AB1234\n"
+        "imgs/b_lp.jpg\tMH12AB123\n"
+        "imgs/c_lp.jpg\tHR55A 0345\n"
+        "imgs/d_lp.jpg\n"
+        "imgs/e_lp.jpg\tKA01\n"
+    )
+    plate_map = {
+        "a_lp.jpg": "MH12AB1234",
+        "b_lp.jpg": "MH12AB1234",
+        "c_lp.jpg": "HR55AQ0345",
+        "d_lp.jpg": "DL3C1234",
+    }
+    summary = pbs_eval.process_results(
+        str(results_file),
+        "",
+        str(tmp_path / "out"),
+        plate_map,
+        skip_report=True,
+        skip_missing_images=False,
+    )
+    assert summary["total"] == 4
+    assert summary["skipped_missing_image"] == 0
+    assert summary["missing_from_map"] == 1
+    assert summary["discrepancy_counts"] == {
+        "0D": 1,
+        "1D": 2,
+        "2D": 0,
+        "3D": 0,
+        "4D+": 1,
+    }
+    with open(tmp_path / "out" / "summary.json") as f:
+        assert json.load(f) == summary
+    with open(tmp_path / "out" / "discrepancies.csv") as f:
+        assert len(f.readlines()) == 4
+
+
+def test_results_without_image_are_skipped(tmp_path):
+    image_dir = tmp_path / "imgs"
+    image_dir.mkdir()
+    (image_dir / "a_lp.jpg").write_bytes(b"")
+    results_file = tmp_path / "license_plates.txt"
+    results_file.write_text(
+        "{0}/a_lp.jpg\tMH12AB1234\n{0}/b_lp.jpg\tMH12AB123\n".format(image_dir)
+    )
+    plate_map = {"a_lp.jpg": "MH12AB1234", "b_lp.jpg": "MH12AB1234"}
+    summary = pbs_eval.process_results(
+        str(results_file),
+        str(image_dir),
+        str(tmp_path / "out"),
+        plate_map,
+        skip_report=True,
+    )
+    assert summary["total"] == 1 and summary["skipped_missing_image"] == 1
+    assert summary["accuracy"] == 1
@@ -0,0 +1,52 @@
+import os
+import sys
+import cv2
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from tools.infer.utility import is_plate_shaped, split_plate_rows
+
+
+def make_plate(rows, width, height, inverse=False):
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    scale = 1.6 if len(rows) == 2 else 1.3
+    for i, text in enumerate(rows):
+        y = int(height * (i + 1) / len(rows) - height / len(rows) * 0.22)
+        org = (int(width * 0.06), y)
+        cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), 4)
+    cv2.rectangle(img, (1, 1), (width - 2, height - 2), (20, 20, 20), 3)
+    return 255 - img if inverse else img
+
+
+@pytest.mark.parametrize(
+    "shape, expected",
+    [
+        ((64, 300), True),
+        ((130, 220), True),
+        ((720, 1280), False),
+        ((300, 300), False),
+        ((20, 400), False),
+    ],
+)
+def test_is_plate_shaped(shape, expected):
+    assert is_plate_shaped(np.zeros(shape + (3,), dtype=np.uint8)) == expected
+
+
+@pytest.mark.parametrize("inverse", [False, True])
+def test_split_two_row_plate(inverse):
+    img = make_plate(["MH12", "AB1234"], 220, 130, inverse)
+    rows = split_plate_rows(img)
+    assert len(rows) == 2
+    assert rows[0][0] == 0 and rows[1][1] == 130
+    assert 50 < rows[0][1] == rows[1][0] < 80
+
+
+@pytest.mark.parametrize(
+    "width, height, inverse", [(300, 64, False), (240, 80, True), (200, 90, False)]
+)
+def test_single_row_plate_is_not_split(width, height, inverse):
+    img = make_plate(["KA05MM7777"], width, height, inverse)
+    assert split_plate_rows(img) == [(0, height)]
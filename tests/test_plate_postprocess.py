@@ -0,0 +1,100 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.postprocess.plate_postprocess import PlateGrammar, PlateCTCLabelDecode
+
+LPR_DICT = os.path.join(current_dir, "..", "ppocr", "utils", "lpr_dict.txt")
+
+
+@pytest.fixture
+def decoder():
+    return PlateCTCLabelDecode(
+        character_dict_path=LPR_DICT, use_space_char=False, grammar="SS DD L(L) DDDD"
+    )
+
+
+def make_preds(decoder, text, seq_len=40):
+    preds = np.full((seq_len, len(decoder.character)), 1e-4)
+    preds[:, 0] = 1.0
+    positions = np.linspace(2, seq_len - 3, len(text)).astype(int)
+    for pos, char in zip(positions, text):
+        preds[pos, 0] = 0.05
+        preds[pos, decoder.character.index(char)] = 0.9
+    return preds / preds.sum(axis=1, keepdims=True), positions
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("MH12AB1234", True),
+        ("MH12A1234", True),
+        ("MH121234", False),
+        ("M12AB1234", False),
+        ("MH12AB12345", False),
+    ],
+)
+def test_grammar_match(decoder, text, expected):
+    assert decoder.grammar.match(text) == expected
+
+
+def test_default_grammar():
+    decoder = PlateCTCLabelDecode(character_dict_path=LPR_DICT)
+    for text in ["MH12AB1234", "DL3C1234", "22BH1234AA"]:
+        assert decoder.grammar.match(text)
+    assert not decoder.grammar.match("22BH1234")
+
+
+@pytest.mark.parametrize("grammar", ["SS (DD", "SS DD)", "SS 'DD", "SS DD X"])
+def test_invalid_grammar(decoder, grammar):
+    with pytest.raises(ValueError):
+        PlateGrammar(grammar, decoder.character)
+
+
+def test_beam_search_fixes_invalid_character(decoder):
+    preds, positions = make_preds(decoder, "MH12AB1234")
+    # the greedy path reads an I where the grammar only allows a digit
+    frame = positions[6]
+    preds[frame] = 0.0
+    preds[frame, 0] = 0.1
+    preds[frame, decoder.character.index("I")] = 0.5
+    preds[frame, decoder.character.index("1")] = 0.4
+    valid, _ = make_preds(decoder, "KA05MM7777")
+    result = decoder(np.stack([preds, valid]).astype("float32"))
+    assert [text for text, _ in result] == ["MH12AB1234", "KA05MM7777"]
+    assert all(0 < conf <= 1 for _, conf in result)
+
+
+def test_beam_search_falls_back_to_greedy(decoder):
+    preds, _ = make_preds(decoder, "MH1AAB1234")
+    assert decoder(preds[None])[0][0] == "MH1AAB1234"
+
+
+def test_beam_confidence_matches_greedy(decoder):
+    preds, _ = make_preds(decoder, "KA05MM7777")
+    greedy = decoder.decode(
+        preds.argmax(axis=1)[None], preds.max(axis=1)[None], is_remove_duplicate=True
+    )
+    beam = decoder.beam_search(np.log(preds)[None])
+    assert beam[0][0] == greedy[0][0] == "KA05MM7777"
+    assert beam[0][1] == pytest.approx(greedy[0][1])
+
+
+def test_beam_search_long_plates():
+    decoder = PlateCTCLabelDecode(
+        character_dict_path=LPR_DICT, grammar="L" * 14 + " DD", beam_width=5
+    )
+    text = "ABCDEFGHJKLMNP12"
+    preds, positions = make_preds(decoder, text, seq_len=60)
+    # the last digit is read as a letter, only the grammar can fix it
+    frame = positions[-1]
+    preds[frame] = 0.0
+    preds[frame, 0] = 0.1
+    preds[frame, decoder.character.index("Z")] = 0.5
+    preds[frame, decoder.character.index("2")] = 0.4
+    result = decoder(preds[None].astype("float32"))
+    assert result[0][0] == text
@@ -0,0 +1,74 @@
+import os
+import sys
+import contextlib
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import tools.infer.utility as utility
+import tools.infer.predict_det as predict_det
+
+
+class ThresholdPredictor(object):
+    """
+    Stands in for a DB model, the probability of a pixel only depends on
+    the pixel, so padded and unpadded inputs give the same map.
+    """
+
+    def copy_from_cpu(self, img):
+        self.img = img
+
+    def run(self):
+        self.maps = (self.img[:, :1] > 0.5).astype(np.float32) * 0.9
+
+    def copy_to_cpu(self):
+        return self.maps
+
+
+class StubPool(object):
+    def __init__(self, args, mode, logger, size=1):
+        predictor = ThresholdPredictor()
+        self.handles = [(predictor, predictor, [predictor])]
+        self.config = None
+
+    @contextlib.contextmanager
+    def acquire(self):
+        yield self.handles[0]
+
+
+def make_image(h, w, rects):
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    for x0, y0, x1, y1 in rects:
+        cv2.rectangle(img, (x0, y0), (x1, y1), (255, 255, 255), -1)
+    return img
+
+
+@pytest.mark.parametrize("postprocess_workers", [0, 2])
+def test_predict_batch_matches_call(monkeypatch, postprocess_workers):
+    monkeypatch.setattr(utility, "PredictorPool", StubPool)
+    args = utility.init_args().parse_args(
+        [
+            "--det_limit_side_len=160",
+            "--det_limit_type=max",
+            "--max_batch_size=4",
+            "--det_postprocess_workers={}".format(postprocess_workers),
+        ]
+    )
+    detector = predict_det.TextDetector(args)
+    imgs = [
+        make_image(120, 200, [(20, 30, 150, 60), (30, 80, 90, 100)]),
+        make_image(64, 300, [(10, 10, 280, 50)]),
+        make_image(200, 90, [(5, 20, 80, 40), (10, 120, 70, 180)]),
+        make_image(50, 50, []),
+    ]
+    dt_boxes_list, _ = detector.predict_batch(imgs)
+    assert len(dt_boxes_list) == len(imgs)
+    for img, dt_boxes in zip(imgs, dt_boxes_list):
+        expected, _ = detector(img)
+        assert dt_boxes.shape == expected.shape
+        np.testing.assert_allclose(dt_boxes, expected)
+    assert [len(dt_boxes) > 0 for dt_boxes in dt_boxes_list] == [True] * 3 + [False]
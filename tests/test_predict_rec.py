@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import tools.infer.utility as utility
+import tools.infer.predict_rec as predict_rec
+from tools.infer.predict_rec import TextRecognizer
+
+
+class StubRecognizer(TextRecognizer):
+    """
+    TextRecognizer without a model, a crop is recognized as its width. The
+    stages sleep for a while so that the pipeline threads interleave.
+    """
+
+    def __init__(self, batch_num=2, workers=2, fail_stage=None, buckets=None):
+        self.rec_batch_num = batch_num
+        self.rec_pipeline_workers = workers
+        self.rec_width_buckets = buckets
+        self.rec_algorithm = "SVTR_LCNet"
+        self.rec_image_shape = [3, 48, 320]
+        self.benchmark = False
+        self.use_onnx = False
+        self.norm_lut = (np.arange(256, dtype=np.float32) / 255 - 0.5) / 0.5
+        self.thread_local = threading.local()
+        self.fail_stage = fail_stage
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pad_widths = {}
+
+    def preprocess_batch(
+        self, img_list, indices, beg_img_no, end_img_no, pad_width=None, **kwargs
+    ):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.002 * (end_img_no % 3))
+        imgs = [img_list[indices[ino]] for ino in range(beg_img_no, end_img_no)]
+        with self.lock:
+            for img in imgs:
+                self.pad_widths[img.shape[1]] = pad_width
+        return imgs, None, None
+
+    def predict_batch(self, inputs):
+        if self.fail_stage == "predict" and any(img.shape[1] == 70 for img in inputs):
+            raise RuntimeError("predict failed")
+        return inputs
+
+    def postprocess_batch(self, preds, wh_ratio_list, max_wh_ratio):
+        time.sleep(0.001)
+        if self.fail_stage == "post" and any(img.shape[1] == 70 for img in preds):
+            raise RuntimeError("post failed")
+        with self.lock:
+            self.in_flight -= 1
+        return [(str(img.shape[1]), 1.0) for img in preds]
+
+
+def make_crops(widths, height=32):
+    return [np.zeros((height, w, 3), dtype=np.uint8) for w in widths]
+
+
+def test_pipeline_keeps_input_order():
+    rng = np.random.RandomState(0)
+    widths = rng.randint(10, 400, size=81).tolist()
+    recognizer = StubRecognizer(batch_num=2, workers=2)
+    rec_res, _ = recognizer(make_crops(widths))
+    assert [text for text, _ in rec_res] == [str(w) for w in widths]
+    # bounded queues keep only a few of the 41 batches in flight
+    assert recognizer.max_in_flight <= 10
+
+
+@pytest.mark.parametrize("stage", ["predict", "post"])
+def test_pipeline_reraises_stage_errors(stage):
+    widths = list(range(10, 200, 10))
+    recognizer = StubRecognizer(batch_num=2, workers=2, fail_stage=stage)
+    with pytest.raises(RuntimeError, match="{} failed".format(stage)):
+        recognizer(make_crops(widths))
+
+
+def test_make_batches_snaps_crops_to_buckets():
+    buckets = [40, 80, 160]
+
+    def bucket_of(width):
+        # crops of height 24 are resized to height 48; narrowest bucket
+        # holding the crop, wider crops are squeezed into the widest
+        return next((w for w in buckets if w >= 2 * width), buckets[-1])
+
+    widths = [300, 10, 40, 41, 75, 80, 81, 159, 160, 161, 400, 5]
+    recognizer = StubRecognizer(batch_num=2, buckets=buckets)
+    imgs = make_crops(widths, height=24)
+    indices, batches = recognizer.make_batches(imgs)
+    assert sorted(indices.tolist()) == list(range(len(widths)))
+    assert batches[0][0] == 0 and batches[-1][1] == len(widths)
+    for (_, end_img_no, _), (beg_img_no, _, _) in zip(batches, batches[1:]):
+        assert end_img_no == beg_img_no
+    for beg_img_no, end_img_no, pad_width in batches:
+        assert 0 < end_img_no - beg_img_no <= 2
+        for ino in range(beg_img_no, end_img_no):
+            assert pad_width == bucket_of(widths[indices[ino]])
+
+    rec_res, _ = recognizer(imgs)
+    assert [text for text, _ in rec_res] == [str(w) for w in widths]
+    assert recognizer.pad_widths == {w: bucket_of(w) for w in widths}
+    assert sorted(set(recognizer.pad_widths.values())) == [40, 80, 160]
+
+
+@pytest.mark.parametrize("reuse_buffer", [False, True])
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32])
+def test_resize_norm_img_batch_matches_per_image(reuse_buffer, dtype):
+    rng = np.random.RandomState(0)
+    # narrower than, as wide as and wider than the batch width
+    sizes = [(32, 20), (48, 160), (20, 97), (30, 300), (64, 40), (16, 400)]
+    imgs = [rng.randint(0, 256, size=(h, w, 3)).astype(dtype) for h, w in sizes]
+    recognizer = StubRecognizer()
+    max_wh_ratio = 160 / 48
+    for _ in range(2):
+        batch = recognizer.resize_norm_img_batch(
+            imgs, max_wh_ratio, reuse_buffer=reuse_buffer
+        )
+        assert batch.shape == (len(imgs), 3, 48, 160)
+        for img, norm_img in zip(imgs, batch):
+            expected = recognizer.resize_norm_img(img, max_wh_ratio)
+            np.testing.assert_allclose(norm_img, expected, atol=1e-6)
+
+
+class WindowRecognizer(object):
+    """Recognizes a crop as its width and records the size of every call"""
+
+    def __init__(self, args):
+        self.window_sizes = []
+
+    def __call__(self, img_list):
+        self.window_sizes.append(len(img_list))
+        return [(str(img.shape[1]), 1.0) for img in img_list], 0.0
+
+    def get_bucket_stats(self):
+        return {}
+
+
+def write_crops(image_dir, widths):
+    os.makedirs(image_dir)
+    for i, w in enumerate(widths):
+        path = os.path.join(image_dir, "{:02d}.png".format(i))
+        cv2.imwrite(path, np.zeros((24, w, 3), dtype=np.uint8))
+    # neither readable as an image nor skipped by its extension
+    with open(os.path.join(image_dir, "99.png"), "wb") as f:
+        f.write(b"not an image")
+
+
+def test_read_image_windows_decodes_one_window_at_a_time(tmp_path, monkeypatch):
+    image_dir = str(tmp_path / "crops")
+    write_crops(image_dir, [10, 20, 30, 40, 50])
+    image_file_list = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+    )
+    reads = []
+    check_and_read = predict_rec.check_and_read
+
+    def counting_check_and_read(image_file):
+        reads.append(image_file)
+        return check_and_read(image_file)
+
+    monkeypatch.setattr(predict_rec, "check_and_read", counting_check_and_read)
+    windows = predict_rec.read_image_windows(image_file_list, 2)
+    assert reads == []
+    files, imgs = next(windows)
+    assert files == image_file_list[:2] and len(reads) == 2
+    assert [img.shape[1] for img in imgs] == [10, 20]
+    # the unreadable file is dropped from the last window
+    rest = list(windows)
+    assert [files for files, _ in rest] == [image_file_list[2:4], image_file_list[4:5]]
+    assert len(reads) == len(image_file_list)
+
+
+@pytest.mark.parametrize("window", [0, 2])
+def test_main_streams_windows_to_the_prediction_file(tmp_path, monkeypatch, window):
+    widths = [10, 20, 30, 40, 50]
+    image_dir = str(tmp_path / "crops")
+    write_crops(image_dir, widths)
+    recognizers = []
+
+    def build_recognizer(args):
+        recognizers.append(WindowRecognizer(args))
+        return recognizers[-1]
+
+    monkeypatch.setattr(predict_rec, "TextRecognizer", build_recognizer)
+    save_path = str(tmp_path / "preds.txt")
+    args = utility.init_args().parse_args(
+        [
+            "--image_dir={}".format(image_dir),
+            "--rec_stream_window={}".format(window),
+            "--rec_save_path={}".format(save_path),
+            "--save_log_path={}/".format(tmp_path),
+        ]
+    )
+    predict_rec.main(args)
+    assert recognizers[0].window_sizes == ([2, 2, 1] if window else [5])
+    with open(save_path) as f:
+        assert f.read() == "".join(
+            "{}/{:02d}.png\t{}\n".format(image_dir, i, w) for i, w in enumerate(widths)
+        )
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.utils.prediction_sink import PredictionSink
+
+RECORDS = [
+    {"image": "a_lp.jpg", "pred": "MH12AB1234", "conf": 0.98},
+    {"image": "b_lp.jpg", "pred": "HR55A 0345", "conf": 0.5},
+    {"image": "c_lp.jpg", "pred": "", "conf": 0.0},
+]
+
+
+def test_txt_sink(tmp_path):
+    path = str(tmp_path / "out" / "license_plates.txt")
+    with PredictionSink(path, flush_every=2) as sink:
+        sink.write(RECORDS[0])
+        assert not os.path.exists(path)
+        sink.write_many(RECORDS[1:])
+        # flushed to the temporary file, not yet visible
+        assert os.path.getsize(path + ".tmp") > 0
+        assert not os.path.exists(path)
+    assert not os.path.exists(path + ".tmp")
+    with open(path) as f:
+        assert f.read() == "a_lp.jpg\tMH12AB1234\nb_lp.jpg\tHR55A 0345\nc_lp.jpg\t\n"
+    assert sink.num_records == 3
+
+
+def test_jsonl_sink_replaces_previous_run(tmp_path):
+    path = str(tmp_path / "preds.jsonl")
+    for records in [RECORDS, RECORDS[:1]]:
+        with PredictionSink(path, format="jsonl") as sink:
+            sink.write_many(records)
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == RECORDS[:1]
+
+
+def test_sink_keeps_partial_results_on_error(tmp_path):
+    path = str(tmp_path / "preds.txt")
+    with pytest.raises(RuntimeError):
+        with PredictionSink(path) as sink:
+            sink.write(RECORDS[0])
+            raise RuntimeError("inference failed")
+    assert not os.path.exists(path)
+    with open(path + ".tmp") as f:
+        assert f.read() == "a_lp.jpg\tMH12AB1234\n"
+
+
+def test_run_path(tmp_path):
+    sink = PredictionSink(str(tmp_path / "preds_{pid}.txt"))
+    assert sink.path == str(tmp_path / "preds_{}.txt".format(os.getpid()))
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        PredictionSink(str(tmp_path / "preds.csv"), format="csv")
+
+
+def test_rank_placeholder(tmp_path, monkeypatch):
+    monkeypatch.setenv("PADDLE_TRAINER_ID", "3")
+    path = str(tmp_path / "license_plates.rank{rank}.txt")
+    with PredictionSink(path, fields=("pred", "label")) as sink:
+        sink.write({"pred": "KA01", "label": "KA01"})
+    assert os.listdir(tmp_path) == ["license_plates.rank3.txt"]
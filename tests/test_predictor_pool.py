@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+from argparse import Namespace
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import tools.infer.utility as utility
+
+
+class FakeHandle(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakePredictor(object):
+    def __init__(self, parent=None):
+        self.parent = parent
+
+    def clone(self):
+        return FakePredictor(parent=self)
+
+    def get_input_names(self):
+        return ["x"]
+
+    def get_input_handle(self, name):
+        return FakeHandle(name)
+
+    def get_output_names(self):
+        return ["y"]
+
+    def get_output_handle(self, name):
+        return FakeHandle(name)
+
+
+@pytest.fixture
+def fake_create_predictor(monkeypatch):
+    created = []
+
+    def create_predictor(args, mode, logger):
+        predictor = FakePredictor()
+        created.append(predictor)
+        return predictor, FakeHandle("x"), [FakeHandle("y")], "config"
+
+    monkeypatch.setattr(utility, "create_predictor", create_predictor)
+    return created
+
+
+def make_args(use_onnx=False):
+    return Namespace(use_onnx=use_onnx, rec_algorithm="SVTR_LCNet")
+
+
+def test_paddle_pool_clones_first_predictor(fake_create_predictor):
+    pool = utility.PredictorPool(make_args(), "det", None, size=3)
+    assert len(fake_create_predictor) == 1
+    assert pool.config == "config"
+    first = pool.handles[0].predictor
+    assert all(h.predictor.parent is first for h in pool.handles[1:])
+    assert all(h.input_tensor.name == "x" for h in pool.handles)
+    assert all([t.name for t in h.output_tensors] == ["y"] for h in pool.handles)
+
+
+def test_onnx_pool_creates_sessions(fake_create_predictor):
+    pool = utility.PredictorPool(make_args(use_onnx=True), "det", None, size=3)
+    assert len(fake_create_predictor) == 3
+    assert [h.predictor for h in pool.handles] == fake_create_predictor
+
+
+def test_checkout_and_checkin(fake_create_predictor):
+    pool = utility.PredictorPool(make_args(), "rec", None, size=2)
+    a = pool.checkout()
+    b = pool.checkout()
+    assert a is not b
+    assert pool.utilization()["in_use"] == 2
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.01)
+    pool.checkin(a)
+    with pytest.raises(ValueError):
+        pool.checkin(a)
+    with pool.acquire() as handle:
+        assert handle is a
+    pool.checkin(b)
+    stats = pool.utilization()
+    assert stats["size"] == 2
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] == 2
+    assert stats["checkouts"] == 3
+    assert 0.0 < stats["utilization"] <= 1.0
+
+
+def test_concurrent_callers_never_share_a_predictor(fake_create_predictor):
+    pool = utility.PredictorPool(make_args(), "rec", None, size=3)
+    active = set()
+    lock = threading.Lock()
+    errors = []
+
+    def call():
+        for _ in range(50):
+            with pool.acquire() as handle:
+                with lock:
+                    if id(handle) in active:
+                        errors.append(handle)
+                    active.add(id(handle))
+                with lock:
+                    active.discard(id(handle))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    stats = pool.utilization()
+    assert stats["checkouts"] == 400
+    assert stats["in_use"] == 0
+    assert stats["peak_in_use"] <= 3
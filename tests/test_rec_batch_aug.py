@@ -0,0 +1,120 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.data.collate_fn import RecAugCollator
+from ppocr.data.imaug import rec_img_aug
+from ppocr.data.imaug.rec_img_aug import (
+    RecAug,
+    batch_blur,
+    batch_hsv_aug,
+    batch_jitter,
+    hsv_aug,
+    jitter,
+)
+
+
+def random_images(n, h, w, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.randint(0, 256, size=(n, h, w, 3)).astype(np.uint8)
+
+
+def to_batch(images):
+    return images.transpose(0, 3, 1, 2).astype(np.float32)
+
+
+def test_batch_blur_matches_sep_filter():
+    images = random_images(3, 32, 100)
+    fil = cv2.getGaussianKernel(ksize=5, sigma=1, ktype=cv2.CV_32F)
+    out = batch_blur(to_batch(images), fil)
+    for img, res in zip(images, out):
+        expected = cv2.sepFilter2D(img.astype(np.float32), -1, fil, fil)
+        np.testing.assert_allclose(res.transpose(1, 2, 0), expected, atol=1e-3)
+
+
+@pytest.mark.parametrize("value", [0.3, 0.99])
+def test_batch_jitter_matches_jitter(monkeypatch, value):
+    images = random_images(2, 400, 500)
+    monkeypatch.setattr(rec_img_aug.random, "random", lambda: value)
+    shift = int(value * 400 * 0.01)
+    out = batch_jitter(to_batch(images), [shift, 0])
+    expected = jitter(images[0].copy())
+    np.testing.assert_array_equal(out[0].transpose(1, 2, 0), expected)
+    np.testing.assert_array_equal(out[1].transpose(1, 2, 0), images[1])
+
+
+def test_batch_hsv_aug_matches_hsv_aug(monkeypatch):
+    images = random_images(1, 32, 100)
+    monkeypatch.setattr(rec_img_aug.random, "random", lambda: 0.9)
+    expected = hsv_aug(images[0])
+    out = batch_hsv_aug(to_batch(images), [0.0009])
+    out = np.clip(np.rint(out[0].transpose(1, 2, 0)), 0, 255)
+    # hsv_aug differs only by the quantization of its uint8 hsv round trip
+    hsv = cv2.cvtColor(images[0], cv2.COLOR_BGR2HSV)
+    round_trip = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR).astype(np.float32)
+    bound = np.abs(round_trip - images[0]).max() + 1
+    assert np.abs(out - expected.astype(np.float32)).max() <= bound
+
+
+def rec_samples(n=4, h=48, w=320):
+    rng = np.random.RandomState(1)
+    return [
+        [
+            rng.uniform(-1, 1, size=(3, h, w)).astype(np.float32),
+            np.arange(25, dtype=np.int64),
+            np.int64(5),
+        ]
+        for _ in range(n)
+    ]
+
+
+def test_collator_without_ops_keeps_batch():
+    samples = rec_samples()
+    collator = RecAugCollator(0, 0, 0, 0, 0)
+    images, labels, lengths = collator(samples)
+    assert images.shape == (4, 3, 48, 320)
+    assert images.dtype == np.float32
+    np.testing.assert_allclose(images, np.stack([s[0] for s in samples]), atol=1e-5)
+    assert labels.shape == (4, 25)
+    np.testing.assert_array_equal(lengths, [5, 5, 5, 5])
+
+
+def test_collator_reverse_and_uint8():
+    samples = rec_samples()
+    collator = RecAugCollator(
+        reverse_prob=1, noise_prob=0, jitter_prob=0, blur_prob=0, hsv_aug_prob=0
+    )
+    images = collator(samples)[0]
+    np.testing.assert_allclose(images, -np.stack([s[0] for s in samples]), atol=1e-5)
+
+    pixels = random_images(4, 32, 100)
+    collator = RecAugCollator(1, 1, 1, 1, 1, image_index="image")
+    batch = collator([{"image": img, "label": "abc"} for img in pixels])
+    assert batch["image"].shape == pixels.shape
+    assert batch["image"].dtype == np.uint8
+    assert batch["label"] == ["abc"] * 4
+
+
+@pytest.mark.parametrize("bank_size", [0, 1 << 16])
+def test_collator_normal_noise(bank_size):
+    collator = RecAugCollator(noise_bank_size=bank_size)
+    noise = collator.normal_noise((8, 3, 32, 100))
+    assert noise.shape == (8, 3, 32, 100)
+    assert noise.dtype == np.float32
+    assert abs(noise.mean()) < 0.05
+    assert abs(noise.std() - 1) < 0.05
+    assert not np.array_equal(noise[0], noise[1])
+
+
+def test_rec_aug_batch_photometric_keeps_geometric_ops():
+    aug = RecAug(batch_photometric=True)
+    bda = aug.bda
+    assert aug.tia_prob == 0.4 and bda.crop_prob == 0.4
+    assert bda.blur_prob == bda.hsv_aug_prob == bda.jitter_prob == 0
+    assert bda.noise_prob == bda.reverse_prob == 0
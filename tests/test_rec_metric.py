@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import ppocr.metrics.rec_metric as rec_metric
+from ppocr.metrics.rec_metric import RecMetric
+
+PREDS = [("MH12AB1234", 0.98), ("HR55A0345", 0.5)]
+LABELS = [("MH12AB1234", None), ("HR55A0346", None)]
+
+
+def test_predictions_are_written_when_the_metric_is_read(tmp_path):
+    path = str(tmp_path / "license_plates.txt")
+    metric = RecMetric(prediction_path=path)
+    metric([PREDS, LABELS])
+    # buffered until the pass ends
+    assert not os.path.exists(path)
+    assert metric.get_metric()["acc"] == pytest.approx(0.5, abs=1e-4)
+    assert not os.path.exists(path + ".tmp")
+    with open(path) as f:
+        assert f.read() == "MH12AB1234\tMH12AB1234\nHR55A0345\tHR55A0346\n"
+
+    # the next eval pass opens a new sink and replaces the file
+    metric.reset()
+    metric([PREDS[:1], LABELS[:1]])
+    assert metric.get_metric()["acc"] == pytest.approx(1.0, abs=1e-4)
+    with open(path) as f:
+        assert f.read() == "MH12AB1234\tMH12AB1234\n"
+
+
+@pytest.mark.parametrize(
+    "world_size, name, expected",
+    [
+        (1, "preds.txt", "preds.txt"),
+        (2, "preds.txt", "preds.rank1.txt"),
+        (2, "preds_{rank}.txt", "preds_1.txt"),
+        (2, "preds_{pid}.txt", "preds_{}.txt".format(os.getpid())),
+    ],
+)
+def test_prediction_path_per_rank(tmp_path, monkeypatch, world_size, name, expected):
+    monkeypatch.setattr(rec_metric.dist, "get_world_size", lambda: world_size)
+    monkeypatch.setenv("PADDLE_TRAINER_ID", "1")
+    metric = RecMetric(prediction_path=str(tmp_path / name))
+    metric([PREDS, LABELS])
+    metric.get_metric()
+    assert os.listdir(str(tmp_path)) == [expected]
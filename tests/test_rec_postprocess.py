@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.postprocess.rec_postprocess import CTCLabelDecode
+
+LPR_DICT = os.path.join(current_dir, "..", "ppocr", "utils", "lpr_dict.txt")
+
+
+@pytest.fixture
+def decoder():
+    return CTCLabelDecode(character_dict_path=LPR_DICT, use_space_char=False)
+
+
+def make_preds(seed, batch_size=8, seq_len=40):
+    rng = np.random.RandomState(seed)
+    num_classes = 37
+    logits = rng.randn(batch_size, seq_len, num_classes).astype("float32")
+    # favour blanks and repeated characters like a real CTC output
+    logits[:, ::3, 0] += 3.0
+    logits[:, 1::4] = logits[:, 0::4][:, : logits[:, 1::4].shape[1]]
+    preds = np.exp(logits)
+    return preds / preds.sum(axis=2, keepdims=True)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batched_decode_matches_row_decode(decoder, seed):
+    preds = make_preds(seed)
+    preds_idx = preds.argmax(axis=2)
+    preds_prob = preds.max(axis=2)
+    expected = decoder.decode_rows(preds_idx, preds_prob, is_remove_duplicate=True)
+    result = decoder(preds)
+    assert [text for text, _ in result] == [text for text, _ in expected]
+    np.testing.assert_allclose(
+        [conf for _, conf in result], [conf for _, conf in expected], rtol=1e-6
+    )
+
+
+def test_decode_all_blank(decoder):
+    preds = np.zeros((2, 10, 37), dtype="float32")
+    preds[:, :, 0] = 1.0
+    assert decoder(preds) == [("", 0.0), ("", 0.0)]
+
+
+def test_decode_label(decoder):
+    label = np.array([[13, 24, 1, 4, 0, 0], [1, 1, 2, 0, 0, 0]])
+    preds = make_preds(0, batch_size=2)
+    _, label_result = decoder(preds, label)
+    assert label_result == [("CN03", 1.0), ("001", 1.0)]
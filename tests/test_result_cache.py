@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+from argparse import Namespace
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.utils.result_cache import (
+    ResultCache,
+    build_result_cache,
+    config_fingerprint,
+    image_digest,
+)
+
+
+def make_img(seed=0, shape=(32, 64, 3)):
+    return np.random.RandomState(seed).randint(0, 256, shape).astype(np.uint8)
+
+
+def make_result():
+    boxes = [np.array([[0, 0], [10, 0], [10, 5], [0, 5]], dtype=np.float32)]
+    return boxes, [("MH12AB1234", 0.98)]
+
+
+def test_image_digest():
+    img = make_img()
+    assert image_digest(img) == image_digest(img.copy())
+    # a strided view hashes its pixels, not the parent buffer
+    assert image_digest(img[:, ::2]) == image_digest(img[:, ::2].copy())
+    assert image_digest(img) != image_digest(make_img(1))
+    assert image_digest(img) != image_digest(img.reshape(64, 32, 3))
+    assert image_digest(img) != image_digest(img.astype(np.float32))
+
+
+def test_config_fingerprint(tmp_path):
+    model_dir = tmp_path / "rec"
+    model_dir.mkdir()
+    (model_dir / "inference.pdiparams").write_bytes(b"0" * 10)
+    args = Namespace(rec_model_dir=str(model_dir), drop_score=0.5, image_dir="a")
+    fingerprint = config_fingerprint(args)
+    # input paths do not change the results
+    assert config_fingerprint(Namespace(**dict(vars(args), image_dir="b"))) == (
+        fingerprint
+    )
+    assert config_fingerprint(Namespace(**dict(vars(args), drop_score=0.6))) != (
+        fingerprint
+    )
+    (model_dir / "inference.pdiparams").write_bytes(b"0" * 11)
+    assert config_fingerprint(args) != fingerprint
+
+
+def test_memory_cache_lru_and_options():
+    cache = ResultCache(fingerprint="m", max_entries=2)
+    imgs = [make_img(i) for i in range(3)]
+    keys = [cache.key(img, cls=True) for img in imgs]
+    assert cache.key(imgs[0], cls=False) != keys[0]
+    assert ResultCache(fingerprint="n").key(imgs[0], cls=True) != keys[0]
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], make_result())
+    cache.put(keys[1], make_result())
+    boxes, rec_res = cache.get(keys[0])
+    np.testing.assert_array_equal(boxes[0], make_result()[0][0])
+    assert rec_res == [("MH12AB1234", 0.98)]
+    # callers get their own copy
+    boxes[0] += 1
+    np.testing.assert_array_equal(cache.get(keys[0])[0][0], make_result()[0][0])
+    # keys[1] is the least recently used
+    cache.put(keys[2], make_result())
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(0.6)
+
+
+def test_ttl():
+    cache = ResultCache(max_entries=4, ttl=0.05)
+    key = cache.key(make_img())
+    cache.put(key, make_result())
+    assert cache.get(key) is not None
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_tier(tmp_path):
+    db_path = str(tmp_path / "cache" / "results.db")
+    cache = ResultCache(fingerprint="m", max_entries=0, db_path=db_path)
+    key = cache.key(make_img())
+    cache.put(key, make_result())
+    cache.close()
+
+    cache = ResultCache(fingerprint="m", max_entries=4, db_path=db_path)
+    assert cache.get(cache.key(make_img()))[1] == make_result()[1]
+    assert cache.get(key) is not None
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["hits"] == 2
+    cache.clear()
+    assert cache.get(key) is None
+    cache.close()
+
+
+def test_build_result_cache(tmp_path):
+    assert build_result_cache(Namespace(result_cache_size=0)) is None
+    cache = build_result_cache(
+        Namespace(result_cache_size=8, result_cache_ttl=5.0, drop_score=0.5)
+    )
+    assert cache.max_entries == 8
+    assert cache.ttl == 5.0
+    assert cache.fingerprint == config_fingerprint(Namespace(drop_score=0.5))
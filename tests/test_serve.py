@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import http.client
+import pytest
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from tools.infer.serve import LatencyHistogram, MicroBatcher, OCRServer
+
+
+class EchoSystem(object):
+    """Stands in for TextSystem, reads the image width as the text."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.batches = []
+
+    def predict_frames(self, imgs):
+        self.batches.append(len(imgs))
+        time.sleep(self.delay)
+        box = np.array([[0, 0], [10, 0], [10, 5], [0, 5]], dtype=np.float32)
+        return [([box], [(str(img.shape[1]), 0.9)]) for img in imgs], {}
+
+
+class FailingSystem(object):
+    def predict_frames(self, imgs):
+        raise ValueError("model exploded")
+
+
+def encode(width):
+    img = np.full((20, width, 3), 255, dtype=np.uint8)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(bounds_ms=(10, 100))
+    for seconds in [0.001, 0.005, 0.05, 0.5]:
+        histogram.observe(seconds)
+    result = histogram.to_dict()
+    assert result["buckets_ms"] == {"<=10": 2, "<=100": 1, "+Inf": 1}
+    assert result["p50_ms"] == 10 and result["p99_ms"] == float("inf")
+
+
+def test_micro_batcher_coalesces_requests():
+    system = EchoSystem()
+
+    async def run():
+        batcher = MicroBatcher([system], max_batch_size=8, max_wait=0.05)
+        batcher.start()
+        imgs = [np.zeros((4, width, 3), np.uint8) for width in range(1, 7)]
+        results = await asyncio.gather(
+            batcher.submit(imgs[:1]),
+            batcher.submit(imgs[1:4]),
+            batcher.submit(imgs[4:]),
+        )
+        metrics = batcher.metrics()
+        await batcher.stop()
+        return results, metrics
+
+    results, metrics = asyncio.run(run())
+    assert [[rec[1][0][0] for rec in result] for result in results] == [
+        ["1"],
+        ["2", "3", "4"],
+        ["5", "6"],
+    ]
+    assert system.batches == [6]
+    assert metrics["batches"] == 1 and metrics["requests"] == 3
+    assert metrics["queue_depth"]["images"] == 0
+
+
+def test_micro_batcher_respects_batch_size():
+    system = EchoSystem()
+
+    async def run():
+        batcher = MicroBatcher([system], max_batch_size=2, max_wait=0.05)
+        batcher.start()
+        imgs = [np.zeros((4, 4, 3), np.uint8)] * 5
+        await asyncio.gather(*[batcher.submit([img]) for img in imgs])
+        await batcher.stop()
+
+    asyncio.run(run())
+    assert system.batches == [2, 2, 1]
+
+
+def test_micro_batcher_splits_large_requests():
+    system = EchoSystem()
+
+    async def run():
+        batcher = MicroBatcher([system], max_batch_size=4, max_wait=0.05)
+        batcher.start()
+        imgs = [np.zeros((4, width, 3), np.uint8) for width in range(1, 11)]
+        results = await asyncio.gather(
+            batcher.submit(imgs[:3]),
+            batcher.submit(imgs[3:9]),
+            batcher.submit(imgs[9:]),
+        )
+        metrics = batcher.metrics()
+        await batcher.stop()
+        return results, metrics
+
+    results, metrics = asyncio.run(run())
+    assert [[rec[1][0][0] for rec in result] for result in results] == [
+        ["1", "2", "3"],
+        ["4", "5", "6", "7", "8", "9"],
+        ["10"],
+    ]
+    # the 6 image request is split 4 + 2, no batch exceeds 4 images
+    assert system.batches == [3, 4, 3]
+    assert metrics["requests"] == 3 and metrics["images"] == 10
+    assert metrics["queue_depth"]["images"] == 0
+
+
+def test_server_json_and_multipart():
+    def client(port):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        body = json.dumps(
+            {"images": [base64.b64encode(encode(w)).decode() for w in (30, 40)]}
+        )
+        conn.request("POST", "/predict/ocr_system", body)
+        json_result = json.loads(conn.getresponse().read())
+        boundary = "testboundary"
+        parts = [
+            '--{}\r\nContent-Disposition: form-data; name="image"; '
+            'filename="a.png"\r\nContent-Type: image/png\r\n\r\n'.format(
+                boundary
+            ).encode()
+            + encode(50)
+            + b"\r\n",
+            '--{}\r\nContent-Disposition: form-data; name="broken"; '
+            'filename="b.png"\r\n\r\nnot an image\r\n'.format(boundary).encode(),
+        ]
+        body = b"".join(parts) + "--{}--\r\n".format(boundary).encode()
+        conn.request(
+            "POST",
+            "/ocr",
+            body,
+            {"Content-Type": "multipart/form-data; boundary=" + boundary},
+        )
+        multipart_result = json.loads(conn.getresponse().read())
+        conn.request("GET", "/metrics")
+        metrics = json.loads(conn.getresponse().read())
+        conn.request("GET", "/missing")
+        missing = conn.getresponse()
+        missing.read()
+        conn.close()
+        return json_result, multipart_result, metrics, missing.status
+
+    async def run():
+        server = OCRServer(MicroBatcher([EchoSystem(0)], max_wait=0.001))
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client, port)
+        finally:
+            await server.stop()
+
+    json_result, multipart_result, metrics, missing_status = asyncio.run(run())
+    assert json_result["status"] == "000"
+    assert [r[0]["text"] for r in json_result["results"]] == ["30", "40"]
+    assert json_result["results"][0][0]["text_region"] == [
+        [0, 0],
+        [10, 0],
+        [10, 5],
+        [0, 5],
+    ]
+    assert multipart_result["results"][0][0]["text"] == "50"
+    assert multipart_result["results"][1] == []
+    assert metrics["images"] == 3 and metrics["requests"] == 2
+    assert missing_status == 404
+
+
+def test_server_reports_errors():
+    def client(port):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        body = json.dumps({"images": [base64.b64encode(encode(30)).decode()]})
+        conn.request("POST", "/ocr", body)
+        response = conn.getresponse()
+        failed = response.status, json.loads(response.read())
+        conn.close()
+
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.connect()
+        conn.sock.sendall(b"GARBAGE\r\n\r\n")
+        response = http.client.HTTPResponse(conn.sock)
+        response.begin()
+        malformed = response.status, json.loads(response.read())
+        conn.close()
+        return failed, malformed
+
+    async def run():
+        server = OCRServer(MicroBatcher([FailingSystem()], max_wait=0.001))
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client, port)
+        finally:
+            await server.stop()
+
+    failed, malformed = asyncio.run(run())
+    assert failed == (500, {"msg": "model exploded", "status": "101"})
+    assert malformed == (400, {"msg": "malformed request"})
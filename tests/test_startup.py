@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+import time
+from argparse import Namespace
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.abspath(os.path.join(current_dir, ".."))
+sys.path.append(root_dir)
+
+import tools.infer.utility as utility
+from tools.infer import predict_system
+
+
+class FakeEngine(object):
+    built = []
+
+    def __init__(self, args):
+        self.built.append(type(self).__name__)
+
+
+class FakeDetector(FakeEngine):
+    pass
+
+
+class FakeRecognizer(FakeEngine):
+    def __call__(self, img_list):
+        return [("MH12AB1234", 0.9) for _ in img_list], 0.0
+
+
+class FakeClassifier(FakeEngine):
+    pass
+
+
+@pytest.fixture
+def fake_engines(monkeypatch):
+    FakeEngine.built = []
+    monkeypatch.setattr(predict_system.predict_det, "TextDetector", FakeDetector)
+    monkeypatch.setattr(predict_system.predict_rec, "TextRecognizer", FakeRecognizer)
+    monkeypatch.setattr(predict_system.predict_cls, "TextClassifier", FakeClassifier)
+    return FakeEngine.built
+
+
+def make_args(**kwargs):
+    args = Namespace(
+        show_log=True,
+        use_angle_cls=True,
+        drop_score=0.5,
+        rec_algorithm="SVTR_LCNet",
+        rec_image_shape="3, 48, 320",
+        save_crop_res=False,
+        lazy_init=True,
+    )
+    args.__dict__.update(kwargs)
+    return args
+
+
+def test_lazy_init_builds_engines_on_first_use(fake_engines):
+    text_sys = predict_system.TextSystem(make_args())
+    assert fake_engines == []
+    assert text_sys.rec_crop_height == 48
+    recognizer = text_sys.text_recognizer
+    assert text_sys.text_recognizer is recognizer
+    assert fake_engines == ["FakeRecognizer"]
+    text_sys.text_classifier
+    assert fake_engines == ["FakeRecognizer", "FakeClassifier"]
+    text_sys.load_models()
+    assert fake_engines == ["FakeRecognizer", "FakeClassifier", "FakeDetector"]
+
+
+def test_eager_init(fake_engines):
+    predict_system.TextSystem(make_args(lazy_init=False, use_angle_cls=False))
+    assert fake_engines == ["FakeDetector", "FakeRecognizer"]
+
+
+@pytest.mark.parametrize("crop_mode, crop", [("on", None), ("off", True)])
+def test_crop_only_frames_never_build_the_detector(fake_engines, crop_mode, crop):
+    text_sys = predict_system.TextSystem(
+        make_args(use_angle_cls=False, crop_mode=crop_mode)
+    )
+    plates = [np.zeros((40, 160, 3), dtype=np.uint8) for _ in range(3)]
+    results, time_dict = text_sys.predict_frames(plates, crop=crop)
+    assert fake_engines == ["FakeRecognizer"]
+    assert [rec_res for _, rec_res in results] == [[("MH12AB1234", 0.9)]] * 3
+    assert time_dict["det"] < 1.0
+
+
+def test_startup_profile_report():
+    start = time.time()
+    profile = utility.StartupProfile(start=start)
+    with profile.phase("first image"):
+        with profile.phase("build det model"):
+            pass
+    profile.record("build rec model", start + 1.0, start + 1.5)
+    report = profile.report()
+    # phases are listed in the order they finished
+    assert [name for name, _ in report] == [
+        "startup and imports",
+        "build det model",
+        "first image",
+        "build rec model",
+        "total",
+    ]
+    assert dict(report)["build rec model"] == pytest.approx(0.5)
+    assert 0 <= report[0][1] < 1.0
+    assert utility.process_start_time() is None or (
+        utility.process_start_time() <= time.time()
+    )
+
+
+def test_rec_import_skips_detector_stack():
+    code = (
+        "import sys; import tools.infer.predict_rec; "
+        "heavy = ['tools.infer.predict_det', 'ppocr.postprocess.db_postprocess', "
+        "'shapely', 'pyclipper', 'PIL.ImageFont', 'imgaug', 'skimage', "
+        "'scipy.special']; "
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=root_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,153 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from ppocr.data.imaug.text_image_aug import augment
+from ppocr.data.imaug.text_image_aug.warp_mls import WarpMLS
+
+
+def reference_delta(src_pts, dst_pts, x, y):
+    """Offset of node (x, y), as computed by the previous loop implementation"""
+    p = np.array(dst_pts, dtype=np.float64)
+    q = np.array(src_pts, dtype=np.float64)
+    for k in range(len(p)):
+        if x == p[k][0] and y == p[k][1]:
+            if k < len(p) - 1:
+                return q[k] - (x, y)
+            p, q = p[:k], q[:k]
+            break
+    w = 1.0 / ((x - p[:, 0]) ** 2 + (y - p[:, 1]) ** 2)
+    pstar = (w[:, None] * p).sum(0) / w.sum()
+    qstar = (w[:, None] * q).sum(0) / w.sum()
+    miu_s = 0
+    for k in range(len(p)):
+        miu_s += w[k] * np.sum((p[k] - pstar) ** 2)
+    cur = np.array([x, y]) - pstar
+    cur_j = np.array([-cur[1], cur[0]])
+    new_pt = qstar.copy()
+    for k in range(len(p)):
+        pt_i = p[k] - pstar
+        pt_j = np.array([-pt_i[1], pt_i[0]])
+        tmp = np.array(
+            [
+                np.sum(pt_i * cur) * q[k][0] - np.sum(pt_j * cur) * q[k][1],
+                -np.sum(pt_i * cur_j) * q[k][0] + np.sum(pt_j * cur_j) * q[k][1],
+            ]
+        )
+        new_pt += tmp * w[k] / miu_s
+    return new_pt - (x, y)
+
+
+def reference_generate(src, rdx, rdy, grid_size=100):
+    """Per cell bilinear sampling of the previous implementation"""
+    dst_h, dst_w = src.shape[:2]
+    dst = np.zeros_like(src, dtype=np.float32)
+
+    def interp(x, y, v11, v12, v21, v22):
+        return (v11 * (1 - y) + v12 * y) * (1 - x) + (v21 * (1 - y) + v22 * y) * x
+
+    for i in range(0, dst_h, grid_size):
+        for j in range(0, dst_w, grid_size):
+            ni, nj, h, w = i + grid_size, j + grid_size, grid_size, grid_size
+            if ni >= dst_h:
+                ni = dst_h - 1
+                h = ni - i + 1
+            if nj >= dst_w:
+                nj = dst_w - 1
+                w = nj - j + 1
+            di = np.arange(h).reshape(-1, 1) / h
+            dj = np.arange(w).reshape(1, -1) / w
+            dx = interp(di, dj, rdx[i, j], rdx[i, nj], rdx[ni, j], rdx[ni, nj])
+            dy = interp(di, dj, rdy[i, j], rdy[i, nj], rdy[ni, j], rdy[ni, nj])
+            nx = np.clip(j + np.arange(w).reshape(1, -1) + dx, 0, dst_w - 1)
+            ny = np.clip(i + np.arange(h).reshape(-1, 1) + dy, 0, dst_h - 1)
+            x0, y0 = np.floor(nx).astype(int), np.floor(ny).astype(int)
+            x1, y1 = np.ceil(nx).astype(int), np.ceil(ny).astype(int)
+            fy, fx = (ny - y0)[..., None], (nx - x0)[..., None]
+            dst[i : i + h, j : j + w] = interp(
+                fy, fx, src[y0, x0], src[y0, x1], src[y1, x0], src[y1, x1]
+            )
+    return np.clip(dst, 0, 255).astype(np.uint8)
+
+
+def make_text_line(h, w, seed):
+    rng = np.random.RandomState(seed)
+    img = np.full((h, w, 3), 200, dtype=np.uint8)
+    for _ in range(8):
+        x, y = rng.randint(0, w - 40), rng.randint(10, h)
+        color = (int(rng.randint(0, 80)),) * 3
+        cv2.putText(img, "AB12", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 1)
+    return cv2.GaussianBlur(img, (3, 3), 0)
+
+
+def capture_warp_args(func, img, seed):
+    np.random.seed(seed)
+    calls = []
+
+    class Capture(object):
+        def __init__(self, *args):
+            calls.append(args)
+
+        def generate(self):
+            return img
+
+    warp_cls = augment.WarpMLS
+    augment.WarpMLS = Capture
+    try:
+        func(img)
+    finally:
+        augment.WarpMLS = warp_cls
+    return calls[0]
+
+
+@pytest.mark.parametrize("shape", [(32, 100), (48, 320), (101, 201), (64, 250)])
+@pytest.mark.parametrize(
+    "func", [augment.tia_distort, augment.tia_stretch, augment.tia_perspective]
+)
+def test_warp_mls_matches_reference(shape, func):
+    img = make_text_line(*shape, seed=shape[1])
+    src, src_pts, dst_pts, dst_w, dst_h = capture_warp_args(func, img, seed=shape[0])
+    warp = WarpMLS(src, src_pts, dst_pts, dst_w, dst_h)
+    warp.calc_delta()
+
+    rdx = np.zeros((dst_h, dst_w))
+    rdy = np.zeros((dst_h, dst_w))
+    for gy, y in enumerate(warp.grid_y):
+        for gx, x in enumerate(warp.grid_x):
+            rdx[y, x], rdy[y, x] = reference_delta(src_pts, dst_pts, x, y)
+            assert warp.rdx[gy, gx] == pytest.approx(rdx[y, x], abs=1e-6)
+            assert warp.rdy[gy, gx] == pytest.approx(rdy[y, x], abs=1e-6)
+
+    # cv2.remap samples at 1/32 pixel, so edges may differ by a few levels
+    diff = np.abs(
+        warp.gen_img().astype(np.int32)
+        - reference_generate(src, rdx, rdy).astype(np.int32)
+    )
+    assert diff.mean() < 0.5
+    assert (diff > 1).mean() < 0.1
+    assert diff.max() <= 16
+
+
+def test_grid_nodes():
+    assert WarpMLS.grid_nodes(32, 100).tolist() == [0, 31]
+    assert WarpMLS.grid_nodes(201, 100).tolist() == [0, 100, 200]
+    assert WarpMLS.grid_nodes(250, 100).tolist() == [0, 100, 200, 249]
+    assert WarpMLS.grid_nodes(1, 100).tolist() == [0]
+
+
+def test_grayscale_and_single_point():
+    img = make_text_line(32, 100, seed=0)[..., 0]
+    out = WarpMLS(img, [[0, 0]], [[5, 5]], 100, 32).generate()
+    # a single control point leaves the image unchanged
+    np.testing.assert_array_equal(out, img)
+    src, src_pts, dst_pts, dst_w, dst_h = capture_warp_args(
+        augment.tia_distort, img, seed=0
+    )
+    out = WarpMLS(src, src_pts, dst_pts, dst_w, dst_h).generate()
+    assert out.shape == img.shape and out.dtype == np.uint8
@@ -0,0 +1,143 @@
+import os
+import sys
+import logging
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+import ppocr.data.width_bucket_sampler as width_bucket_sampler
+from ppocr.data.packed_dataset import PackedDataSet, PackedShardWriter
+from ppocr.data.width_bucket_sampler import WidthBucketSampler
+
+
+def make_source(ratios, seed=None):
+    return SimpleNamespace(
+        data_idx_order_list=list(range(len(ratios))),
+        wh_ratio=np.array(ratios, dtype=np.float32),
+        seed=seed,
+    )
+
+
+@pytest.fixture
+def world(monkeypatch):
+    def set_world(size, rank):
+        monkeypatch.setattr(width_bucket_sampler.dist, "get_world_size", lambda: size)
+        monkeypatch.setattr(width_bucket_sampler.dist, "get_rank", lambda: rank)
+
+    set_world(1, 0)
+    return set_world
+
+
+def test_batches_are_padded_to_their_bucket(world):
+    rng = np.random.RandomState(0)
+    ratios = np.concatenate([rng.uniform(1, 6.6, 200), [0.0, 20.0]])
+    sampler = WidthBucketSampler(make_source(ratios, seed=1), batch_size=16)
+    assert sampler.bucket_widths == [80, 160, 240, 320]
+    batches = list(sampler)
+    assert len(batches) == len(sampler)
+    seen = set()
+    for batch in batches:
+        widths = {w for w, _, _, _ in batch}
+        assert len(widths) == 1 and {h for _, h, _, _ in batch} == {48}
+        width = widths.pop()
+        for _, _, idx, _ in batch:
+            seen.add(idx)
+            if 0 < ratios[idx] <= 320 / 48:
+                assert np.ceil(ratios[idx] * 48) <= width
+                assert width == 80 or np.ceil(ratios[idx] * 48) > width - 80
+            else:
+                assert width == 320
+    assert seen == set(range(len(ratios)))
+    padded = sum(w for batch in batches for w, _, _, _ in batch)
+    assert padded < 0.75 * 320 * sum(len(batch) for batch in batches)
+
+
+def test_epochs_reshuffle(world):
+    sampler = WidthBucketSampler(
+        make_source(np.linspace(1, 6, 100), seed=3), batch_size=8
+    )
+    first, second = list(sampler), list(sampler)
+    assert first != second
+    assert sorted(map(sorted, first)) != sorted(map(sorted, second))
+    eval_sampler = WidthBucketSampler(
+        make_source(np.linspace(1, 6, 100)), batch_size=8, is_training=False
+    )
+    assert list(eval_sampler) == list(eval_sampler)
+
+
+def test_distributed_ranks(world):
+    ratios = np.random.RandomState(1).uniform(1, 6, 101)
+    per_rank = []
+    for rank in range(2):
+        world(2, rank)
+        sampler = WidthBucketSampler(make_source(ratios, seed=0), batch_size=8)
+        per_rank.append(list(sampler))
+    assert len(per_rank[0]) == len(per_rank[1])
+    for batch0, batch1 in zip(*per_rank):
+        assert len(batch0) == len(batch1) == 8
+        assert batch0[0][0] == batch1[0][0]
+    indices = [[idx for batch in rank for _, _, idx, _ in batch] for rank in per_rank]
+    assert set(indices[0]) | set(indices[1]) == set(range(101))
+
+
+def test_batch_size_scales_without_fix_bs(world):
+    sampler = WidthBucketSampler(
+        make_source([1.0] * 40 + [6.0] * 10), batch_size=4, fix_bs=False
+    )
+    assert sampler.batch_sizes == [16, 8, 5, 4]
+    sizes = sorted({(batch[0][0], len(batch)) for batch in sampler})
+    assert sizes == [(80, 16), (320, 4)]
+
+
+def test_ratios_read_from_images(world, tmp_path):
+    lines = []
+    for i, width in enumerate([48, 200, 300]):
+        cv2.imwrite(str(tmp_path / "{}.jpg".format(i)), np.zeros((48, width, 3)))
+        lines.append("{}.jpg\tlabel\n".format(i).encode("utf-8"))
+    source = SimpleNamespace(
+        data_idx_order_list=[2, 0, 1],
+        data_lines=lines,
+        data_dir=str(tmp_path),
+        delimiter="\t",
+        seed=None,
+    )
+    cache = str(tmp_path / "ratios.npz")
+    sampler = WidthBucketSampler(source, ratio_cache=cache)
+    np.testing.assert_allclose(sampler.wh_ratio, [300 / 48, 1, 200 / 48], rtol=1e-6)
+    os.remove(tmp_path / "0.jpg")
+    sampler = WidthBucketSampler(source, ratio_cache=cache)
+    np.testing.assert_allclose(sampler.wh_ratio, [300 / 48, 1, 200 / 48], rtol=1e-6)
+
+
+def test_packed_dataset_resizes_to_bucket_width(world, tmp_path):
+    prefix = str(tmp_path / "train")
+    with PackedShardWriter(prefix) as writer:
+        for i, width in enumerate([60, 150, 300]):
+            buf = cv2.imencode(".png", np.full((40, width, 3), 90, np.uint8))[1]
+            writer.add(buf.tobytes(), "{}.png".format(i), "abc", (width, 40))
+    config = {
+        "Global": {},
+        "Train": {
+            "dataset": {
+                "shard_list": [prefix],
+                "transforms": [
+                    {"DecodeImage": {"img_mode": "BGR", "channel_first": False}},
+                    {"KeepKeys": {"keep_keys": ["image", "label", "valid_ratio"]}},
+                ],
+            },
+            "loader": {"shuffle": False},
+        },
+    }
+    dataset = PackedDataSet(config, "Train", logging.getLogger(), seed=0)
+    sampler = WidthBucketSampler(dataset, batch_size=2, bucket_widths=[80, 320])
+    for batch in sampler:
+        for properties in batch:
+            image, label, valid_ratio = dataset[properties]
+            assert image.shape == (3, 48, properties[0])
+            assert label == "abc"
+            assert 0 < valid_ratio <= 1
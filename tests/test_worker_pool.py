@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, "..")))
+
+from tools.infer.worker_pool import InferWorkerPool
+
+
+class StubEngine(object):
+    """Stands in for a TextSystem, counts the calls made in its worker"""
+
+    def __init__(self, args):
+        self.calls = 0
+
+    def __call__(self, item):
+        self.calls += 1
+        return item
+
+
+def build_stub_engine(args):
+    return StubEngine(args)
+
+
+def slow_square(engine, item):
+    # early items are the slowest, so workers finish out of order
+    time.sleep(0.02 * (item % 4 == 0))
+    if item == 7:
+        raise ValueError("bad item 7")
+    return item * item
+
+
+def engine_calls(engine, item):
+    return engine.calls
+
+
+def make_args(warmup=False, total_process_num=2):
+    return argparse.Namespace(warmup=warmup, total_process_num=total_process_num)
+
+
+def test_results_keep_input_order():
+    items = [i for i in range(20) if i != 7]
+    with InferWorkerPool(make_args(), engine=build_stub_engine) as pool:
+        results = pool.map(items, func=slow_square)
+        assert results == [i * i for i in items]
+        assert pool.map(["a", "b"]) == ["a", "b"]
+
+
+def test_worker_errors_are_reraised():
+    with pytest.raises(ValueError, match="bad item 7"):
+        with InferWorkerPool(make_args(), engine=build_stub_engine) as pool:
+            pool.map(range(10), func=slow_square)
+
+
+@pytest.mark.parametrize("warmup", [False, True])
+def test_workers_warm_up_their_engine(warmup):
+    args = make_args(warmup=warmup, total_process_num=1)
+    with InferWorkerPool(args, engine=build_stub_engine) as pool:
+        calls = pool.map([0, 1], func=engine_calls)
+    assert calls == ([10, 10] if warmup else [0, 0])
@@ -0,0 +1,322 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Build a recognition dataset from a directory of images and a directory of
+label files with the same base names, e.g.
+
+    python tools/build_dataset.py --image_dir=/data/images --label_dir=/data/labels \
+        --output_dir=./train_data --name=trainB --workers=16 --pack
+
+copies the images to <output_dir>/<name>/ and writes the label file
+<output_dir>/<name>.txt, the label to image map and an error log. The
+images are copied, hashed and optionally contrast enhanced in a thread
+pool. A manifest of the source files keeps reruns incremental: only new or
+changed images are processed again, and removed ones are dropped. With
+--pack the dataset is also written as the packed shard
+<output_dir>/packed/<name> of PackedDataSet.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "..")))
+
+from ppocr.data.packed_dataset import PackedShard, PackedShardWriter, image_size
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode="w", **kwargs):
+    """open a temporary file that replaces path once it is written completely"""
+    tmp_path = "{}.tmp{}".format(path, os.getpid())
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def increase_contrast(image):
+    """CLAHE on the gray or lightness channel of a decoded image"""
+    if len(image.shape) == 2:
+        gray = image
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+    contrasted_gray = clahe.apply(gray)
+
+    if len(image.shape) == 3:
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        l, a, b = cv2.split(lab)
+        l = contrasted_gray
+        lab = cv2.merge((l, a, b))
+        contrasted = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+    else:
+        contrasted = contrasted_gray
+
+    return contrasted
+
+
+def scan_sources(image_dir, label_dir):
+    """
+    Source images and label files, as {image_name: (image_stat, label_path,
+    label_stat)}, and the image names without a label file. Each directory
+    is listed once with os.scandir instead of checking every file.
+    """
+    labels = {}
+    with os.scandir(label_dir) as it:
+        for entry in it:
+            base, ext = os.path.splitext(entry.name)
+            if ext == ".txt" and entry.is_file():
+                labels[base] = entry
+    sources, missing = {}, []
+    with os.scandir(image_dir) as it:
+        for entry in it:
+            if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if not entry.is_file():
+                continue
+            label_entry = labels.get(os.path.splitext(entry.name)[0])
+            if label_entry is None:
+                missing.append(entry.name)
+                continue
+            sources[entry.name] = (entry.stat(), label_entry.path, label_entry.stat())
+    return sources, sorted(missing)
+
+
+def _source_key(image_stat, label_stat, contrast):
+    return [
+        image_stat.st_mtime_ns,
+        image_stat.st_size,
+        label_stat.st_mtime_ns,
+        label_stat.st_size,
+        bool(contrast),
+    ]
+
+
+def _write_file(path, buf):
+    with atomic_open(path, "wb") as f:
+        f.write(buf)
+
+
+def process_image(image_path, label_path, output_path, contrast_path=None):
+    """
+    Copy one image and read its label, returns its manifest entry. The
+    contrast enhanced copy is written to contrast_path when it is given.
+    """
+    with open(label_path, "r") as label_file:
+        label = label_file.read().strip()
+    with open(image_path, "rb") as f:
+        buf = f.read()
+    _write_file(output_path, buf)
+    try:
+        width, height = image_size(buf)
+    except Exception:
+        width, height = 0, 0
+    if contrast_path is not None:
+        img = cv2.imdecode(np.frombuffer(buf, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("cannot decode {}".format(image_path))
+        ext = os.path.splitext(contrast_path)[1]
+        ok, encoded = cv2.imencode(ext, increase_contrast(img))
+        if not ok:
+            raise ValueError("cannot encode {}".format(contrast_path))
+        _write_file(contrast_path, encoded.tobytes())
+    return {
+        "path": image_path,
+        "hash": hashlib.blake2b(buf, digest_size=16).hexdigest(),
+        "label": label,
+        "width": width,
+        "height": height,
+    }
+
+
+def pack_dataset(prefix, image_dir, entries):
+    """
+    Write the images of the manifest entries into the packed shard prefix.
+    Images whose hash matches the previous shard are taken from it, the
+    others are read from image_dir.
+    """
+    previous, previous_idx = None, {}
+    if os.path.exists(prefix + ".idx.npy"):
+        previous = PackedShard(prefix)
+        previous_idx = {name: i for i, name in enumerate(previous.file_names)}
+    with PackedShardWriter(prefix) as writer:
+        for name in sorted(entries):
+            entry = entries[name]
+            buf = None
+            if name in previous_idx:
+                buf = previous.read(previous_idx[name]).tobytes()
+                if hashlib.blake2b(buf, digest_size=16).hexdigest() != entry["hash"]:
+                    buf = None
+            if buf is None:
+                with open(os.path.join(image_dir, name), "rb") as f:
+                    buf = f.read()
+            writer.add(buf, name, entry["label"], (entry["width"], entry["height"]))
+    return len(entries)
+
+
+def build_dataset(
+    image_dir,
+    label_dir,
+    output_dir,
+    name,
+    map_name="license_plate_map.json",
+    contrast=False,
+    workers=8,
+    pack=False,
+    logger=print,
+):
+    """
+    Build or update the dataset name in output_dir, see the module doc.
+    Returns the counts of images in the dataset, processed in this run,
+    unchanged, removed and failed.
+    """
+    image_out_dir = os.path.join(output_dir, name)
+    contrast_dir = os.path.join(image_out_dir, "contrasted")
+    os.makedirs(image_out_dir, exist_ok=True)
+    if contrast:
+        os.makedirs(contrast_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, name + ".manifest.json")
+
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    sources, missing = scan_sources(image_dir, label_dir)
+    errors = ["Missing file: {}\n".format(filename) for filename in missing]
+
+    entries, tasks = {}, {}
+    for filename, (image_stat, label_path, label_stat) in sources.items():
+        key = _source_key(image_stat, label_stat, contrast)
+        entry = manifest.get(filename)
+        if (
+            entry is not None
+            and entry["source"] == key
+            and os.path.exists(os.path.join(image_out_dir, filename))
+        ):
+            entries[filename] = entry
+        else:
+            tasks[filename] = (label_path, key)
+
+    processed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            filename: executor.submit(
+                process_image,
+                os.path.join(image_dir, filename),
+                label_path,
+                os.path.join(image_out_dir, filename),
+                os.path.join(contrast_dir, filename) if contrast else None,
+            )
+            for filename, (label_path, key) in sorted(tasks.items())
+        }
+        for filename, future in futures.items():
+            try:
+                entry = future.result()
+            except Exception as e:
+                errors.append("Failed to process {}: {}\n".format(filename, e))
+                continue
+            entry["source"] = tasks[filename][1]
+            entries[filename] = entry
+            processed += 1
+            if processed % 1000 == 0:
+                logger("Processed {} images".format(processed))
+
+    removed = [filename for filename in manifest if filename not in sources]
+    for filename in removed:
+        for path in (
+            os.path.join(image_out_dir, filename),
+            os.path.join(contrast_dir, filename),
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+
+    license_plate_map = {}
+    with atomic_open(os.path.join(output_dir, name + ".txt"), "w") as f:
+        for filename in sorted(entries):
+            label = entries[filename]["label"]
+            f.write("{}\t{}\n".format(filename, label))
+            license_plate_map[label] = filename
+    license_plate_map_path = os.path.join(output_dir, map_name)
+    with atomic_open(license_plate_map_path, "w") as f:
+        json.dump(license_plate_map, f, indent=4)
+    with atomic_open(os.path.join(output_dir, "error_log.txt"), "w") as f:
+        f.writelines(errors)
+    with atomic_open(manifest_path, "w") as f:
+        json.dump(entries, f)
+
+    if pack:
+        prefix = os.path.join(output_dir, "packed", name)
+        pack_dataset(prefix, image_out_dir, entries)
+        logger("Packed shard saved to {}".format(prefix))
+
+    logger("Total images processed: {}".format(processed))
+    logger("License plate map saved to {}".format(license_plate_map_path))
+    return {
+        "total": len(entries),
+        "processed": processed,
+        "unchanged": len(entries) - processed,
+        "removed": len(removed),
+        "errors": len(errors),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image_dir", type=str, required=True)
+    parser.add_argument(
+        "--label_dir",
+        type=str,
+        default=None,
+        help="Directory of the <image name>.txt label files, image_dir by default",
+    )
+    parser.add_argument("--output_dir", type=str, required=True)
+    parser.add_argument(
+        "--name", type=str, default="train", help="Name of the image dir and labels"
+    )
+    parser.add_argument("--map_name", type=str, default="license_plate_map.json")
+    parser.add_argument(
+        "--contrast",
+        action="store_true",
+        help="Also write CLAHE enhanced copies to <name>/contrasted",
+    )
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--pack", action="store_true", help="Also write a packed shard")
+
+    args = parser.parse_args()
+    build_dataset(
+        args.image_dir,
+        args.label_dir or args.image_dir,
+        args.output_dir,
+        args.name,
+        map_name=args.map_name,
+        contrast=args.contrast,
+        workers=args.workers,
+        pack=args.pack,
+    )
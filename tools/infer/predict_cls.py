@@ -45,12 +45,12 @@ class TextClassifier(object):
             "label_list": args.label_list,
         }
         self.postprocess_op = build_post_process(postprocess_params)
-        (
-            self.predictor,
-            self.input_tensor,
-            self.output_tensors,
-            _,
-        ) = utility.create_predictor(args, "cls", logger)
+        self.predictor_pool = utility.PredictorPool(
+            args, "cls", logger, getattr(args, "predictor_pool_size", 1)
+        )
+        self.predictor, self.input_tensor, self.output_tensors = (
+            self.predictor_pool.handles[0]
+        )
         self.use_onnx = args.use_onnx
 
     def resize_norm_img(self, img):
@@ -104,16 +104,18 @@ class TextClassifier(object):
             norm_img_batch = np.concatenate(norm_img_batch)
             norm_img_batch = norm_img_batch.copy()
 
-            if self.use_onnx:
-                input_dict = {}
-                input_dict[self.input_tensor.name] = norm_img_batch
-                outputs = self.predictor.run(self.output_tensors, input_dict)
-                prob_out = outputs[0]
-            else:
-                self.input_tensor.copy_from_cpu(norm_img_batch)
-                self.predictor.run()
-                prob_out = self.output_tensors[0].copy_to_cpu()
-                self.predictor.try_shrink_memory()
+            with self.predictor_pool.acquire() as handle:
+                predictor, input_tensor, output_tensors = handle
+                if self.use_onnx:
+                    input_dict = {}
+                    input_dict[input_tensor.name] = norm_img_batch
+                    outputs = predictor.run(output_tensors, input_dict)
+                    prob_out = outputs[0]
+                else:
+                    input_tensor.copy_from_cpu(norm_img_batch)
+                    predictor.run()
+                    prob_out = output_tensors[0].copy_to_cpu()
+                    predictor.try_shrink_memory()
             cls_result = self.postprocess_op(prob_out)
             elapse += time.time() - starttime
             for rno in range(len(cls_result)):
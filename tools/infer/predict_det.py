@@ -24,6 +24,7 @@ import cv2
 import numpy as np
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import tools.infer.utility as utility
 from ppocr.utils.logging import get_logger
@@ -40,6 +41,7 @@ class TextDetector(object):
         self.args = args
         self.det_algorithm = args.det_algorithm
         self.use_onnx = args.use_onnx
+        self.det_postprocess_workers = getattr(args, "det_postprocess_workers", 0)
         pre_process_list = [
             {
                 "DetResizeForTest": {
@@ -131,12 +133,13 @@ class TextDetector(object):
 
         self.preprocess_op = create_operators(pre_process_list)
         self.postprocess_op = build_post_process(postprocess_params)
-        (
-            self.predictor,
-            self.input_tensor,
-            self.output_tensors,
-            self.config,
-        ) = utility.create_predictor(args, "det", logger)
+        self.predictor_pool = utility.PredictorPool(
+            args, "det", logger, getattr(args, "predictor_pool_size", 1)
+        )
+        self.predictor, self.input_tensor, self.output_tensors = (
+            self.predictor_pool.handles[0]
+        )
+        self.config = self.predictor_pool.config
 
         if self.use_onnx:
             img_h, img_w = self.input_tensor.shape[2:]
@@ -227,38 +230,21 @@ class TextDetector(object):
         dt_boxes = np.array(dt_boxes_new)
         return dt_boxes
 
-    def predict(self, img):
-        ori_im = img.copy()
-        data = {"image": img}
-
-        st = time.time()
-
-        if self.args.benchmark:
-            self.autolog.times.start()
-
-        data = transform(data, self.preprocess_op)
-        img, shape_list = data
-        if img is None:
-            return None, 0
-        img = np.expand_dims(img, axis=0)
-        shape_list = np.expand_dims(shape_list, axis=0)
-        img = img.copy()
-
-        if self.args.benchmark:
-            self.autolog.times.stamp()
-        if self.use_onnx:
-            input_dict = {}
-            input_dict[self.input_tensor.name] = img
-            outputs = self.predictor.run(self.output_tensors, input_dict)
-        else:
-            self.input_tensor.copy_from_cpu(img)
-            self.predictor.run()
-            outputs = []
-            for output_tensor in self.output_tensors:
-                output = output_tensor.copy_to_cpu()
-                outputs.append(output)
-            if self.args.benchmark:
-                self.autolog.times.stamp()
+    def run_predictor(self, img):
+        """Run the predictor on a NCHW batch and name its outputs."""
+        with self.predictor_pool.acquire() as handle:
+            predictor, input_tensor, output_tensors = handle
+            if self.use_onnx:
+                input_dict = {}
+                input_dict[input_tensor.name] = img
+                outputs = predictor.run(output_tensors, input_dict)
+            else:
+                input_tensor.copy_from_cpu(img)
+                predictor.run()
+                outputs = []
+                for output_tensor in output_tensors:
+                    output = output_tensor.copy_to_cpu()
+                    outputs.append(output)
 
         preds = {}
         if self.det_algorithm == "EAST":
@@ -279,6 +265,30 @@ class TextDetector(object):
             preds["score"] = outputs[1]
         else:
             raise NotImplementedError
+        return preds
+
+    def predict(self, img):
+        ori_im = img.copy()
+        data = {"image": img}
+
+        st = time.time()
+
+        if self.args.benchmark:
+            self.autolog.times.start()
+
+        data = transform(data, self.preprocess_op)
+        img, shape_list = data
+        if img is None:
+            return None, 0
+        img = np.expand_dims(img, axis=0)
+        shape_list = np.expand_dims(shape_list, axis=0)
+        img = img.copy()
+
+        if self.args.benchmark:
+            self.autolog.times.stamp()
+        preds = self.run_predictor(img)
+        if self.args.benchmark and not self.use_onnx:
+            self.autolog.times.stamp()
 
         post_result = self.postprocess_op(preds, shape_list)
         dt_boxes = post_result[0]["points"]
@@ -293,6 +303,107 @@ class TextDetector(object):
         et = time.time()
         return dt_boxes, et - st
 
+    def is_long_image(self, img):
+        """Whether __call__ splits img into overlapping parts."""
+        h, w = img.shape[:2]
+        return (h / w > 2 and h > self.args.det_limit_side_len) or (
+            w / h > 3 and w > self.args.det_limit_side_len * 3
+        )
+
+    def predict_batch(self, imgs):
+        """
+        Detect text in several images with one predictor call per batch of
+        at most max_batch_size images. DB and DB++ pad the resized images to
+        a shared shape and crop every probability map back before
+        postprocessing, the other algorithms batch images whose resized
+        shapes are equal. Long images that __call__ splits are run on their
+        own.
+        return the dt_boxes of every image, None for unreadable images, and
+        the total elapsed time
+        """
+        st = time.time()
+        benchmark = self.args.benchmark
+        dt_boxes_list = [None] * len(imgs)
+        long_images = {idx for idx, img in enumerate(imgs) if self.is_long_image(img)}
+        for idx in sorted(long_images):
+            dt_boxes_list[idx], _ = self(imgs[idx])
+
+        if benchmark:
+            self.autolog.times.start()
+        groups = {}
+        datas = {}
+        for idx, img in enumerate(imgs):
+            if idx in long_images:
+                continue
+            data = transform({"image": img}, self.preprocess_op)
+            if data[0] is None:
+                continue
+            datas[idx] = data
+            key = "padded" if self.det_algorithm in ["DB", "DB++"] else data[0].shape
+            groups.setdefault(key, []).append(idx)
+
+        if benchmark:
+            self.autolog.times.stamp()
+        batch_size = max(getattr(self.args, "max_batch_size", 10), 1)
+        # with postprocess workers the maps of a batch are postprocessed while
+        # the predictor already runs the next batch, the benchmark times the
+        # stages one after the other like __call__
+        executor = None
+        if self.det_postprocess_workers > 0 and not benchmark:
+            executor = ThreadPoolExecutor(max_workers=self.det_postprocess_workers)
+        futures = {}
+        tasks = {}
+        try:
+            for key, indices in groups.items():
+                for beg in range(0, len(indices), batch_size):
+                    batch_indices = indices[beg : beg + batch_size]
+                    shapes = [datas[idx][0].shape for idx in batch_indices]
+                    c = shapes[0][0]
+                    max_h = max(shape[1] for shape in shapes)
+                    max_w = max(shape[2] for shape in shapes)
+                    img_batch = np.zeros(
+                        (len(batch_indices), c, max_h, max_w), "float32"
+                    )
+                    for i, idx in enumerate(batch_indices):
+                        _, h, w = shapes[i]
+                        img_batch[i, :, :h, :w] = datas[idx][0]
+                    preds = self.run_predictor(img_batch)
+
+                    for i, idx in enumerate(batch_indices):
+                        img_preds = {k: v[i : i + 1] for k, v in preds.items()}
+                        if key == "padded":
+                            _, h, w = shapes[i]
+                            img_preds["maps"] = img_preds["maps"][:, :, :h, :w]
+                        task = (img_preds, datas[idx][1], imgs[idx].shape)
+                        if benchmark:
+                            tasks[idx] = task
+                        elif executor is None:
+                            dt_boxes_list[idx] = self.postprocess_single(*task)
+                        else:
+                            futures[idx] = executor.submit(
+                                self.postprocess_single, *task
+                            )
+            if benchmark and not self.use_onnx:
+                self.autolog.times.stamp()
+            for idx, task in tasks.items():
+                dt_boxes_list[idx] = self.postprocess_single(*task)
+            for idx, future in futures.items():
+                dt_boxes_list[idx] = future.result()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if benchmark:
+            self.autolog.times.end(stamp=True)
+        return dt_boxes_list, time.time() - st
+
+    def postprocess_single(self, img_preds, shape, img_shape):
+        shape_list = np.expand_dims(shape, axis=0)
+        post_result = self.postprocess_op(img_preds, shape_list)
+        dt_boxes = post_result[0]["points"]
+        if self.args.det_box_type == "poly":
+            return self.filter_tag_det_res_only_clip(dt_boxes, img_shape)
+        return self.filter_tag_det_res(dt_boxes, img_shape)
+
     def __call__(self, img):
         # For image like poster with one side much greater than the other side,
         # splitting recursively and processing with overlap to enhance performance.
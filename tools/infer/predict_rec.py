@@ -25,12 +25,16 @@ import cv2
 import numpy as np
 import math
 import time
+import queue
+import threading
 import traceback
 import paddle
+from concurrent.futures import ThreadPoolExecutor
 
 import tools.infer.utility as utility
 from ppocr.postprocess import build_post_process
 from ppocr.utils.logging import get_logger
+from ppocr.utils.prediction_sink import PredictionSink
 from ppocr.utils.utility import get_image_file_list, check_and_read
 
 logger = get_logger()
@@ -42,6 +46,23 @@ class TextRecognizer(object):
             logger = get_logger()
         self.rec_image_shape = [int(v) for v in args.rec_image_shape.split(",")]
         self.rec_batch_num = args.rec_batch_num
+        self.rec_pipeline_workers = getattr(args, "rec_pipeline_workers", 0)
+        rec_width_buckets = getattr(args, "rec_width_buckets", "")
+        if isinstance(rec_width_buckets, str):
+            rec_width_buckets = [
+                int(v) for v in rec_width_buckets.split(",") if v.strip()
+            ]
+        self.rec_width_buckets = sorted(rec_width_buckets or [])
+        # inference time and counts per padded input width
+        self.bucket_stats = {}
+        self.bucket_stats_lock = threading.Lock()
+        # uint8 -> normalized float32 lookup table, (x / 255 - 0.5) / 0.5
+        self.norm_lut = np.arange(256, dtype=np.float32) / 255
+        self.norm_lut -= 0.5
+        self.norm_lut /= 0.5
+        # reusable flat buffer holding the (N, C, H, W) batch, one per thread
+        # so that concurrent callers sharing the predictor pool do not collide
+        self.thread_local = threading.local()
         self.rec_algorithm = args.rec_algorithm
         postprocess_params = {
             "name": "CTCLabelDecode",
@@ -140,14 +161,20 @@ class TextRecognizer(object):
                 "character_dict_path": args.rec_char_dict_path,
                 "use_space_char": args.use_space_char,
             }
+        rec_plate_grammar = getattr(args, "rec_plate_grammar", "")
+        if rec_plate_grammar and postprocess_params["name"] == "CTCLabelDecode":
+            postprocess_params["name"] = "PlateCTCLabelDecode"
+            postprocess_params["grammar"] = rec_plate_grammar
+            postprocess_params["beam_width"] = getattr(args, "rec_beam_width", 10)
         self.postprocess_op = build_post_process(postprocess_params)
         self.postprocess_params = postprocess_params
-        (
-            self.predictor,
-            self.input_tensor,
-            self.output_tensors,
-            self.config,
-        ) = utility.create_predictor(args, "rec", logger)
+        self.predictor_pool = utility.PredictorPool(
+            args, "rec", logger, getattr(args, "predictor_pool_size", 1)
+        )
+        self.predictor, self.input_tensor, self.output_tensors = (
+            self.predictor_pool.handles[0]
+        )
+        self.config = self.predictor_pool.config
         self.benchmark = args.benchmark
         self.use_onnx = args.use_onnx
         if args.benchmark:
@@ -171,7 +198,7 @@ class TextRecognizer(object):
             )
         self.return_word_box = args.return_word_box
 
-    def resize_norm_img(self, img, max_wh_ratio):
+    def resize_norm_img(self, img, max_wh_ratio, img_w=None):
         imgC, imgH, imgW = self.rec_image_shape
         if self.rec_algorithm == "NRTR" or self.rec_algorithm == "ViTSTR":
             img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -200,7 +227,10 @@ class TextRecognizer(object):
             return resized_image
 
         assert imgC == img.shape[2]
-        imgW = int((imgH * max_wh_ratio))
+        if img_w is not None:
+            imgW = img_w
+        else:
+            imgW = int((imgH * max_wh_ratio))
         if self.use_onnx:
             w = self.input_tensor.shape[3:][0]
             if isinstance(w, str):
@@ -226,6 +256,60 @@ class TextRecognizer(object):
         padding_im[:, :, 0:resized_w] = resized_image
         return padding_im
 
+    def resize_norm_img_batch(
+        self, img_list, max_wh_ratio, img_w=None, reuse_buffer=False
+    ):
+        """
+        Batched resize_norm_img for CTC models. Every crop is resized and
+        normalized straight into one (N, C, H, W) float32 array, uint8 crops
+        are normalized with a single lookup table gather.
+        args:
+            reuse_buffer(bool): write into a buffer owned by the recognizer,
+                only safe when the batch is consumed before the next one is built
+        """
+        imgC, imgH, imgW = self.rec_image_shape
+        if img_w is not None:
+            imgW = img_w
+        else:
+            imgW = int((imgH * max_wh_ratio))
+        if self.use_onnx:
+            w = self.input_tensor.shape[3:][0]
+            if isinstance(w, str):
+                pass
+            elif w is not None and w > 0:
+                imgW = w
+        img_num = len(img_list)
+        size = img_num * imgC * imgH * imgW
+        if not reuse_buffer:
+            buffer = np.empty(size, dtype=np.float32)
+        else:
+            buffer = getattr(self.thread_local, "norm_img_buffer", None)
+            if buffer is None or buffer.size < size:
+                buffer = np.empty(size, dtype=np.float32)
+                self.thread_local.norm_img_buffer = buffer
+        norm_img_batch = buffer[:size].reshape((img_num, imgC, imgH, imgW))
+        for ino, img in enumerate(img_list):
+            assert imgC == img.shape[2]
+            h, w = img.shape[:2]
+            ratio = w / float(h)
+            if math.ceil(imgH * ratio) > imgW:
+                resized_w = imgW
+            else:
+                resized_w = int(math.ceil(imgH * ratio))
+            resized_image = cv2.resize(img, (resized_w, imgH))
+            if resized_image.dtype == np.uint8:
+                norm_img_batch[ino, :, :, :resized_w] = self.norm_lut[
+                    resized_image.transpose((2, 0, 1))
+                ]
+            else:
+                resized_image = resized_image.astype("float32")
+                resized_image = resized_image.transpose((2, 0, 1)) / 255
+                resized_image -= 0.5
+                resized_image /= 0.5
+                norm_img_batch[ino, :, :, :resized_w] = resized_image
+            norm_img_batch[ino, :, :, resized_w:] = 0
+        return norm_img_batch
+
     def resize_norm_img_vl(self, img, image_shape):
         imgC, imgH, imgW = image_shape
         img = img[:, :, ::-1]  # bgr2rgb
@@ -451,269 +535,444 @@ class TextRecognizer(object):
 
         return img
 
-    def __call__(self, img_list):
-        # print(f'HI bro, I am from call')
+    def preprocess_batch(
+        self,
+        img_list,
+        indices,
+        beg_img_no,
+        end_img_no,
+        pad_width=None,
+        reuse_buffer=False,
+    ):
+        """
+        Resize and normalize the crops img_list[indices[beg_img_no:end_img_no]]
+        args:
+            pad_width(int|None): fixed input width of the batch when width
+                buckets are used, otherwise the batch is padded to its widest crop
+            reuse_buffer(bool): see resize_norm_img_batch
+        return:
+            inputs(list): predictor inputs, inputs[0] is the image batch
+            wh_ratio_list(list): aspect ratio of every crop in the batch
+            max_wh_ratio(float): the aspect ratio the batch is padded to
+        """
+        norm_img_batch = []
+        if self.rec_algorithm == "SRN":
+            encoder_word_pos_list = []
+            gsrm_word_pos_list = []
+            gsrm_slf_attn_bias1_list = []
+            gsrm_slf_attn_bias2_list = []
+        if self.rec_algorithm == "SAR":
+            valid_ratios = []
+        imgC, imgH, imgW = self.rec_image_shape[:3]
+        max_wh_ratio = imgW / imgH
+        wh_ratio_list = []
+        for ino in range(beg_img_no, end_img_no):
+            h, w = img_list[indices[ino]].shape[0:2]
+            wh_ratio = w * 1.0 / h
+            max_wh_ratio = max(max_wh_ratio, wh_ratio)
+            wh_ratio_list.append(wh_ratio)
+        if pad_width is not None:
+            max_wh_ratio = pad_width / imgH
+        if self.rec_algorithm in ["CRNN", "SVTR_LCNet", "SVTR_HGNet"]:
+            norm_img_batch = self.resize_norm_img_batch(
+                [img_list[indices[ino]] for ino in range(beg_img_no, end_img_no)],
+                max_wh_ratio,
+                img_w=pad_width,
+                reuse_buffer=reuse_buffer,
+            )
+            return [norm_img_batch], wh_ratio_list, max_wh_ratio
+        for ino in range(beg_img_no, end_img_no):
+            if self.rec_algorithm == "SAR":
+                norm_img, _, _, valid_ratio = self.resize_norm_img_sar(
+                    img_list[indices[ino]], self.rec_image_shape
+                )
+                norm_img = norm_img[np.newaxis, :]
+                valid_ratio = np.expand_dims(valid_ratio, axis=0)
+                valid_ratios.append(valid_ratio)
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm == "SRN":
+                norm_img = self.process_image_srn(
+                    img_list[indices[ino]], self.rec_image_shape, 8, 25
+                )
+                encoder_word_pos_list.append(norm_img[1])
+                gsrm_word_pos_list.append(norm_img[2])
+                gsrm_slf_attn_bias1_list.append(norm_img[3])
+                gsrm_slf_attn_bias2_list.append(norm_img[4])
+                norm_img_batch.append(norm_img[0])
+            elif self.rec_algorithm in ["SVTR", "SATRN", "ParseQ", "CPPD"]:
+                norm_img = self.resize_norm_img_svtr(
+                    img_list[indices[ino]], self.rec_image_shape
+                )
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm in ["CPPDPadding"]:
+                norm_img = self.resize_norm_img_cppd_padding(
+                    img_list[indices[ino]], self.rec_image_shape
+                )
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm in ["VisionLAN", "PREN"]:
+                norm_img = self.resize_norm_img_vl(
+                    img_list[indices[ino]], self.rec_image_shape
+                )
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm == "SPIN":
+                norm_img = self.resize_norm_img_spin(img_list[indices[ino]])
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm == "ABINet":
+                norm_img = self.resize_norm_img_abinet(
+                    img_list[indices[ino]], self.rec_image_shape
+                )
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+            elif self.rec_algorithm == "RobustScanner":
+                norm_img, _, _, valid_ratio = self.resize_norm_img_sar(
+                    img_list[indices[ino]],
+                    self.rec_image_shape,
+                    width_downsample_ratio=0.25,
+                )
+                norm_img = norm_img[np.newaxis, :]
+                valid_ratio = np.expand_dims(valid_ratio, axis=0)
+                valid_ratios = []
+                valid_ratios.append(valid_ratio)
+                norm_img_batch.append(norm_img)
+                word_positions_list = []
+                word_positions = np.array(range(0, 40)).astype("int64")
+                word_positions = np.expand_dims(word_positions, axis=0)
+                word_positions_list.append(word_positions)
+            elif self.rec_algorithm == "CAN":
+                norm_img = self.norm_img_can(img_list[indices[ino]], max_wh_ratio)
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+                norm_image_mask = np.ones(norm_img.shape, dtype="float32")
+                word_label = np.ones([1, 36], dtype="int64")
+                norm_img_mask_batch = []
+                word_label_list = []
+                norm_img_mask_batch.append(norm_image_mask)
+                word_label_list.append(word_label)
+            else:
+                # print(f'I am from predict_rec {self.rec_algorithm}')
+                norm_img = self.resize_norm_img(
+                    img_list[indices[ino]], max_wh_ratio, img_w=pad_width
+                )
+                norm_img = norm_img[np.newaxis, :]
+                norm_img_batch.append(norm_img)
+        norm_img_batch = np.concatenate(norm_img_batch)
+        norm_img_batch = norm_img_batch.copy()
+
+        if self.rec_algorithm == "SRN":
+            encoder_word_pos_list = np.concatenate(encoder_word_pos_list)
+            gsrm_word_pos_list = np.concatenate(gsrm_word_pos_list)
+            gsrm_slf_attn_bias1_list = np.concatenate(gsrm_slf_attn_bias1_list)
+            gsrm_slf_attn_bias2_list = np.concatenate(gsrm_slf_attn_bias2_list)
+            inputs = [
+                norm_img_batch,
+                encoder_word_pos_list,
+                gsrm_word_pos_list,
+                gsrm_slf_attn_bias1_list,
+                gsrm_slf_attn_bias2_list,
+            ]
+        elif self.rec_algorithm == "SAR":
+            valid_ratios = np.concatenate(valid_ratios)
+            inputs = [
+                norm_img_batch,
+                np.array([valid_ratios], dtype=np.float32).T,
+            ]
+        elif self.rec_algorithm == "RobustScanner":
+            valid_ratios = np.concatenate(valid_ratios)
+            word_positions_list = np.concatenate(word_positions_list)
+            inputs = [norm_img_batch, valid_ratios, word_positions_list]
+        elif self.rec_algorithm == "CAN":
+            norm_img_mask_batch = np.concatenate(norm_img_mask_batch)
+            word_label_list = np.concatenate(word_label_list)
+            inputs = [norm_img_batch, norm_img_mask_batch, word_label_list]
+        else:
+            inputs = [norm_img_batch]
+        return inputs, wh_ratio_list, max_wh_ratio
+
+    def predict_batch(self, inputs):
+        """Run the predictor on the inputs built by preprocess_batch"""
+        norm_img_batch = inputs[0]
+        st = time.time()
+        preds = self._predict_batch(inputs)
+        # predict_batch runs on the pipeline threads and concurrent callers
+        with self.bucket_stats_lock:
+            stats = self.bucket_stats.setdefault(
+                norm_img_batch.shape[-1], {"batches": 0, "imgs": 0, "infer_time": 0.0}
+            )
+            stats["batches"] += 1
+            stats["imgs"] += norm_img_batch.shape[0]
+            stats["infer_time"] += time.time() - st
+        return preds
+
+    def _predict_batch(self, inputs):
+        with self.predictor_pool.acquire() as handle:
+            return self._run_predictor(handle, inputs)
+
+    def _run_predictor(self, handle, inputs):
+        predictor, input_tensor, output_tensors = handle
+        norm_img_batch = inputs[0]
+        if self.rec_algorithm in ["SRN", "SAR", "RobustScanner"]:
+            if self.use_onnx:
+                input_dict = {}
+                input_dict[input_tensor.name] = norm_img_batch
+                outputs = predictor.run(output_tensors, input_dict)
+            else:
+                input_names = predictor.get_input_names()
+                for i in range(len(input_names)):
+                    input_tensor = predictor.get_input_handle(input_names[i])
+                    input_tensor.copy_from_cpu(inputs[i])
+                predictor.run()
+                outputs = []
+                for output_tensor in output_tensors:
+                    output = output_tensor.copy_to_cpu()
+                    outputs.append(output)
+                if self.benchmark:
+                    self.autolog.times.stamp()
+            if self.rec_algorithm == "SRN":
+                preds = {"predict": outputs[2]}
+            else:
+                preds = outputs[0]
+        elif self.rec_algorithm == "CAN":
+            if self.use_onnx:
+                input_dict = {}
+                input_dict[input_tensor.name] = norm_img_batch
+                outputs = predictor.run(output_tensors, input_dict)
+                preds = outputs
+            else:
+                input_names = predictor.get_input_names()
+                for i in range(len(input_names)):
+                    input_tensor_i = predictor.get_input_handle(input_names[i])
+                    input_tensor_i.copy_from_cpu(inputs[i])
+                predictor.run()
+                outputs = []
+                for output_tensor in output_tensors:
+                    output = output_tensor.copy_to_cpu()
+                    outputs.append(output)
+                if self.benchmark:
+                    self.autolog.times.stamp()
+                preds = outputs
+        else:
+            # print(f'I am from predict_rec and algo passing from here {self.predictor}')
+            if self.use_onnx:
+                input_dict = {}
+                input_dict[input_tensor.name] = norm_img_batch
+                outputs = predictor.run(output_tensors, input_dict)
+                preds = outputs[0]
+            else:
+                input_tensor.copy_from_cpu(norm_img_batch)
+                # print(f'Before predictor running')
+                predictor.run()
+                # print(f'Predictor ran {self.output_tensors}')
+                outputs = []
+                for output_tensor in output_tensors:
+                    output = output_tensor.copy_to_cpu()
+                    outputs.append(output)
+                if self.benchmark:
+                    self.autolog.times.stamp()
+                if len(outputs) != 1:
+                    preds = outputs
+                else:
+                    preds = outputs[0]
+        return preds
+
+    def postprocess_batch(self, preds, wh_ratio_list, max_wh_ratio):
+        if self.postprocess_params["name"] == "CTCLabelDecode":
+            rec_result = self.postprocess_op(
+                preds,
+                return_word_box=self.return_word_box,
+                wh_ratio_list=wh_ratio_list,
+                max_wh_ratio=max_wh_ratio,
+            )
+        else:
+            rec_result = self.postprocess_op(preds)
+        return rec_result
+
+    def make_batches(self, img_list):
+        """
+        Plan the batches for img_list. Crops are sorted by aspect ratio; when
+        width buckets are set, every crop is snapped to the narrowest bucket
+        that holds it (wider crops are squeezed into the widest bucket) and
+        batches are filled per bucket, so the predictor only sees a few shapes.
+        return:
+            indices(array): processing order of img_list
+            batches(list): (beg_img_no, end_img_no, pad_width) over indices
+        """
         img_num = len(img_list)
+        batch_num = self.rec_batch_num
         # Calculate the aspect ratio of all text bars
         width_list = []
         for img in img_list:
             width_list.append(img.shape[1] / float(img.shape[0]))
         # Sorting can speed up the recognition process
         indices = np.argsort(np.array(width_list))
+        if not self.rec_width_buckets or self.rec_algorithm not in [
+            "CRNN",
+            "SVTR_LCNet",
+            "SVTR_HGNet",
+        ]:
+            batches = [
+                (beg_img_no, min(img_num, beg_img_no + batch_num), None)
+                for beg_img_no in range(0, img_num, batch_num)
+            ]
+            return indices, batches
+
+        imgH = self.rec_image_shape[1]
+        buckets = np.array(self.rec_width_buckets)
+        resized_w = np.ceil(imgH * np.array(width_list)[indices])
+        # crops are sorted by ratio, so each bucket is a contiguous run of indices
+        bucket_ids = np.minimum(
+            np.searchsorted(buckets, resized_w, side="left"), len(buckets) - 1
+        )
+        batches = []
+        bucket_beg = 0
+        for bucket_id, bucket_size in zip(*np.unique(bucket_ids, return_counts=True)):
+            bucket_end = bucket_beg + bucket_size
+            for beg_img_no in range(bucket_beg, bucket_end, batch_num):
+                end_img_no = min(bucket_end, beg_img_no + batch_num)
+                batches.append((beg_img_no, end_img_no, int(buckets[bucket_id])))
+            bucket_beg = bucket_end
+        return indices, batches
+
+    def get_bucket_stats(self):
+        """Return {input width: {batches, imgs, infer_time}} seen so far"""
+        with self.bucket_stats_lock:
+            return {w: dict(v) for w, v in sorted(self.bucket_stats.items())}
+
+    def run_pipeline(self, img_list, indices, batches, rec_res):
+        """
+        Overlap preprocessing, inference and postprocessing of consecutive
+        batches. Batches are preprocessed by a thread pool, the predictor and
+        the decoder each run on their own thread, and the stages are connected
+        by bounded queues so at most a few batches are buffered at a time.
+        """
+        infer_queue = queue.Queue(maxsize=2 * self.rec_pipeline_workers)
+        post_queue = queue.Queue(maxsize=2)
+        errors = []
+
+        def infer_worker():
+            while True:
+                item = infer_queue.get()
+                if item is None:
+                    break
+                if errors:
+                    continue
+                beg_img_no, future = item
+                try:
+                    inputs, wh_ratio_list, max_wh_ratio = future.result()
+                    preds = self.predict_batch(inputs)
+                except Exception as E:
+                    errors.append(E)
+                    continue
+                post_queue.put((beg_img_no, preds, wh_ratio_list, max_wh_ratio))
+            post_queue.put(None)
+
+        def post_worker():
+            while True:
+                item = post_queue.get()
+                if item is None:
+                    break
+                if errors:
+                    continue
+                beg_img_no, preds, wh_ratio_list, max_wh_ratio = item
+                try:
+                    rec_result = self.postprocess_batch(
+                        preds, wh_ratio_list, max_wh_ratio
+                    )
+                except Exception as E:
+                    errors.append(E)
+                    continue
+                for rno in range(len(rec_result)):
+                    rec_res[indices[beg_img_no + rno]] = rec_result[rno]
+
+        infer_thread = threading.Thread(target=infer_worker, daemon=True)
+        post_thread = threading.Thread(target=post_worker, daemon=True)
+        infer_thread.start()
+        post_thread.start()
+        with ThreadPoolExecutor(max_workers=self.rec_pipeline_workers) as executor:
+            for beg_img_no, end_img_no, pad_width in batches:
+                if errors:
+                    break
+                future = executor.submit(
+                    self.preprocess_batch,
+                    img_list,
+                    indices,
+                    beg_img_no,
+                    end_img_no,
+                    pad_width,
+                )
+                # blocks while the predictor is behind, bounding the buffered batches
+                infer_queue.put((beg_img_no, future))
+            infer_queue.put(None)
+            infer_thread.join()
+            post_thread.join()
+        if errors:
+            raise errors[0]
+
+    def __call__(self, img_list):
+        # print(f'HI bro, I am from call')
+        img_num = len(img_list)
         rec_res = [["", 0.0]] * img_num
-        batch_num = self.rec_batch_num
         st = time.time()
+        indices, batches = self.make_batches(img_list)
+        if self.rec_pipeline_workers > 0 and not self.benchmark and len(batches) > 1:
+            self.run_pipeline(img_list, indices, batches, rec_res)
+            elapsed = time.time() - st
+            logger.debug(f"Time elapsed from predict_rec = {elapsed:.2f}seconds")
+            return rec_res, time.time() - st
         if self.benchmark:
             self.autolog.times.start()
-        for beg_img_no in range(0, img_num, batch_num):
-            end_img_no = min(img_num, beg_img_no + batch_num)
-            norm_img_batch = []
-            if self.rec_algorithm == "SRN":
-                encoder_word_pos_list = []
-                gsrm_word_pos_list = []
-                gsrm_slf_attn_bias1_list = []
-                gsrm_slf_attn_bias2_list = []
-            if self.rec_algorithm == "SAR":
-                valid_ratios = []
-            imgC, imgH, imgW = self.rec_image_shape[:3]
-            max_wh_ratio = imgW / imgH
-            wh_ratio_list = []
-            for ino in range(beg_img_no, end_img_no):
-                h, w = img_list[indices[ino]].shape[0:2]
-                wh_ratio = w * 1.0 / h
-                max_wh_ratio = max(max_wh_ratio, wh_ratio)
-                wh_ratio_list.append(wh_ratio)
-            for ino in range(beg_img_no, end_img_no):
-                if self.rec_algorithm == "SAR":
-                    norm_img, _, _, valid_ratio = self.resize_norm_img_sar(
-                        img_list[indices[ino]], self.rec_image_shape
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    valid_ratio = np.expand_dims(valid_ratio, axis=0)
-                    valid_ratios.append(valid_ratio)
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm == "SRN":
-                    norm_img = self.process_image_srn(
-                        img_list[indices[ino]], self.rec_image_shape, 8, 25
-                    )
-                    encoder_word_pos_list.append(norm_img[1])
-                    gsrm_word_pos_list.append(norm_img[2])
-                    gsrm_slf_attn_bias1_list.append(norm_img[3])
-                    gsrm_slf_attn_bias2_list.append(norm_img[4])
-                    norm_img_batch.append(norm_img[0])
-                elif self.rec_algorithm in ["SVTR", "SATRN", "ParseQ", "CPPD"]:
-                    norm_img = self.resize_norm_img_svtr(
-                        img_list[indices[ino]], self.rec_image_shape
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm in ["CPPDPadding"]:
-                    norm_img = self.resize_norm_img_cppd_padding(
-                        img_list[indices[ino]], self.rec_image_shape
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm in ["VisionLAN", "PREN"]:
-                    norm_img = self.resize_norm_img_vl(
-                        img_list[indices[ino]], self.rec_image_shape
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm == "SPIN":
-                    norm_img = self.resize_norm_img_spin(img_list[indices[ino]])
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm == "ABINet":
-                    norm_img = self.resize_norm_img_abinet(
-                        img_list[indices[ino]], self.rec_image_shape
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                elif self.rec_algorithm == "RobustScanner":
-                    norm_img, _, _, valid_ratio = self.resize_norm_img_sar(
-                        img_list[indices[ino]],
-                        self.rec_image_shape,
-                        width_downsample_ratio=0.25,
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    valid_ratio = np.expand_dims(valid_ratio, axis=0)
-                    valid_ratios = []
-                    valid_ratios.append(valid_ratio)
-                    norm_img_batch.append(norm_img)
-                    word_positions_list = []
-                    word_positions = np.array(range(0, 40)).astype("int64")
-                    word_positions = np.expand_dims(word_positions, axis=0)
-                    word_positions_list.append(word_positions)
-                elif self.rec_algorithm == "CAN":
-                    norm_img = self.norm_img_can(img_list[indices[ino]], max_wh_ratio)
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-                    norm_image_mask = np.ones(norm_img.shape, dtype="float32")
-                    word_label = np.ones([1, 36], dtype="int64")
-                    norm_img_mask_batch = []
-                    word_label_list = []
-                    norm_img_mask_batch.append(norm_image_mask)
-                    word_label_list.append(word_label)
-                else:
-                    # print(f'I am from predict_rec {self.rec_algorithm}')
-                    norm_img = self.resize_norm_img(
-                        img_list[indices[ino]], max_wh_ratio
-                    )
-                    norm_img = norm_img[np.newaxis, :]
-                    norm_img_batch.append(norm_img)
-            norm_img_batch = np.concatenate(norm_img_batch)
-            norm_img_batch = norm_img_batch.copy()
+        for beg_img_no, end_img_no, pad_width in batches:
+            inputs, wh_ratio_list, max_wh_ratio = self.preprocess_batch(
+                img_list, indices, beg_img_no, end_img_no, pad_width, reuse_buffer=True
+            )
             if self.benchmark:
                 self.autolog.times.stamp()
-
-            if self.rec_algorithm == "SRN":
-                encoder_word_pos_list = np.concatenate(encoder_word_pos_list)
-                gsrm_word_pos_list = np.concatenate(gsrm_word_pos_list)
-                gsrm_slf_attn_bias1_list = np.concatenate(gsrm_slf_attn_bias1_list)
-                gsrm_slf_attn_bias2_list = np.concatenate(gsrm_slf_attn_bias2_list)
-
-                inputs = [
-                    norm_img_batch,
-                    encoder_word_pos_list,
-                    gsrm_word_pos_list,
-                    gsrm_slf_attn_bias1_list,
-                    gsrm_slf_attn_bias2_list,
-                ]
-                if self.use_onnx:
-                    input_dict = {}
-                    input_dict[self.input_tensor.name] = norm_img_batch
-                    outputs = self.predictor.run(self.output_tensors, input_dict)
-                    preds = {"predict": outputs[2]}
-                else:
-                    input_names = self.predictor.get_input_names()
-                    for i in range(len(input_names)):
-                        input_tensor = self.predictor.get_input_handle(input_names[i])
-                        input_tensor.copy_from_cpu(inputs[i])
-                    self.predictor.run()
-                    outputs = []
-                    for output_tensor in self.output_tensors:
-                        output = output_tensor.copy_to_cpu()
-                        outputs.append(output)
-                    if self.benchmark:
-                        self.autolog.times.stamp()
-                    preds = {"predict": outputs[2]}
-            elif self.rec_algorithm == "SAR":
-                valid_ratios = np.concatenate(valid_ratios)
-                inputs = [
-                    norm_img_batch,
-                    np.array([valid_ratios], dtype=np.float32).T,
-                ]
-                if self.use_onnx:
-                    input_dict = {}
-                    input_dict[self.input_tensor.name] = norm_img_batch
-                    outputs = self.predictor.run(self.output_tensors, input_dict)
-                    preds = outputs[0]
-                else:
-                    input_names = self.predictor.get_input_names()
-                    for i in range(len(input_names)):
-                        input_tensor = self.predictor.get_input_handle(input_names[i])
-                        input_tensor.copy_from_cpu(inputs[i])
-                    self.predictor.run()
-                    outputs = []
-                    for output_tensor in self.output_tensors:
-                        output = output_tensor.copy_to_cpu()
-                        outputs.append(output)
-                    if self.benchmark:
-                        self.autolog.times.stamp()
-                    preds = outputs[0]
-            elif self.rec_algorithm == "RobustScanner":
-                valid_ratios = np.concatenate(valid_ratios)
-                word_positions_list = np.concatenate(word_positions_list)
-                inputs = [norm_img_batch, valid_ratios, word_positions_list]
-
-                if self.use_onnx:
-                    input_dict = {}
-                    input_dict[self.input_tensor.name] = norm_img_batch
-                    outputs = self.predictor.run(self.output_tensors, input_dict)
-                    preds = outputs[0]
-                else:
-                    input_names = self.predictor.get_input_names()
-                    for i in range(len(input_names)):
-                        input_tensor = self.predictor.get_input_handle(input_names[i])
-                        input_tensor.copy_from_cpu(inputs[i])
-                    self.predictor.run()
-                    outputs = []
-                    for output_tensor in self.output_tensors:
-                        output = output_tensor.copy_to_cpu()
-                        outputs.append(output)
-                    if self.benchmark:
-                        self.autolog.times.stamp()
-                    preds = outputs[0]
-            elif self.rec_algorithm == "CAN":
-                norm_img_mask_batch = np.concatenate(norm_img_mask_batch)
-                word_label_list = np.concatenate(word_label_list)
-                inputs = [norm_img_batch, norm_img_mask_batch, word_label_list]
-                if self.use_onnx:
-                    input_dict = {}
-                    input_dict[self.input_tensor.name] = norm_img_batch
-                    outputs = self.predictor.run(self.output_tensors, input_dict)
-                    preds = outputs
-                else:
-                    input_names = self.predictor.get_input_names()
-                    input_tensor = []
-                    for i in range(len(input_names)):
-                        input_tensor_i = self.predictor.get_input_handle(input_names[i])
-                        input_tensor_i.copy_from_cpu(inputs[i])
-                        input_tensor.append(input_tensor_i)
-                    self.input_tensor = input_tensor
-                    self.predictor.run()
-                    outputs = []
-                    for output_tensor in self.output_tensors:
-                        output = output_tensor.copy_to_cpu()
-                        outputs.append(output)
-                    if self.benchmark:
-                        self.autolog.times.stamp()
-                    preds = outputs
-            else:
-                # print(f'I am from predict_rec and algo passing from here {self.predictor}')
-                if self.use_onnx:
-                    input_dict = {}
-                    input_dict[self.input_tensor.name] = norm_img_batch
-                    outputs = self.predictor.run(self.output_tensors, input_dict)
-                    preds = outputs[0]
-                else:
-                    self.input_tensor.copy_from_cpu(norm_img_batch)
-                    # print(f'Before predictor running')
-                    self.predictor.run()
-                    # print(f'Predictor ran {self.output_tensors}')
-                    outputs = []
-                    for output_tensor in self.output_tensors:
-                        output = output_tensor.copy_to_cpu()
-                        outputs.append(output)
-                    if self.benchmark:
-                        self.autolog.times.stamp()
-                    if len(outputs) != 1:
-                        preds = outputs
-                    else:
-                        preds = outputs[0]
-            if self.postprocess_params["name"] == "CTCLabelDecode":
-                rec_result = self.postprocess_op(
-                    preds,
-                    return_word_box=self.return_word_box,
-                    wh_ratio_list=wh_ratio_list,
-                    max_wh_ratio=max_wh_ratio,
-                )
-            else:
-                rec_result = self.postprocess_op(preds)
+            preds = self.predict_batch(inputs)
+            rec_result = self.postprocess_batch(preds, wh_ratio_list, max_wh_ratio)
             for rno in range(len(rec_result)):
                 rec_res[indices[beg_img_no + rno]] = rec_result[rno]
             if self.benchmark:
                 self.autolog.times.end(stamp=True)
         elapsed = time.time() - st
-        # logger.debug("rec_res num  : {}, elapsed : {}".format(len(rec_res), elapsed))
-        print(f'Time elapsed from predict_rec = {elapsed:.2f}seconds')
+        logger.debug(f"Time elapsed from predict_rec = {elapsed:.2f}seconds")
         return rec_res, time.time() - st
 
 
+def read_image_windows(image_file_list, window_size, logger=None):
+    """
+    Lazily read and decode images in fixed-size windows so that only one
+    window of decoded images is held in memory at a time.
+    args:
+        image_file_list(list): image paths
+        window_size(int): number of files read per window, <= 0 reads all files
+    return(generator):
+        (valid_image_file_list, img_list) for every window
+    """
+    if logger is None:
+        logger = get_logger()
+    if window_size <= 0:
+        window_size = max(len(image_file_list), 1)
+    for beg in range(0, len(image_file_list), window_size):
+        valid_image_file_list = []
+        img_list = []
+        for image_file in image_file_list[beg : beg + window_size]:
+            img, flag, _ = check_and_read(image_file)
+            if not flag:
+                img = cv2.imread(image_file)
+            if img is None:
+                logger.info("error in loading image:{}".format(image_file))
+                continue
+            valid_image_file_list.append(image_file)
+            img_list.append(img)
+        if len(img_list) > 0:
+            yield valid_image_file_list, img_list
+
+
 def main(args):
     image_file_list = get_image_file_list(args.image_dir)
-    valid_image_file_list = []
-    img_list = []
 
     # logger
     log_file = args.save_log_path
@@ -724,7 +983,8 @@ def main(args):
     logger = get_logger(log_file=log_file)
 
     # create text recognizer
-    text_recognizer = TextRecognizer(args)
+    with utility.startup_profile.phase("build rec model"):
+        text_recognizer = TextRecognizer(args)
 
     # logger.info(
     #     "In PP-OCRv3, rec_image_shape parameter defaults to '3, 48, 320', "
@@ -737,31 +997,50 @@ def main(args):
         for i in range(2):
             res = text_recognizer([img] * int(args.rec_batch_num))
 
-    for image_file in image_file_list:
-        img, flag, _ = check_and_read(image_file)
-        if not flag:
-            img = cv2.imread(image_file)
-        if img is None:
-            logger.info("error in loading image:{}".format(image_file))
-            continue
-        valid_image_file_list.append(image_file)
-        img_list.append(img)
-    try:
-        rec_res, _ = text_recognizer(img_list)
-
-    except Exception as E:
-        logger.info(traceback.format_exc())
-        logger.info(E)
-        exit()
-    with open('license_plates.txt', 'a') as f:
-        # print(f'IMage list len : {len(img_list)}\n')
-        for ino in range(len(img_list)):
-            # logger.info(
-            #     "Predicts of {}:{}".format(valid_image_file_list[ino], rec_res[ino])
-            # )
-            f.write(f'{valid_image_file_list[ino]}\t{rec_res[ino][0]}\n')
-        # f.write(f"{rec_res[ino][0]}\n")
-        # print(rec_res[ino])
+    # with rec_stream_window > 0 images are decoded, recognized and written
+    # window by window, so peak memory does not grow with the directory size
+    image_windows = read_image_windows(
+        image_file_list, args.rec_stream_window, logger=logger
+    )
+    # predictions go to rec_save_path + ".tmp" and the file is renamed once
+    # every image has been recognized
+    with PredictionSink(
+        args.rec_save_path,
+        fields=("image", "pred"),
+        format=args.rec_save_format,
+    ) as sink:
+        for window_idx, (valid_image_file_list, img_list) in enumerate(image_windows):
+            st = time.time()
+            try:
+                rec_res, _ = text_recognizer(img_list)
+
+            except Exception as E:
+                logger.info(traceback.format_exc())
+                logger.info(E)
+                exit()
+            if window_idx == 0:
+                utility.startup_profile.record("first window", st)
+            for ino in range(len(img_list)):
+                # logger.info(
+                #     "Predicts of {}:{}".format(valid_image_file_list[ino], rec_res[ino])
+                # )
+                sink.write(
+                    {
+                        "image": valid_image_file_list[ino],
+                        "pred": rec_res[ino][0],
+                        "conf": float(rec_res[ino][1]),
+                    }
+                )
+            sink.flush()
+    logger.info("{} predictions saved to {}".format(sink.num_records, sink.path))
+    for width, stats in text_recognizer.get_bucket_stats().items():
+        logger.info(
+            "rec input width {}: {} batches, {} images, inference {:.3f}s".format(
+                width, stats["batches"], stats["imgs"], stats["infer_time"]
+            )
+        )
+    if args.startup_profile:
+        utility.startup_profile.log(logger)
     if args.benchmark:
         text_recognizer.autolog.report()
 
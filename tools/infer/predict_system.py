@@ -13,7 +13,6 @@
 # limitations under the License.
 import os
 import sys
-import subprocess
 
 __dir__ = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(__dir__)
@@ -27,6 +26,7 @@ import numpy as np
 import json
 import time
 import logging
+import threading
 from PIL import Image
 import tools.infer.utility as utility
 import tools.infer.predict_rec as predict_rec
@@ -34,12 +34,16 @@ import tools.infer.predict_det as predict_det
 import tools.infer.predict_cls as predict_cls
 from ppocr.utils.utility import get_image_file_list, check_and_read
 from ppocr.utils.logging import get_logger
+from ppocr.utils.result_cache import build_result_cache
 from tools.infer.utility import (
     draw_ocr_box_txt,
-    get_rotate_crop_image,
+    get_rotate_crop_images,
     get_minarea_rect_crop,
     slice_generator,
     merge_fragmented,
+    nms_boxes,
+    is_plate_shaped,
+    split_plate_rows,
 )
 
 logger = get_logger()
@@ -50,15 +54,71 @@ class TextSystem(object):
         if not args.show_log:
             logger.setLevel(logging.INFO)
 
-        self.text_detector = predict_det.TextDetector(args)
-        self.text_recognizer = predict_rec.TextRecognizer(args)
         self.use_angle_cls = args.use_angle_cls
         self.drop_score = args.drop_score
-        if self.use_angle_cls:
-            self.text_classifier = predict_cls.TextClassifier(args)
 
         self.args = args
         self.crop_image_res_index = 0
+        # off, auto or on, plate crops go straight to recognition
+        self.crop_mode = getattr(args, "crop_mode", "off")
+        self.crop_max_side = getattr(args, "crop_max_side", 480)
+        # CTC recognizers resize every crop to their input height, the crops
+        # are cut at that height directly unless they are saved as images
+        self.rec_crop_height = None
+        if (
+            args.rec_algorithm in ["CRNN", "SVTR_LCNet", "SVTR_HGNet"]
+            and not args.save_crop_res
+        ):
+            self.rec_crop_height = int(args.rec_image_shape.split(",")[1])
+        # results of repeated images, keyed by their pixels and the config
+        self.result_cache = build_result_cache(args)
+        # det, rec and cls engines, built on first use with lazy_init
+        self.engines = {}
+        self.engine_lock = threading.Lock()
+        if not getattr(args, "lazy_init", True):
+            self.load_models()
+
+    def get_engine(self, name):
+        engine = self.engines.get(name)
+        if engine is None:
+            with self.engine_lock:
+                engine = self.engines.get(name)
+                if engine is None:
+                    engine_class = {
+                        "det": predict_det.TextDetector,
+                        "rec": predict_rec.TextRecognizer,
+                        "cls": predict_cls.TextClassifier,
+                    }[name]
+                    with utility.startup_profile.phase("build {} model".format(name)):
+                        engine = engine_class(self.args)
+                    self.engines[name] = engine
+        return engine
+
+    @property
+    def text_detector(self):
+        return self.get_engine("det")
+
+    @property
+    def text_recognizer(self):
+        return self.get_engine("rec")
+
+    @property
+    def text_classifier(self):
+        return self.get_engine("cls")
+
+    def load_models(self):
+        """Build every predictor now instead of on first use"""
+        self.get_engine("det")
+        self.get_engine("rec")
+        if self.use_angle_cls:
+            self.get_engine("cls")
+
+    def predictor_pool_utilization(self):
+        """PredictorPool statistics of the models built so far"""
+        return {
+            name: engine.predictor_pool.utilization()
+            for name, engine in self.engines.items()
+        }
 
     def draw_crop_rec_res(self, output_dir, img_crop_list, rec_res):
         os.makedirs(output_dir, exist_ok=True)
@@ -73,38 +133,215 @@ class TextSystem(object):
             logger.debug(f"{bno}, {rec_res[bno]}")
         self.crop_image_res_index += bbox_num
 
-    def __call__(self, img, cls=True, slice={}):
+    def crop_text_boxes(self, img, dt_boxes):
+        """Cut the sorted dt_boxes out of img for the classifier and recognizer"""
+        if self.args.det_box_type == "quad":
+            return get_rotate_crop_images(img, dt_boxes, self.rec_crop_height)
+        return [get_minarea_rect_crop(img, copy.deepcopy(box)) for box in dt_boxes]
+
+    def is_plate_crop(self, img):
+        return is_plate_shaped(img, self.crop_max_side)
+
+    def recognize_crops(self, imgs, cls=True):
+        """
+        Recognize already cropped plates without running the detector. Two
+        row plates are split by split_plate_rows, then the rows of all imgs
+        are classified and recognized as one batch.
+        return [(boxes, rec_res)] per image and the time_dict
+        """
         time_dict = {"det": 0, "rec": 0, "cls": 0, "all": 0}
+        if len(imgs) == 0:
+            return [], time_dict
+        start = time.time()
+        img_crop_list, crop_boxes, crop_owners = [], [], []
+        for img_idx, img in enumerate(imgs):
+            h, w = img.shape[:2]
+            for y_start, y_end in split_plate_rows(img):
+                img_crop_list.append(img[y_start:y_end])
+                crop_boxes.append(
+                    np.array(
+                        [[0, y_start], [w, y_start], [w, y_end], [0, y_end]],
+                        dtype=np.float32,
+                    )
+                )
+                crop_owners.append(img_idx)
+        time_dict["det"] = time.time() - start
 
-        if img is None:
-            logger.debug("no valid image provided")
-            return None, None, time_dict
+        if self.use_angle_cls and cls:
+            img_crop_list, angle_list, elapse = self.text_classifier(img_crop_list)
+            time_dict["cls"] = elapse
+        rec_res, elapse = self.text_recognizer(img_crop_list)
+        time_dict["rec"] = elapse
+        logger.debug("rec_res num  : {}, elapsed : {}".format(len(rec_res), elapse))
+        if self.args.save_crop_res:
+            self.draw_crop_rec_res(self.args.crop_res_save_dir, img_crop_list, rec_res)
 
+        results = [([], []) for _ in imgs]
+        for box, rec_result, img_idx in zip(crop_boxes, rec_res, crop_owners):
+            if rec_result[1] >= self.drop_score:
+                results[img_idx][0].append(box)
+                results[img_idx][1].append(rec_result)
+        time_dict["all"] = time.time() - start
+        return results, time_dict
+
+    def predict_frames(self, imgs, cls=True, crop=None):
+        """
+        Detect the text of all frames with TextDetector.predict_batch, then
+        classify and recognize the crops of all frames as one batch. Plate
+        crops are recognized directly, crop follows __call__. With a result
+        cache only the frames missing from it are processed.
+        return [(boxes, rec_res)] per frame and the time_dict
+        """
+        if self.result_cache is None:
+            return self._predict_frames(imgs, cls, crop)
         start = time.time()
-        ori_im = img.copy()
-        if slice:
-            slice_gen = slice_generator(
+        keys = [
+            self.result_cache.key(img, frame=True, cls=cls, crop=crop) for img in imgs
+        ]
+        results = [self.result_cache.get(key) for key in keys]
+        miss_indices = [idx for idx, res in enumerate(results) if res is None]
+        time_dict = {"det": 0, "rec": 0, "cls": 0, "all": 0}
+        if miss_indices:
+            miss_results, time_dict = self._predict_frames(
+                [imgs[idx] for idx in miss_indices], cls, crop
+            )
+            for idx, res in zip(miss_indices, miss_results):
+                self.result_cache.put(keys[idx], res)
+                results[idx] = res
+        time_dict["all"] = time.time() - start
+        return results, time_dict
+
+    def _predict_frames(self, imgs, cls=True, crop=None):
+        time_dict = {"det": 0, "rec": 0, "cls": 0, "all": 0}
+        start = time.time()
+        results = [([], []) for _ in imgs]
+        if crop is None:
+            crop_flags = [
+                self.crop_mode == "on"
+                or (self.crop_mode == "auto" and self.is_plate_crop(img))
+                for img in imgs
+            ]
+        else:
+            crop_flags = [crop] * len(imgs)
+        plate_indices = [idx for idx, flag in enumerate(crop_flags) if flag]
+        frame_indices = [idx for idx, flag in enumerate(crop_flags) if not flag]
+
+        if plate_indices:
+            plate_results, plate_time = self.recognize_crops(
+                [imgs[idx] for idx in plate_indices], cls
+            )
+            for idx, res in zip(plate_indices, plate_results):
+                results[idx] = res
+            for key in ["det", "cls", "rec"]:
+                time_dict[key] += plate_time[key]
+
+        img_crop_list, crop_boxes, crop_owners = [], [], []
+        # crop only batches never touch, and so never build, the detector
+        if frame_indices:
+            dt_boxes_list, elapse = self.text_detector.predict_batch(
+                [imgs[idx] for idx in frame_indices]
+            )
+            time_dict["det"] += elapse
+            for idx, dt_boxes in zip(frame_indices, dt_boxes_list):
+                if dt_boxes is None:
+                    continue
+                dt_boxes = sorted_boxes(dt_boxes)
+                img_crop_list.extend(self.crop_text_boxes(imgs[idx], dt_boxes))
+                crop_boxes.extend(dt_boxes)
+                crop_owners.extend([idx] * len(dt_boxes))
+
+        if img_crop_list:
+            if self.use_angle_cls and cls:
+                img_crop_list, angle_list, elapse = self.text_classifier(img_crop_list)
+                time_dict["cls"] += elapse
+            rec_res, elapse = self.text_recognizer(img_crop_list)
+            time_dict["rec"] += elapse
+            if self.args.save_crop_res:
+                self.draw_crop_rec_res(
+                    self.args.crop_res_save_dir, img_crop_list, rec_res
+                )
+            for box, rec_result, idx in zip(crop_boxes, rec_res, crop_owners):
+                if rec_result[1] >= self.drop_score:
+                    results[idx][0].append(box)
+                    results[idx][1].append(rec_result)
+        time_dict["all"] = time.time() - start
+        return results, time_dict
+
+    def detect_slices(self, img, slice):
+        """
+        Detect text in the slices of a large image. All slices go through
+        TextDetector.predict_batch, so they share predictor calls and their
+        maps are postprocessed by the det_postprocess_workers threads. With
+        slice["overlap"] the slices overlap by that many pixels and the boxes
+        found twice are dropped by nms_boxes, slice["nms_thres"] being the
+        overlap ratio of the smaller box above which one of them is dropped.
+        The remaining fragments are stitched by merge_fragmented.
+        """
+        overlap = slice.get("overlap", 0)
+        slices = list(
+            slice_generator(
                 img,
                 horizontal_stride=slice["horizontal_stride"],
                 vertical_stride=slice["vertical_stride"],
+                overlap=overlap,
             )
-            elapsed = []
-            dt_slice_boxes = []
-            for slice_crop, v_start, h_start in slice_gen:
-                dt_boxes, elapse = self.text_detector(slice_crop)
-                if dt_boxes.size:
-                    dt_boxes[:, :, 0] += h_start
-                    dt_boxes[:, :, 1] += v_start
-                    dt_slice_boxes.append(dt_boxes)
-                    elapsed.append(elapse)
-            dt_boxes = np.concatenate(dt_slice_boxes)
-
-            dt_boxes = merge_fragmented(
-                boxes=dt_boxes,
-                x_threshold=slice["merge_x_thres"],
-                y_threshold=slice["merge_y_thres"],
+        )
+        dt_boxes_list, elapse = self.text_detector.predict_batch(
+            [slice_crop for slice_crop, _, _ in slices]
+        )
+        dt_slice_boxes = []
+        for dt_boxes, (_, v_start, h_start) in zip(dt_boxes_list, slices):
+            if dt_boxes is not None and len(dt_boxes):
+                dt_boxes = np.array(dt_boxes)
+                dt_boxes[:, :, 0] += h_start
+                dt_boxes[:, :, 1] += v_start
+                dt_slice_boxes.append(dt_boxes)
+        if not dt_slice_boxes:
+            return np.zeros((0, 4, 2), dtype=np.float32), elapse
+        dt_boxes = np.concatenate(dt_slice_boxes)
+        if overlap > 0:
+            dt_boxes = dt_boxes[nms_boxes(dt_boxes, slice.get("nms_thres", 0.5))]
+
+        dt_boxes = merge_fragmented(
+            boxes=dt_boxes,
+            x_threshold=slice["merge_x_thres"],
+            y_threshold=slice["merge_y_thres"],
+        )
+        return dt_boxes, elapse
+
+    def __call__(self, img, cls=True, slice={}, crop=None):
+        if self.result_cache is None or img is None:
+            return self._ocr_image(img, cls, slice, crop)
+        start = time.time()
+        key = self.result_cache.key(img, cls=cls, slice=slice, crop=crop)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            time_dict = {"det": 0, "rec": 0, "cls": 0, "all": time.time() - start}
+            return cached[0], cached[1], time_dict
+        filter_boxes, filter_rec_res, time_dict = self._ocr_image(img, cls, slice, crop)
+        self.result_cache.put(key, (filter_boxes, filter_rec_res))
+        return filter_boxes, filter_rec_res, time_dict
+
+    def _ocr_image(self, img, cls, slice, crop):
+        time_dict = {"det": 0, "rec": 0, "cls": 0, "all": 0}
+
+        if img is None:
+            logger.debug("no valid image provided")
+            return None, None, time_dict
+
+        if crop is None:
+            crop = self.crop_mode == "on" or (
+                self.crop_mode == "auto" and not slice and self.is_plate_crop(img)
             )
-            elapse = sum(elapsed)
+        if crop:
+            results, time_dict = self.recognize_crops([img], cls)
+            filter_boxes, filter_rec_res = results[0]
+            return filter_boxes, filter_rec_res, time_dict
+
+        start = time.time()
+        ori_im = img.copy()
+        if slice:
+            dt_boxes, elapse = self.detect_slices(img, slice)
         else:
             dt_boxes, elapse = self.text_detector(img)
 
@@ -119,17 +356,8 @@ class TextSystem(object):
             logger.debug(
                 "dt_boxes num : {}, elapsed : {}".format(len(dt_boxes), elapse)
             )
-        img_crop_list = []
-
         dt_boxes = sorted_boxes(dt_boxes)
-
-        for bno in range(len(dt_boxes)):
-            tmp_box = copy.deepcopy(dt_boxes[bno])
-            if self.args.det_box_type == "quad":
-                img_crop = get_rotate_crop_image(ori_im, tmp_box)
-            else:
-                img_crop = get_minarea_rect_crop(ori_im, tmp_box)
-            img_crop_list.append(img_crop)
+        img_crop_list = self.crop_text_boxes(ori_im, dt_boxes)
         if self.use_angle_cls and cls:
             img_crop_list, angle_list, elapse = self.text_classifier(img_crop_list)
             time_dict["cls"] = elapse
@@ -165,31 +393,142 @@ def sorted_boxes(dt_boxes):
     return:
         sorted boxes(array) with shape [4, 2]
     """
-    num_boxes = dt_boxes.shape[0]
-    sorted_boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
-    _boxes = list(sorted_boxes)
+    num_boxes = len(dt_boxes)
+    if num_boxes == 0:
+        return []
+    if isinstance(dt_boxes, np.ndarray) and dt_boxes.ndim == 3:
+        first = dt_boxes[:, 0]
+    else:
+        first = np.array([box[0] for box in dt_boxes])
+    x, y = first[:, 0], first[:, 1]
+    order = np.lexsort((x, y))
+    # boxes closer than 10px in y than their predecessor share a row band
+    band = np.concatenate([[0], np.cumsum(np.diff(y[order]) >= 10)])
+    starts = np.flatnonzero(np.diff(band, prepend=-1))
+    ends = np.append(starts[1:], num_boxes) - 1
+    if np.all(y[order[ends]] - y[order[starts]] < 10):
+        # every pair in a band is within 10px and every pair across bands is
+        # not, so the neighbour swaps below reduce to a stable sort by x
+        order = order[np.lexsort((x[order], band))]
+    else:
+        order = _swap_sorted_order(order.tolist(), x.tolist(), y.tolist())
+    return [dt_boxes[index] for index in order]
+
 
-    for i in range(num_boxes - 1):
+def _swap_sorted_order(order, x, y):
+    # neighbour swaps of a (y, x) sorted order, for bands higher than 10px
+    for i in range(len(order) - 1):
         for j in range(i, -1, -1):
-            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
-                _boxes[j + 1][0][0] < _boxes[j][0][0]
-            ):
-                tmp = _boxes[j]
-                _boxes[j] = _boxes[j + 1]
-                _boxes[j + 1] = tmp
+            cur, nxt = order[j], order[j + 1]
+            if abs(y[nxt] - y[cur]) < 10 and x[nxt] < x[cur]:
+                order[j], order[j + 1] = nxt, cur
             else:
                 break
-    return _boxes
+    return order
 
 
-def main(args):
-    image_file_list = get_image_file_list(args.image_dir)
-    image_file_list = image_file_list[args.process_id :: args.total_process_num]
-    text_sys = TextSystem(args)
-    is_visualize = True
+def predict_image_file(text_sys, image_file):
+    """
+    Run text_sys on every page of image_file, save the visualized results
+    and return the result lines for system_results.txt and the predict time.
+    """
+    args = text_sys.args
     font_path = args.vis_font_path
     drop_score = args.drop_score
     draw_img_save_dir = args.draw_img_save_dir
+    is_visualize = True
+    save_results = []
+    total_time = 0
+
+    img, flag_gif, flag_pdf = check_and_read(image_file)
+    if not flag_gif and not flag_pdf:
+        img = cv2.imread(image_file)
+    if not flag_pdf:
+        if img is None:
+            logger.debug("error in loading image:{}".format(image_file))
+            return save_results, total_time
+        imgs = [img]
+    else:
+        page_num = args.page_num
+        if page_num > len(img) or page_num == 0:
+            page_num = len(img)
+        imgs = img[:page_num]
+    for index, img in enumerate(imgs):
+        starttime = time.time()
+        dt_boxes, rec_res, time_dict = text_sys(img)
+        elapse = time.time() - starttime
+        total_time += elapse
+        if len(imgs) > 1:
+            logger.debug(
+                str(index) + "  Predict time of %s: %.3fs" % (image_file, elapse)
+            )
+        else:
+            logger.debug("Predict time of %s: %.3fs" % (image_file, elapse))
+        for text, score in rec_res:
+            logger.debug("{}, {:.3f}".format(text, score))
+
+        res = [
+            {
+                "transcription": rec_res[i][0],
+                "points": np.array(dt_boxes[i]).astype(np.int32).tolist(),
+            }
+            for i in range(len(dt_boxes))
+        ]
+        if len(imgs) > 1:
+            save_pred = (
+                os.path.basename(image_file)
+                + "_"
+                + str(index)
+                + "\t"
+                + json.dumps(res, ensure_ascii=False)
+                + "\n"
+            )
+        else:
+            save_pred = (
+                os.path.basename(image_file)
+                + "\t"
+                + json.dumps(res, ensure_ascii=False)
+                + "\n"
+            )
+        save_results.append(save_pred)
+
+        if is_visualize:
+            image = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            boxes = dt_boxes
+            txts = [rec_res[i][0] for i in range(len(rec_res))]
+            scores = [rec_res[i][1] for i in range(len(rec_res))]
+
+            draw_img = draw_ocr_box_txt(
+                image,
+                boxes,
+                txts,
+                scores,
+                drop_score=drop_score,
+                font_path=font_path,
+            )
+            if flag_gif:
+                save_file = image_file[:-3] + "png"
+            elif flag_pdf:
+                save_file = image_file.replace(".pdf", "_" + str(index) + ".png")
+            else:
+                save_file = image_file
+            cv2.imwrite(
+                os.path.join(draw_img_save_dir, os.path.basename(save_file)),
+                draw_img[:, :, ::-1],
+            )
+            logger.debug(
+                "The visualized image saved in {}".format(
+                    os.path.join(draw_img_save_dir, os.path.basename(save_file))
+                )
+            )
+    return save_results, total_time
+
+
+def main(args):
+    image_file_list = get_image_file_list(args.image_dir)
+    if not args.use_mp:
+        image_file_list = image_file_list[args.process_id :: args.total_process_num]
+    draw_img_save_dir = args.draw_img_save_dir
     os.makedirs(draw_img_save_dir, exist_ok=True)
     save_results = []
 
@@ -198,106 +537,43 @@ def main(args):
         "if you are using recognition model with PP-OCRv2 or an older version, please set --rec_image_shape='3,32,320"
     )
 
-    # warm up 10 times
-    if args.warmup:
-        img = np.random.uniform(0, 255, [640, 640, 3]).astype(np.uint8)
-        for i in range(10):
-            res = text_sys(img)
-
     total_time = 0
-    cpu_mem, gpu_mem, gpu_util = 0, 0, 0
     _st = time.time()
-    count = 0
-    for idx, image_file in enumerate(image_file_list):
-        img, flag_gif, flag_pdf = check_and_read(image_file)
-        if not flag_gif and not flag_pdf:
-            img = cv2.imread(image_file)
-        if not flag_pdf:
-            if img is None:
-                logger.debug("error in loading image:{}".format(image_file))
-                continue
-            imgs = [img]
-        else:
-            page_num = args.page_num
-            if page_num > len(img) or page_num == 0:
-                page_num = len(img)
-            imgs = img[:page_num]
-        for index, img in enumerate(imgs):
-            starttime = time.time()
-            dt_boxes, rec_res, time_dict = text_sys(img)
-            elapse = time.time() - starttime
+    if args.use_mp:
+        # every worker loads the models once, warms them up with --warmup and
+        # pulls the next image file from a shared queue, results come back in
+        # input order
+        from tools.infer.worker_pool import InferWorkerPool
+
+        with InferWorkerPool(args, engine="system") as pool:
+            for save_pred, elapse in pool.imap(
+                image_file_list, func=predict_image_file
+            ):
+                save_results.extend(save_pred)
+                total_time += elapse
+    else:
+        text_sys = TextSystem(args)
+
+        # warm up 10 times
+        if args.warmup:
+            img = np.random.uniform(0, 255, [640, 640, 3]).astype(np.uint8)
+            for i in range(10):
+                res = text_sys(img)
+
+        for idx, image_file in enumerate(image_file_list):
+            st = time.time()
+            save_pred, elapse = predict_image_file(text_sys, image_file)
+            if idx == 0:
+                utility.startup_profile.record("first image", st)
+            save_results.extend(save_pred)
             total_time += elapse
-            if len(imgs) > 1:
-                logger.debug(
-                    str(idx)
-                    + "_"
-                    + str(index)
-                    + "  Predict time of %s: %.3fs" % (image_file, elapse)
-                )
-            else:
-                logger.debug(
-                    str(idx) + "  Predict time of %s: %.3fs" % (image_file, elapse)
-                )
-            for text, score in rec_res:
-                logger.debug("{}, {:.3f}".format(text, score))
-
-            res = [
-                {
-                    "transcription": rec_res[i][0],
-                    "points": np.array(dt_boxes[i]).astype(np.int32).tolist(),
-                }
-                for i in range(len(dt_boxes))
-            ]
-            if len(imgs) > 1:
-                save_pred = (
-                    os.path.basename(image_file)
-                    + "_"
-                    + str(index)
-                    + "\t"
-                    + json.dumps(res, ensure_ascii=False)
-                    + "\n"
-                )
-            else:
-                save_pred = (
-                    os.path.basename(image_file)
-                    + "\t"
-                    + json.dumps(res, ensure_ascii=False)
-                    + "\n"
-                )
-            save_results.append(save_pred)
-
-            if is_visualize:
-                image = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-                boxes = dt_boxes
-                txts = [rec_res[i][0] for i in range(len(rec_res))]
-                scores = [rec_res[i][1] for i in range(len(rec_res))]
-
-                draw_img = draw_ocr_box_txt(
-                    image,
-                    boxes,
-                    txts,
-                    scores,
-                    drop_score=drop_score,
-                    font_path=font_path,
-                )
-                if flag_gif:
-                    save_file = image_file[:-3] + "png"
-                elif flag_pdf:
-                    save_file = image_file.replace(".pdf", "_" + str(index) + ".png")
-                else:
-                    save_file = image_file
-                cv2.imwrite(
-                    os.path.join(draw_img_save_dir, os.path.basename(save_file)),
-                    draw_img[:, :, ::-1],
-                )
-                logger.debug(
-                    "The visualized image saved in {}".format(
-                        os.path.join(draw_img_save_dir, os.path.basename(save_file))
-                    )
-                )
 
     logger.info("The predict total time is {}".format(time.time() - _st))
-    if args.benchmark:
+    if args.startup_profile and not args.use_mp:
+        utility.startup_profile.log(logger)
+    if not args.use_mp and text_sys.result_cache is not None:
+        logger.info("result cache: {}".format(text_sys.result_cache.stats()))
+    if args.benchmark and not args.use_mp:
         text_sys.text_detector.autolog.report()
         text_sys.text_recognizer.autolog.report()
 
@@ -309,18 +585,4 @@ def main(args):
 
 if __name__ == "__main__":
     args = utility.parse_args()
-    if args.use_mp:
-        p_list = []
-        total_process_num = args.total_process_num
-        for process_id in range(total_process_num):
-            cmd = (
-                [sys.executable, "-u"]
-                + sys.argv
-                + ["--process_id={}".format(process_id), "--use_mp={}".format(False)]
-            )
-            p = subprocess.Popen(cmd, stdout=sys.stdout, stderr=sys.stdout)
-            p_list.append(p)
-        for p in p_list:
-            p.wait()
-    else:
-        main(args)
+    main(args)
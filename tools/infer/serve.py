@@ -0,0 +1,507 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A small asyncio HTTP server for TextSystem. Concurrent requests are queued
+and coalesced into micro-batches that TextSystem.predict_frames detects and
+recognizes together, on a pool of TextSystem workers.
+
+    python -m tools.infer.serve --det_model_dir=... --rec_model_dir=... \
+        --serve_port=8868 --serve_max_wait_ms=5 --serve_workers=2
+
+POST /predict/ocr_system takes {"images": [base64, ...]} like hubserving or a
+multipart/form-data upload, GET /metrics returns the queue depth, batch sizes
+and latency histograms, GET /health answers when the server is up.
+"""
+
+import os
+import sys
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(__dir__)
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from email import policy
+
+import cv2
+import numpy as np
+
+import tools.infer.utility as utility
+from tools.infer.utility import base64_to_cv2
+from ppocr.utils.logging import get_logger
+
+logger = get_logger()
+
+__all__ = ["LatencyHistogram", "MicroBatcher", "OCRServer"]
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Too Large",
+    500: "Internal Server Error",
+}
+
+
+class LatencyHistogram(object):
+    """Counts of observed latencies per bucket, bounds in milliseconds."""
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, bounds_ms=BOUNDS_MS):
+        self.bounds_ms = list(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        index = len(self.bounds_ms)
+        for i, bound in enumerate(self.bounds_ms):
+            if ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation
+        if self.count == 0:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds_ms + [float("inf")], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self):
+        labels = ["<={}".format(bound) for bound in self.bounds_ms] + ["+Inf"]
+        return {
+            "buckets_ms": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class _PendingRequest(object):
+    def __init__(self, imgs, future):
+        self.imgs = imgs
+        self.future = future
+        self.enqueued = time.time()
+
+
+class MicroBatcher(object):
+    """
+    Coalesce the images of concurrent requests into micro-batches. A batch
+    is started as soon as a worker is idle and a request is queued, and
+    collects further requests until it holds max_batch_size images or
+    max_wait seconds passed. A batch never holds more than max_batch_size
+    images, larger requests are split over several batches. Each worker runs one batch at a time on its own
+    thread, so while all workers are busy the queue grows into larger
+    batches.
+    args:
+        workers(list): objects with predict_frames(imgs), e.g. TextSystem,
+            one per concurrent batch
+        max_batch_size(int): images per micro-batch
+        max_wait(float): seconds a batch waits for more requests
+    """
+
+    def __init__(self, workers, max_batch_size=16, max_wait=0.005):
+        assert len(workers) > 0, "at least one worker is required"
+        self.workers = workers
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+        self.executor = ThreadPoolExecutor(max_workers=len(workers))
+        self.queue = None
+        # a request taken from the queue that did not fit the last batch
+        self.carry = None
+        self.idle = None
+        self.task = None
+        self.pending_images = 0
+        self.running_batches = 0
+        self.num_requests = 0
+        self.num_images = 0
+        self.num_batches = 0
+        self.batch_sizes = {}
+        self.request_latency = LatencyHistogram()
+        self.queue_latency = LatencyHistogram()
+        self.infer_latency = LatencyHistogram()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.idle = asyncio.Queue()
+        for worker in self.workers:
+            self.idle.put_nowait(worker)
+        self.task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, imgs):
+        """Queue imgs and wait for their [(boxes, rec_res)]"""
+        loop = asyncio.get_running_loop()
+        enqueued = time.time()
+        # requests larger than a micro-batch are queued in several parts
+        requests = []
+        for beg in range(0, max(len(imgs), 1), self.max_batch_size):
+            request = _PendingRequest(
+                imgs[beg : beg + self.max_batch_size], loop.create_future()
+            )
+            self.pending_images += len(request.imgs)
+            self.queue.put_nowait(request)
+            requests.append(request)
+        try:
+            results = await asyncio.gather(
+                *[request.future for request in requests], return_exceptions=True
+            )
+        finally:
+            self.request_latency.observe(time.time() - enqueued)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        self.num_requests += 1
+        return [res for part in results for res in part]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            worker = await self.idle.get()
+            if self.carry is not None:
+                batch, self.carry = [self.carry], None
+            else:
+                batch = [await self.queue.get()]
+            num_images = len(batch[0].imgs)
+            deadline = loop.time() + self.max_wait
+            while num_images < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if not self.queue.empty():
+                    request = self.queue.get_nowait()
+                elif timeout <= 0:
+                    break
+                else:
+                    try:
+                        request = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if num_images + len(request.imgs) > self.max_batch_size:
+                    # the request starts the next batch instead
+                    self.carry = request
+                    break
+                batch.append(request)
+                num_images += len(request.imgs)
+            self.pending_images -= num_images
+            asyncio.ensure_future(self._infer(worker, batch))
+
+    async def _infer(self, worker, batch):
+        loop = asyncio.get_running_loop()
+        imgs = [img for request in batch for img in request.imgs]
+        start = time.time()
+        for request in batch:
+            self.queue_latency.observe(start - request.enqueued)
+        self.running_batches += 1
+        try:
+            results, _ = await loop.run_in_executor(
+                self.executor, worker.predict_frames, imgs
+            )
+        except Exception as e:
+            logger.error("micro-batch of {} images failed: {}".format(len(imgs), e))
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self.running_batches -= 1
+            self.idle.put_nowait(worker)
+        self.infer_latency.observe(time.time() - start)
+        self.num_images += len(imgs)
+        self.num_batches += 1
+        self.batch_sizes[len(imgs)] = self.batch_sizes.get(len(imgs), 0) + 1
+        beg = 0
+        for request in batch:
+            end = beg + len(request.imgs)
+            if not request.future.done():
+                request.future.set_result(results[beg:end])
+            beg = end
+
+    def metrics(self):
+        # workers may share one TextSystem running on pooled predictors
+        systems = list({id(worker): worker for worker in self.workers}.values())
+        return {
+            "queue_depth": {
+                "requests": self.queue.qsize() if self.queue is not None else 0,
+                "images": self.pending_images,
+            },
+            "running_batches": self.running_batches,
+            "workers": len(self.workers),
+            "requests": self.num_requests,
+            "images": self.num_images,
+            "batches": self.num_batches,
+            "mean_batch_size": (
+                self.num_images / self.num_batches if self.num_batches else 0.0
+            ),
+            "batch_sizes": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "latency": {
+                "request": self.request_latency.to_dict(),
+                "queue": self.queue_latency.to_dict(),
+                "inference": self.infer_latency.to_dict(),
+            },
+            "predictor_pools": [
+                system.predictor_pool_utilization()
+                for system in systems
+                if hasattr(system, "predictor_pool_utilization")
+            ],
+            "result_caches": [
+                system.result_cache.stats()
+                for system in systems
+                if getattr(system, "result_cache", None) is not None
+            ],
+        }
+
+
+def _decode_bytes(data):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    return img
+
+
+def decode_images(content_type, body):
+    """
+    Decode the images of a request body, a JSON {"images": [base64, ...]} or
+    a multipart/form-data body whose file parts are encoded images and whose
+    text parts are base64 images. Undecodable images are returned as None.
+    """
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=policy.HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+        if not message.is_multipart():
+            raise ValueError("malformed multipart body")
+        imgs = []
+        for part in message.iter_parts():
+            data = part.get_payload(decode=True) or b""
+            if part.get_filename() is None and part.get_content_maintype() == "text":
+                imgs.append(base64_to_cv2(data.decode("utf-8").strip()))
+            else:
+                imgs.append(_decode_bytes(data))
+        return imgs
+    data = json.loads(body.decode("utf-8"))
+    images = data.get("images") if isinstance(data, dict) else None
+    if not isinstance(images, list):
+        raise ValueError('the JSON body must be {"images": [base64, ...]}')
+    return [base64_to_cv2(image) for image in images]
+
+
+def format_results(results):
+    # the hubserving ocr_system result layout
+    outputs = []
+    for result in results:
+        if result is None:
+            outputs.append([])
+            continue
+        boxes, rec_res = result
+        outputs.append(
+            [
+                {
+                    "text": text,
+                    "confidence": float(score),
+                    "text_region": np.array(box).astype(np.int32).tolist(),
+                }
+                for box, (text, score) in zip(boxes, rec_res)
+            ]
+        )
+    return outputs
+
+
+class OCRServer(object):
+    """
+    HTTP/1.1 front end of a MicroBatcher, on plain asyncio streams.
+    args:
+        batcher(MicroBatcher): the batcher the images are submitted to
+        max_body_size(int): largest accepted request body in bytes
+    """
+
+    predict_paths = ("/predict/ocr_system", "/ocr")
+
+    def __init__(self, batcher, max_body_size=64 << 20):
+        self.batcher = batcher
+        self.max_body_size = max_body_size
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8868):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    method, path, version = parts
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self.respond(writer, 400, {"msg": "malformed request"}, False)
+                    break
+                if length > self.max_body_size:
+                    await self.respond(writer, 413, {"msg": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (
+                    version.strip() == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                status, payload = await self.route(method, path, headers, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # readline raises ValueError for a line over the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, headers, body):
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return 200, self.batcher.metrics()
+        if method != "POST" or path not in self.predict_paths:
+            return 404, {"msg": "unknown endpoint {} {}".format(method, path)}
+        loop = asyncio.get_running_loop()
+        try:
+            # decoding is CPU work, keep it off the event loop
+            imgs = await loop.run_in_executor(
+                None, decode_images, headers.get("content-type", ""), body
+            )
+        except Exception as e:
+            return 400, {"msg": "cannot read the images: {}".format(e), "status": "101"}
+        valid = [idx for idx, img in enumerate(imgs) if img is not None]
+        results = [None] * len(imgs)
+        if valid:
+            try:
+                outputs = await self.batcher.submit([imgs[idx] for idx in valid])
+            except Exception as e:
+                # the batcher already logged the failed micro-batch
+                return 500, {"msg": str(e), "status": "101"}
+            for idx, output in zip(valid, outputs):
+                results[idx] = output
+        return 200, {"msg": "", "results": format_results(results), "status": "000"}
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            "HTTP/1.1 {} {}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            "Content-Length: {}\r\n"
+            "Connection: {}\r\n\r\n"
+        ).format(
+            status,
+            HTTP_REASONS.get(status, ""),
+            len(body),
+            "keep-alive" if keep_alive else "close",
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def init_args():
+    parser = utility.init_args()
+    parser.add_argument("--serve_host", type=str, default="127.0.0.1")
+    parser.add_argument("--serve_port", type=int, default=8868)
+    parser.add_argument(
+        "--serve_workers",
+        type=int,
+        default=1,
+        help="Number of TextSystem instances running micro-batches concurrently",
+    )
+    parser.add_argument(
+        "--serve_max_batch_size",
+        type=int,
+        default=16,
+        help="Images coalesced into one micro-batch",
+    )
+    parser.add_argument(
+        "--serve_max_wait_ms",
+        type=float,
+        default=5.0,
+        help="Milliseconds a micro-batch waits for more requests",
+    )
+    return parser
+
+
+async def serve(args):
+    from tools.infer.predict_system import TextSystem
+
+    if args.predictor_pool_size > 1:
+        # the workers share one TextSystem whose models run on pooled predictors
+        workers = [TextSystem(args)] * args.serve_workers
+    else:
+        workers = [TextSystem(args) for _ in range(args.serve_workers)]
+    # build the predictors before accepting requests
+    for worker in workers:
+        worker.load_models()
+    batcher = MicroBatcher(
+        workers,
+        max_batch_size=args.serve_max_batch_size,
+        max_wait=args.serve_max_wait_ms / 1000.0,
+    )
+    server = OCRServer(batcher)
+    host, port = await server.start(args.serve_host, args.serve_port)
+    logger.info("serving TextSystem on http://{}:{}".format(host, port))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    args = init_args().parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -19,12 +19,19 @@ import platform
 import cv2
 import numpy as np
 import paddle
-import PIL
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 import math
 from paddle import inference
 import time
 import random
+import bisect
+import hashlib
+import json
+import queue
+import shutil
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
 from ppocr.utils.logging import get_logger
 
 
@@ -66,6 +73,12 @@ def init_args():
     parser.add_argument("--max_batch_size", type=int, default=10)
     parser.add_argument("--use_dilation", type=str2bool, default=False)
     parser.add_argument("--det_db_score_mode", type=str, default="fast")
+    parser.add_argument(
+        "--det_postprocess_workers",
+        type=int,
+        default=0,
+        help="Number of threads postprocessing the maps of a detection batch while the next batch runs, 0 postprocesses in the calling thread",
+    )
 
     # EAST parmas
     parser.add_argument("--det_east_score_thresh", type=float, default=0.8)
@@ -94,6 +107,40 @@ def init_args():
     parser.add_argument("--rec_image_inverse", type=str2bool, default=True)
     parser.add_argument("--rec_image_shape", type=str, default="3, 48, 320")
     parser.add_argument("--rec_batch_num", type=int, default=6)
+    parser.add_argument(
+        "--rec_stream_window",
+        type=int,
+        default=0,
+        help="Number of images decoded and recognized at a time by predict_rec.py, 0 loads all images at once",
+    )
+    parser.add_argument(
+        "--rec_width_buckets",
+        type=str,
+        default="",
+        help="Comma separated input widths, e.g. 160,240,320. Crops are snapped to the narrowest width that holds them and batched per width",
+    )
+    parser.add_argument(
+        "--rec_pipeline_workers",
+        type=int,
+        default=0,
+        help="Number of preprocessing threads feeding the recognizer pipeline, 0 runs preprocessing, inference and decoding sequentially",
+    )
+    parser.add_argument(
+        "--rec_plate_grammar",
+        type=str,
+        default="",
+        help='Plate format for the constrained CTC beam search, e.g. "SS DD L(L) DDDD". Empty uses greedy CTC decoding',
+    )
+    parser.add_argument("--rec_beam_width", type=int, default=10)
+    parser.add_argument(
+        "--rec_save_path",
+        type=str,
+        default="license_plates.txt",
+        help="Prediction file written by predict_rec.py, may contain {run_id}, {pid} and {rank}",
+    )
+    parser.add_argument(
+        "--rec_save_format", type=str, default="txt", help="txt, jsonl or parquet"
+    )
     parser.add_argument("--max_text_length", type=int, default=25)
     parser.add_argument(
         "--rec_char_dict_path", type=str, default="./ppocr/utils/ppocr_keys_v1.txt"
@@ -101,6 +148,13 @@ def init_args():
     parser.add_argument("--use_space_char", type=str2bool, default=True)
     parser.add_argument("--vis_font_path", type=str, default="./doc/fonts/simfang.ttf")
     parser.add_argument("--drop_score", type=float, default=0.5)
+    parser.add_argument(
+        "--crop_mode",
+        type=str,
+        default="off",
+        help="off, auto or on. Plate crops skip text detection, auto decides per image from its size and aspect ratio",
+    )
+    parser.add_argument("--crop_max_side", type=int, default=480)
 
     # params for e2e
     parser.add_argument("--e2e_algorithm", type=str, default="PGNet")
@@ -149,6 +203,48 @@ def init_args():
 
     parser.add_argument("--show_log", type=str2bool, default=True)
     parser.add_argument("--use_onnx", type=str2bool, default=False)
+    parser.add_argument(
+        "--predictor_pool_size",
+        type=int,
+        default=1,
+        help="Predictors per model shared by concurrent callers, Paddle predictors are cloned and share weights",
+    )
+    parser.add_argument(
+        "--optim_cache_dir",
+        type=str,
+        default=None,
+        help="Directory caching the IR optimized paddle models and TensorRT shape info, keyed by model hash and flags",
+    )
+    parser.add_argument(
+        "--lazy_init",
+        type=str2bool,
+        default=True,
+        help="Build the det, rec and cls predictors of TextSystem on first use",
+    )
+    parser.add_argument(
+        "--startup_profile",
+        type=str2bool,
+        default=False,
+        help="Log the time spent on imports, model construction and the first image",
+    )
+    parser.add_argument(
+        "--result_cache_size",
+        type=int,
+        default=0,
+        help="Results of repeated images kept in memory by TextSystem, 0 disables the cache",
+    )
+    parser.add_argument(
+        "--result_cache_ttl",
+        type=float,
+        default=0,
+        help="Seconds a cached result stays valid, 0 never expires",
+    )
+    parser.add_argument(
+        "--result_cache_db",
+        type=str,
+        default=None,
+        help="sqlite file keeping cached results across runs",
+    )
 
     # extended function
     parser.add_argument(
@@ -230,6 +326,13 @@ def create_predictor(args, mode, logger):
             )
 
         config = inference.Config(model_file_path, params_file_path)
+        optim_cache_dir = getattr(args, "optim_cache_dir", None)
+        if optim_cache_dir:
+            model_hash = get_model_hash(model_file_path, params_file_path)
+            optim_key = get_optim_cache_key(
+                args, mode, model_file_path, params_file_path, model_hash
+            )
+            optim_model_dir = os.path.join(optim_cache_dir, f"{mode}_{optim_key}")
 
         if hasattr(args, "precision"):
             if args.precision == "fp16" and args.use_tensorrt:
@@ -259,6 +362,10 @@ def create_predictor(args, mode, logger):
 
                 # collect shape
                 trt_shape_f = os.path.join(model_dir, f"{mode}_trt_dynamic_shape.txt")
+                if optim_cache_dir:
+                    # kept beside the optimized model and keyed like it
+                    os.makedirs(optim_cache_dir, exist_ok=True)
+                    trt_shape_f = optim_model_dir + "_trt_dynamic_shape.txt"
 
                 if not os.path.exists(trt_shape_f):
                     config.collect_shape_range_info(trt_shape_f)
@@ -300,21 +407,180 @@ def create_predictor(args, mode, logger):
         config.switch_use_feed_fetch_ops(False)
         config.switch_ir_optim(True)
 
+        save_optim_dir = None
+        if optim_cache_dir:
+            if os.path.exists(os.path.join(optim_model_dir, "_optimized.pdmodel")):
+                # skip the IR passes and load the program they produced
+                config.set_optim_cache_dir(optim_model_dir)
+                config.use_optimized_model(True)
+                logger.debug(f"load optimized {mode} model from {optim_model_dir}")
+            elif not (args.use_gpu and args.use_tensorrt) or os.path.exists(
+                trt_shape_f
+            ):
+                # written to a private directory and renamed once complete,
+                # TensorRT programs are only saved once the shapes are tuned
+                remove_stale_optim_tmp(optim_cache_dir)
+                save_optim_dir = "{}.tmp{}".format(optim_model_dir, os.getpid())
+                os.makedirs(save_optim_dir, exist_ok=True)
+                config.set_optim_cache_dir(save_optim_dir)
+                config.enable_save_optim_model(True)
+
         # create predictor
-        predictor = inference.create_predictor(config)
-        input_names = predictor.get_input_names()
-        if mode in ["ser", "re"]:
-            input_tensor = []
-            for name in input_names:
-                input_tensor.append(predictor.get_input_handle(name))
-        else:
-            for name in input_names:
-                input_tensor = predictor.get_input_handle(name)
+        try:
+            predictor = inference.create_predictor(config)
+        except Exception:
+            if save_optim_dir is not None:
+                shutil.rmtree(save_optim_dir, ignore_errors=True)
+            raise
+        if save_optim_dir is not None:
+            commit_optim_cache(
+                save_optim_dir, optim_model_dir, model_file_path, model_hash, logger
+            )
+        input_tensor = get_input_tensors(mode, predictor)
         output_tensors = get_output_tensors(args, mode, predictor)
         # print(f'Printing from utility, {predictor}\n{input_tensor}\n{output_tensors}\n{config}\n')
         return predictor, input_tensor, output_tensors, config
 
 
+def get_model_hash(model_file_path, params_file_path):
+    """Hash of the contents of the model files"""
+    h = hashlib.blake2b(digest_size=16)
+    for path in [model_file_path, params_file_path]:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def get_optim_cache_key(args, mode, model_file_path, params_file_path, model_hash=None):
+    """
+    Hash of the model files and of everything that changes the optimized
+    program: mode, device, precision, TensorRT and MKLDNN flags and the
+    paddle version.
+    """
+    if model_hash is None:
+        model_hash = get_model_hash(model_file_path, params_file_path)
+    h = hashlib.blake2b(model_hash.encode("utf-8"), digest_size=8)
+    if args.use_gpu:
+        device = "gpu:{}".format(args.gpu_id)
+        try:
+            device += ":" + paddle.device.cuda.get_device_name(args.gpu_id)
+        except Exception:
+            pass
+    elif args.use_npu:
+        device = "npu"
+    elif args.use_mlu:
+        device = "mlu"
+    elif args.use_xpu:
+        device = "xpu"
+    else:
+        device = "cpu"
+    flags = {
+        "mode": mode,
+        "device": device,
+        "paddle": paddle.__version__,
+        "precision": getattr(args, "precision", "fp32"),
+        "use_tensorrt": args.use_gpu and args.use_tensorrt,
+        "min_subgraph_size": args.min_subgraph_size,
+        "max_batch_size": args.max_batch_size,
+        "enable_mkldnn": getattr(args, "enable_mkldnn", False),
+    }
+    h.update(json.dumps(flags, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def commit_optim_cache(save_dir, optim_model_dir, model_file_path, model_hash, logger):
+    """
+    Move a freshly saved optimized model to its final directory and drop the
+    entries built from an older version of the same model file. Entries of
+    the same model with other flags stay valid and are kept.
+    """
+    model_file = os.path.abspath(model_file_path)
+    with open(os.path.join(save_dir, "source.json"), "w") as f:
+        json.dump({"model_file": model_file, "model_hash": model_hash}, f)
+    try:
+        os.rename(save_dir, optim_model_dir)
+    except OSError:
+        # another process saved the same model first
+        shutil.rmtree(save_dir, ignore_errors=True)
+        return
+    logger.debug(f"saved optimized model to {optim_model_dir}")
+    cache_dir = os.path.dirname(optim_model_dir)
+    prefix = os.path.basename(optim_model_dir).rsplit("_", 1)[0] + "_"
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if (
+            path == optim_model_dir
+            or not name.startswith(prefix)
+            or ".tmp" in name
+            or not os.path.isdir(path)
+        ):
+            continue
+        try:
+            with open(os.path.join(path, "source.json")) as f:
+                source = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if (
+            source.get("model_file") == model_file
+            and source.get("model_hash") != model_hash
+        ):
+            shutil.rmtree(path, ignore_errors=True)
+            shape_file = path + "_trt_dynamic_shape.txt"
+            if os.path.exists(shape_file):
+                os.remove(shape_file)
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name != "posix":
+        # os.kill would terminate the process on windows
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def remove_stale_optim_tmp(cache_dir, max_age=24 * 3600):
+    """
+    Remove the temporary directories left in cache_dir by processes that
+    died while saving an optimized model. Where it cannot be told whether
+    the process is alive, directories older than max_age seconds are removed.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        _, sep, pid = name.rpartition(".tmp")
+        if not sep or not pid.isdigit():
+            continue
+        path = os.path.join(cache_dir, name)
+        alive = _pid_alive(int(pid))
+        try:
+            if alive is None:
+                alive = time.time() - os.path.getmtime(path) < max_age
+        except OSError:
+            continue
+        if not alive:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def get_input_tensors(mode, predictor):
+    input_names = predictor.get_input_names()
+    if mode in ["ser", "re"]:
+        input_tensor = []
+        for name in input_names:
+            input_tensor.append(predictor.get_input_handle(name))
+    else:
+        for name in input_names:
+            input_tensor = predictor.get_input_handle(name)
+    return input_tensor
+
+
 def get_output_tensors(args, mode, predictor):
     output_names = predictor.get_output_names()
     output_tensors = []
@@ -333,6 +599,181 @@ def get_output_tensors(args, mode, predictor):
     return output_tensors
 
 
+def process_start_time():
+    """Wall clock start time of this process, None where /proc is missing"""
+    try:
+        with open("/proc/self/stat") as f:
+            # fields after the parenthesized command, starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile(object):
+    """
+    Wall time of the startup phases of an inference process. The first row
+    covers the interpreter startup, imports and setup until the first
+    recorded phase, e.g. building a predictor, and starts at the process
+    start time, or at the import of this module where /proc is missing.
+    Phases may nest, the first image includes the models it builds. Run
+    python with -X importtime for a per module breakdown of the imports.
+    """
+
+    def __init__(self, start=None):
+        if start is None:
+            start = process_start_time() or time.time()
+        self.start = start
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def record(self, name, begin, end=None):
+        """Record a phase that ran from begin until end, or now"""
+        end = time.time() if end is None else end
+        with self._lock:
+            self.phases.append((name, begin, end))
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, begin)
+
+    def report(self):
+        """[(phase, seconds)] in the order the phases finished, then the total"""
+        now = time.time()
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+        first = min([begin for _, begin, _ in phases] or [now])
+        rows = [("startup and imports", first - self.start)]
+        rows.extend((name, end - begin) for name, begin, end in phases)
+        rows.append(("total", now - self.start))
+        return rows
+
+    def log(self, logger):
+        for name, seconds in self.report():
+            logger.info("startup {:<24s} {:8.3f}s".format(name, seconds))
+
+
+# phases of this process, filled in by TextSystem and the CLI scripts
+startup_profile = StartupProfile()
+
+
+PredictorHandle = namedtuple(
+    "PredictorHandle", ["predictor", "input_tensor", "output_tensors"]
+)
+
+
+class PredictorPool(object):
+    """
+    A fixed set of predictors of one model that concurrent callers check out
+    for a single inference call. Paddle predictors are cloned from the first
+    one and share its weights, with --use_onnx every slot is a separate
+    onnxruntime session. checkout blocks while all predictors are in use.
+    args:
+        args: inference args, see init_args
+        mode(str): model to load, e.g. det, rec or cls
+        logger: logger passed to create_predictor
+        size(int): number of predictors
+    """
+
+    def __init__(self, args, mode, logger, size=1):
+        self.size = max(int(size), 1)
+        predictor, input_tensor, output_tensors, self.config = create_predictor(
+            args, mode, logger
+        )
+        self.handles = [PredictorHandle(predictor, input_tensor, output_tensors)]
+        for _ in range(1, self.size):
+            if args.use_onnx:
+                sess, input_tensor, output_tensors, _ = create_predictor(
+                    args, mode, logger
+                )
+                self.handles.append(PredictorHandle(sess, input_tensor, output_tensors))
+            else:
+                clone = predictor.clone()
+                self.handles.append(
+                    PredictorHandle(
+                        clone,
+                        get_input_tensors(mode, clone),
+                        get_output_tensors(args, mode, clone),
+                    )
+                )
+        self._idle = queue.LifoQueue()
+        for handle in self.handles:
+            self._idle.put(handle)
+        self._lock = threading.Lock()
+        self._checkout_time = {}
+        self._created = time.time()
+        self.num_checkouts = 0
+        self.peak_in_use = 0
+        self.wait_time = 0.0
+        self.busy_time = 0.0
+
+    def checkout(self, timeout=None):
+        """Take an idle PredictorHandle, waiting up to timeout seconds"""
+        st = time.time()
+        try:
+            handle = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                "no idle predictor in pool of {} after {}s".format(self.size, timeout)
+            )
+        now = time.time()
+        with self._lock:
+            self._checkout_time[id(handle)] = now
+            self.num_checkouts += 1
+            self.wait_time += now - st
+            self.peak_in_use = max(self.peak_in_use, len(self._checkout_time))
+        return handle
+
+    def checkin(self, handle):
+        """Return a handle taken by checkout"""
+        with self._lock:
+            start = self._checkout_time.pop(id(handle), None)
+            if start is None:
+                raise ValueError("predictor handle is not checked out of this pool")
+            self.busy_time += time.time() - start
+        self._idle.put(handle)
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        handle = self.checkout(timeout)
+        try:
+            yield handle
+        finally:
+            self.checkin(handle)
+
+    def utilization(self):
+        """
+        Pool statistics, utilization is the fraction of predictor time spent
+        checked out since the pool was created.
+        """
+        now = time.time()
+        with self._lock:
+            busy_time = self.busy_time + sum(
+                now - start for start in self._checkout_time.values()
+            )
+            in_use = len(self._checkout_time)
+            num_checkouts = self.num_checkouts
+            wait_time = self.wait_time
+            peak_in_use = self.peak_in_use
+        elapsed = max(now - self._created, 1e-9)
+        return {
+            "size": self.size,
+            "in_use": in_use,
+            "peak_in_use": peak_in_use,
+            "checkouts": num_checkouts,
+            "mean_wait_ms": (
+                1000.0 * wait_time / num_checkouts if num_checkouts else 0.0
+            ),
+            "utilization": min(busy_time / (self.size * elapsed), 1.0),
+        }
+
+
 def get_infer_gpuid():
     sysstr = platform.system()
     if sysstr == "Windows":
@@ -437,6 +878,8 @@ def draw_ocr_box_txt(
     drop_score=0.5,
     font_path="./doc/fonts/simfang.ttf",
 ):
+    from PIL import ImageDraw
+
     h, w = image.height, image.width
     img_left = image.copy()
     img_right = np.ones((h, w, 3), dtype=np.uint8) * 255
@@ -462,6 +905,8 @@ def draw_ocr_box_txt(
 
 
 def draw_box_txt_fine(img_size, box, txt, font_path="./doc/fonts/simfang.ttf"):
+    from PIL import ImageDraw
+
     box_height = int(
         math.sqrt((box[0][0] - box[3][0]) ** 2 + (box[0][1] - box[3][1]) ** 2)
     )
@@ -502,6 +947,10 @@ def draw_box_txt_fine(img_size, box, txt, font_path="./doc/fonts/simfang.ttf"):
 
 
 def create_font(txt, sz, font_path="./doc/fonts/simfang.ttf"):
+    # PIL fonts are only loaded when a result is drawn
+    import PIL
+    from PIL import ImageFont
+
     font_size = int(sz[1] * 0.99)
     font = ImageFont.truetype(font_path, font_size, encoding="utf-8")
     if int(PIL.__version__.split(".")[0]) < 10:
@@ -557,6 +1006,7 @@ def text_visual(
         assert len(texts) == len(
             scores
         ), "The number of txts and corresponding scores must match"
+    from PIL import ImageDraw, ImageFont
 
     def create_blank_img():
         blank_img = np.ones(shape=[img_h, img_w], dtype=np.int8) * 255
@@ -678,6 +1128,126 @@ def get_rotate_crop_image(img, points):
     return dst_img
 
 
+def perspective_transforms(src, dst):
+    """
+    cv2.getPerspectiveTransform for [N, 4, 2] point sets at once, solving the
+    N 8x8 linear systems in a single batched call. return [N, 3, 3]
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    n = len(src)
+    x, y = src[:, :, 0], src[:, :, 1]
+    u, v = dst[:, :, 0], dst[:, :, 1]
+    zeros, ones = np.zeros_like(x), np.ones_like(x)
+    a = np.zeros((n, 8, 8))
+    a[:, :4] = np.stack([x, y, ones, zeros, zeros, zeros, -x * u, -y * u], axis=2)
+    a[:, 4:] = np.stack([zeros, zeros, zeros, x, y, ones, -x * v, -y * v], axis=2)
+    b = np.concatenate([u, v], axis=1)
+    try:
+        params = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        # degenerate boxes, leave them to opencv one by one
+        return np.array(
+            [
+                cv2.getPerspectiveTransform(
+                    src[i].astype(np.float32), dst[i].astype(np.float32)
+                )
+                for i in range(n)
+            ]
+        )
+    return np.concatenate([params, ones[:, :1]], axis=1).reshape(n, 3, 3)
+
+
+def get_rotate_crop_images(img, boxes, target_height=None, axis_tolerance=0.5):
+    """
+    Batched get_rotate_crop_image for [N, 4, 2] quad boxes. The crop sizes
+    and homographies of all boxes are computed at once, each box is warped
+    from a small region of interest around it, and boxes whose edges are
+    axis aligned within axis_tolerance pixels are sliced out of img instead
+    of warped.
+    args:
+        target_height(int|None): height of the returned crops, after the
+            rotation of tall crops. The width keeps the aspect ratio and is
+            rounded up like TextRecognizer.resize_norm_img does, so the
+            recognizer does not resize the crops again. None keeps the size
+            of get_rotate_crop_image.
+    return the list of crops
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+    if len(boxes) == 0:
+        return []
+    img_h, img_w = img.shape[:2]
+    widths = np.maximum(
+        np.linalg.norm(boxes[:, 0] - boxes[:, 1], axis=1),
+        np.linalg.norm(boxes[:, 2] - boxes[:, 3], axis=1),
+    ).astype(int)
+    heights = np.maximum(
+        np.linalg.norm(boxes[:, 0] - boxes[:, 3], axis=1),
+        np.linalg.norm(boxes[:, 1] - boxes[:, 2], axis=1),
+    ).astype(int)
+    widths, heights = np.maximum(widths, 1), np.maximum(heights, 1)
+    rotate = heights / widths >= 1.5
+    if target_height is not None:
+        # the side that ends up vertical is scaled to target_height
+        long_side = np.where(rotate, heights, widths)
+        short_side = np.where(rotate, widths, heights)
+        long_side = np.ceil(target_height * long_side / short_side).astype(int)
+        widths = np.where(rotate, target_height, long_side)
+        heights = np.where(rotate, long_side, target_height)
+    dst = np.zeros_like(boxes)
+    dst[:, 1, 0] = dst[:, 2, 0] = widths
+    dst[:, 2, 1] = dst[:, 3, 1] = heights
+
+    # the region each box samples from, with the margin of the cubic kernel
+    x0 = np.clip(np.floor(boxes[:, :, 0].min(axis=1)).astype(int) - 3, 0, img_w)
+    y0 = np.clip(np.floor(boxes[:, :, 1].min(axis=1)).astype(int) - 3, 0, img_h)
+    x1 = np.clip(np.ceil(boxes[:, :, 0].max(axis=1)).astype(int) + 4, 0, img_w)
+    y1 = np.clip(np.ceil(boxes[:, :, 1].max(axis=1)).astype(int) + 4, 0, img_h)
+    # boxes outside the image replicate its nearest border pixels
+    x0, y0 = np.minimum(x0, img_w - 1), np.minimum(y0, img_h - 1)
+    x1, y1 = np.maximum(x1, x0 + 1), np.maximum(y1, y0 + 1)
+    shifted = boxes - np.stack([x0, y0], axis=1)[:, None, :]
+    transforms = perspective_transforms(shifted, dst)
+
+    axis_aligned = (
+        (np.abs(boxes[:, 0, 1] - boxes[:, 1, 1]) <= axis_tolerance)
+        & (np.abs(boxes[:, 3, 1] - boxes[:, 2, 1]) <= axis_tolerance)
+        & (np.abs(boxes[:, 0, 0] - boxes[:, 3, 0]) <= axis_tolerance)
+        & (np.abs(boxes[:, 1, 0] - boxes[:, 2, 0]) <= axis_tolerance)
+        & (boxes[:, 1, 0] > boxes[:, 0, 0])
+        & (boxes[:, 3, 1] > boxes[:, 0, 1])
+    )
+    left = np.round(boxes[:, [0, 3], 0].mean(axis=1)).astype(int)
+    right = np.round(boxes[:, [1, 2], 0].mean(axis=1)).astype(int)
+    top = np.round(boxes[:, [0, 1], 1].mean(axis=1)).astype(int)
+    bottom = np.round(boxes[:, [2, 3], 1].mean(axis=1)).astype(int)
+    axis_aligned &= (left >= 0) & (top >= 0) & (right <= img_w) & (bottom <= img_h)
+
+    # scaled crops skip the recognizer resize, which is linear
+    interpolation = cv2.INTER_CUBIC if target_height is None else cv2.INTER_LINEAR
+    crops = []
+    for i in range(len(boxes)):
+        size = (int(widths[i]), int(heights[i]))
+        if axis_aligned[i]:
+            crop = img[top[i] : bottom[i], left[i] : right[i]]
+            if crop.shape[1] != size[0] or crop.shape[0] != size[1]:
+                crop = cv2.resize(crop, size)
+            else:
+                crop = crop.copy()
+        else:
+            crop = cv2.warpPerspective(
+                img[y0[i] : y1[i], x0[i] : x1[i]],
+                transforms[i],
+                size,
+                borderMode=cv2.BORDER_REPLICATE,
+                flags=interpolation,
+            )
+        if rotate[i]:
+            crop = np.rot90(crop)
+        crops.append(crop)
+    return crops
+
+
 def get_minarea_rect_crop(img, points):
     bounding_box = cv2.minAreaRect(np.array(points).astype(np.int32))
     points = sorted(list(cv2.boxPoints(bounding_box)), key=lambda x: x[0])
@@ -701,7 +1271,62 @@ def get_minarea_rect_crop(img, points):
     return crop_img
 
 
-def slice_generator(image, horizontal_stride, vertical_stride, maximum_slices=500):
+def is_plate_shaped(img, max_side=480, min_aspect=1.5, max_aspect=6.5):
+    """
+    Whether img looks like an already cropped plate: small, and as wide
+    relative to its height as a one or two row plate.
+    """
+    h, w = img.shape[:2]
+    if h == 0 or max(h, w) > max_side:
+        return False
+    return min_aspect <= w / h <= max_aspect
+
+
+def split_plate_rows(img, max_aspect=3.0, valley_ratio=0.3):
+    """
+    Split a two row plate at the emptiest band of its horizontal projection
+    profile.
+    args:
+        img(array): plate crop
+        max_aspect(float): wider crops are always treated as one row
+        valley_ratio(float): the band between the rows must hold less than
+            this fraction of the ink of the weaker row
+    return:
+        list of (y_start, y_end) row ranges, top to bottom
+    """
+    h, w = img.shape[:2]
+    if h < 16 or w / h > max_aspect:
+        return [(0, h)]
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # characters are the minority class, whatever the plate colors are
+    if ink.mean() > 0.5:
+        ink = 1 - ink
+    # leave out the plate border at the sides
+    margin = w // 20
+    profile = ink[:, margin : w - margin].mean(axis=1)
+    # and the border lines at the top and bottom
+    profile[profile > 0.6] = 0
+    kernel = max(h // 20, 1) | 1
+    profile = np.convolve(profile, np.ones(kernel) / kernel, mode="same")
+    lo, hi = int(h * 0.3), int(h * 0.7)
+    split = lo + int(np.argmin(profile[lo:hi]))
+    weaker_row = min(profile[:split].max(), profile[split:].max())
+    # both rows must hold text, not only a bolt or a shadow
+    weaker_mass = min(profile[:split].sum(), profile[split:].sum())
+    if profile[split] > valley_ratio * weaker_row or weaker_mass < 0.2 * profile.sum():
+        return [(0, h)]
+    return [(0, split), (split, h)]
+
+
+def slice_generator(
+    image, horizontal_stride, vertical_stride, maximum_slices=500, overlap=0
+):
+    """
+    Yield (slice, v_start, h_start) tiles every stride pixels. With overlap
+    every tile reaches that many pixels into its right and bottom neighbours,
+    so text cut by one tile border appears whole in the next tile.
+    """
     if not isinstance(image, np.ndarray):
         image = np.array(image)
 
@@ -731,16 +1356,62 @@ def slice_generator(image, horizontal_stride, vertical_stride, maximum_slices=50
 
     for v_slice_idx in range(vertical_num_slices):
         v_start = max(0, (v_slice_idx * vertical_stride))
-        v_end = min(((v_slice_idx + 1) * vertical_stride), image_h)
+        v_end = min(((v_slice_idx + 1) * vertical_stride + overlap), image_h)
         vertical_slice = image[v_start:v_end, :]
         for h_slice_idx in range(horizontal_num_slices):
             h_start = max(0, (h_slice_idx * horizontal_stride))
-            h_end = min(((h_slice_idx + 1) * horizontal_stride), image_w)
+            h_end = min(((h_slice_idx + 1) * horizontal_stride + overlap), image_w)
             horizontal_slice = vertical_slice[:, h_start:h_end]
 
             yield (horizontal_slice, v_start, h_start)
 
 
+def nms_boxes(boxes, overlap_thresh=0.5):
+    """
+    Drop the boxes found twice in overlapping slices. Boxes are visited from
+    the largest to the smallest and dropped when their bounding rectangle
+    overlaps a kept one by more than overlap_thresh of the smaller area, so
+    the fragment of a text cut by one slice border gives way to the whole
+    text found in the next slice. Kept boxes are stored in a grid of cells
+    as large as the median box, each box is only compared with the kept
+    boxes of the cells it covers.
+    return the indices of the kept boxes in input order
+    """
+    boxes = np.asarray(boxes)
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+    x0, y0 = boxes[:, :, 0].min(axis=1), boxes[:, :, 1].min(axis=1)
+    x1, y1 = boxes[:, :, 0].max(axis=1), boxes[:, :, 1].max(axis=1)
+    areas = np.maximum(x1 - x0, 0) * np.maximum(y1 - y0, 0)
+    cell = max(float(np.median(np.maximum(x1 - x0, y1 - y0))), 1.0)
+    cx0, cy0 = np.floor(x0 / cell).astype(int), np.floor(y0 / cell).astype(int)
+    cx1, cy1 = np.floor(x1 / cell).astype(int), np.floor(y1 / cell).astype(int)
+    grid = {}
+    keep = []
+    for i in np.argsort(-areas, kind="stable").tolist():
+        cells = [
+            (cx, cy)
+            for cx in range(cx0[i], cx1[i] + 1)
+            for cy in range(cy0[i], cy1[i] + 1)
+        ]
+        neighbours = list({j for key in cells for j in grid.get(key, ())})
+        if neighbours:
+            inter_w = np.minimum(x1[i], x1[neighbours]) - np.maximum(
+                x0[i], x0[neighbours]
+            )
+            inter_h = np.minimum(y1[i], y1[neighbours]) - np.maximum(
+                y0[i], y0[neighbours]
+            )
+            inter = np.maximum(inter_w, 0) * np.maximum(inter_h, 0)
+            smaller = np.maximum(np.minimum(areas[i], areas[neighbours]), 1e-6)
+            if np.any(inter / smaller > overlap_thresh):
+                continue
+        keep.append(i)
+        for key in cells:
+            grid.setdefault(key, []).append(i)
+    return np.sort(np.array(keep, dtype=np.int64))
+
+
 def calculate_box_extents(box):
     min_x = box[0][0]
     max_x = box[1][0]
@@ -773,30 +1444,93 @@ def merge_boxes(box1, box2, x_threshold, y_threshold):
 
 
 def merge_fragmented(boxes, x_threshold=10, y_threshold=10):
-    merged_boxes = []
-    visited = set()
+    """
+    Merge the boxes of a text line cut by slice borders. Every unmerged box,
+    in order, absorbs the following boxes that pass merge_boxes against the
+    growing merged box, and the passes repeat until nothing merges. The
+    candidates of a merge are looked up in the boxes sorted by left edge, so
+    a pass costs O(n log n) plus the window sizes instead of O(n^2).
+    """
+    boxes = np.array(boxes)
+    changed = np.ones(len(boxes), dtype=bool)
+    while len(boxes):
+        boxes, changed = _merge_fragmented_pass(
+            boxes, changed, x_threshold, y_threshold
+        )
+        if not changed.any():
+            break
+    return boxes
 
-    for i, box1 in enumerate(boxes):
-        if i in visited:
-            continue
 
-        merged_box = [point[:] for point in box1]
+class _LeftEdgeIndex(object):
+    # the boxes of `indices` sorted by left edge, for window lookups
+    def __init__(self, indices, min_x):
+        self.indices = indices[np.argsort(min_x[indices], kind="stable")]
+        self.left_edges = min_x[self.indices].tolist()
 
-        for j, box2 in enumerate(boxes[i + 1 :], start=i + 1):
-            if j not in visited:
-                merged_result = merge_boxes(
-                    merged_box, box2, x_threshold=x_threshold, y_threshold=y_threshold
-                )
-                if merged_result:
-                    merged_box = merged_result
-                    visited.add(j)
+    def window(self, low, high):
+        lo = bisect.bisect_left(self.left_edges, low)
+        hi = bisect.bisect_right(self.left_edges, high)
+        return self.indices[lo:hi]
 
-        merged_boxes.append(merged_box)
 
-    if len(merged_boxes) == len(boxes):
-        return np.array(merged_boxes)
-    else:
-        return merge_fragmented(merged_boxes, x_threshold, y_threshold)
+def _merge_fragmented_pass(boxes, changed, x_threshold, y_threshold):
+    """
+    One pass of merge_fragmented, returns the new boxes and which of them
+    were merged. Two boxes left unchanged by the previous pass already failed
+    each other's test in the same order, so an unchanged box only looks at the
+    changed boxes until it merges with one.
+    """
+    # the extents of calculate_box_extents, for all boxes at once
+    min_x, max_x = boxes[:, 0, 0], boxes[:, 1, 0]
+    min_y, max_y = boxes[:, 0, 1], boxes[:, 2, 1]
+    all_index = _LeftEdgeIndex(np.arange(len(boxes)), min_x)
+    changed_index = _LeftEdgeIndex(np.flatnonzero(changed), min_x)
+    # widen the window a little, the exact test is done on the candidates
+    margin = x_threshold + 1e-6 * (np.abs(min_x).max() + x_threshold + 1)
+    visited = np.zeros(len(boxes), dtype=bool)
+    merged_boxes, merged_flags = [], []
+    for i in range(len(boxes)):
+        if visited[i]:
+            continue
+        box_min_x, box_max_x = min_x[i], max_x[i]
+        box_min_y, box_max_y = min_y[i], max_y[i]
+        last, merged = i, False
+        while True:
+            index = all_index if merged or changed[i] else changed_index
+            candidates = index.window(box_max_x - margin, box_max_x + margin)
+            if len(candidates) == 0:
+                break
+            valid = (
+                (candidates > last)
+                & ~visited[candidates]
+                & (np.abs(box_max_x - min_x[candidates]) <= x_threshold)
+                & (np.abs(box_min_y - min_y[candidates]) <= y_threshold)
+                & (np.abs(box_max_y - max_y[candidates]) <= y_threshold)
+            )
+            if not valid.any():
+                break
+            # the first box in the original order is the one merged first
+            j = candidates[valid].min()
+            visited[j] = True
+            box_min_x = min(box_min_x, min_x[j])
+            box_max_x = max(box_max_x, max_x[j])
+            box_min_y = min(box_min_y, min_y[j])
+            box_max_y = max(box_max_y, max_y[j])
+            last, merged = j, True
+        if merged:
+            merged_boxes.append(
+                [
+                    [box_min_x, box_min_y],
+                    [box_max_x, box_min_y],
+                    [box_max_x, box_max_y],
+                    [box_min_x, box_max_y],
+                ]
+            )
+        else:
+            merged_boxes.append(boxes[i])
+        merged_flags.append(merged)
+    return np.array(merged_boxes, dtype=boxes.dtype), np.array(merged_flags)
 
 
 def check_gpu(use_gpu):
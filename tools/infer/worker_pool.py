@@ -0,0 +1,130 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import sys
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(__dir__)
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "../..")))
+
+import multiprocessing
+
+__all__ = ["InferWorkerPool"]
+
+# the engine owned by the current worker process, built once by _init_worker
+_worker_engine = None
+
+
+def _build_engine(args, engine):
+    if callable(engine):
+        return engine(args)
+    if engine == "system":
+        from tools.infer.predict_system import TextSystem
+
+        return TextSystem(args)
+    elif engine == "rec":
+        from tools.infer.predict_rec import TextRecognizer
+
+        return TextRecognizer(args)
+    elif engine == "det":
+        from tools.infer.predict_det import TextDetector
+
+        return TextDetector(args)
+    elif engine == "cls":
+        from tools.infer.predict_cls import TextClassifier
+
+        return TextClassifier(args)
+    raise ValueError(
+        "engine only support system, rec, det and cls, but got {}".format(engine)
+    )
+
+
+def _warmup_engine(worker_engine, engine, times=10):
+    """run the engine on random inputs so the first real item is not slowed down"""
+    import numpy as np
+
+    if engine in ("rec", "cls"):
+        item = [np.random.uniform(0, 255, [48, 320, 3]).astype(np.uint8)]
+    else:
+        item = np.random.uniform(0, 255, [640, 640, 3]).astype(np.uint8)
+    for _ in range(times):
+        worker_engine(item)
+
+
+def _init_worker(args, engine):
+    global _worker_engine
+    _worker_engine = _build_engine(args, engine)
+    if getattr(args, "warmup", False):
+        _warmup_engine(_worker_engine, engine)
+
+
+def _run_task(task):
+    func, item = task
+    if func is None:
+        return _worker_engine(item)
+    return func(_worker_engine, item)
+
+
+class InferWorkerPool(object):
+    """
+    A pool of worker processes that each build their predictors once and then
+    pull items from a shared task queue, so a slow item only delays the worker
+    that picked it up. Results are returned in input order.
+    args:
+        args: inference args, see tools/infer/utility.py
+        engine(str): the engine built in every worker, one of system, rec, det,
+            cls, or a module level function building it from args
+        num_workers(int): number of worker processes, args.total_process_num by default
+        start_method(str): multiprocessing start method, spawn keeps workers
+            independent of any predictor or CUDA state in the parent process
+    """
+
+    def __init__(self, args, engine="system", num_workers=None, start_method="spawn"):
+        if num_workers is None:
+            num_workers = args.total_process_num
+        assert num_workers > 0, "num_workers must be greater than 0"
+        self.num_workers = num_workers
+        ctx = multiprocessing.get_context(start_method)
+        self.pool = ctx.Pool(
+            processes=num_workers, initializer=_init_worker, initargs=(args, engine)
+        )
+
+    def imap(self, items, func=None):
+        """
+        Lazily yield the results for items in input order.
+        func(engine, item) is run in the worker; it must be a module level
+        function. By default engine(item) is returned.
+        """
+        tasks = ((func, item) for item in items)
+        return self.pool.imap(_run_task, tasks, chunksize=1)
+
+    def map(self, items, func=None):
+        return list(self.imap(items, func))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
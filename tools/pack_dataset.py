@@ -0,0 +1,102 @@
+# Copyright (c) 2024 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Convert SimpleDataSet label files and their images into a packed shard read
+by PackedDataSet, e.g.
+
+    python tools/pack_dataset.py --data_dir=./train_data/trainB \
+        --label_file_list ./train_data/trainB.txt --output=./train_data/packed/trainB
+"""
+
+import os
+import sys
+import argparse
+
+__dir__ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(__dir__, "..")))
+
+from ppocr.data.packed_dataset import PackedShardWriter, image_size
+
+
+def pack_label_files(
+    label_file_list, data_dir, output, delimiter="\t", with_size=True, logger=print
+):
+    """
+    Pack the images listed in the label files into the shard output. Lines
+    whose image is missing or unreadable are skipped and reported.
+    Returns the number of packed and of skipped samples.
+    """
+    packed, skipped = 0, 0
+    with PackedShardWriter(output) as writer:
+        for label_file in label_file_list:
+            with open(label_file, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            for line in lines:
+                if not line.strip():
+                    continue
+                substr = line.split(delimiter)
+                if len(substr) < 2:
+                    logger("Skip malformed line: {}".format(line))
+                    skipped += 1
+                    continue
+                file_name, label = substr[0], substr[1]
+                try:
+                    with open(os.path.join(data_dir, file_name), "rb") as img_file:
+                        buf = img_file.read()
+                    size = image_size(buf) if with_size else None
+                except Exception as e:
+                    logger("Skip {}: {}".format(file_name, e))
+                    skipped += 1
+                    continue
+                writer.add(buf, file_name, label, size)
+                packed += 1
+                if packed % 10000 == 0:
+                    logger("Packed {} images".format(packed))
+    return packed, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data_dir", type=str, default=".", help="The root directory of images"
+    )
+    parser.add_argument(
+        "--label_file_list",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Label files with one 'file_name<delimiter>label' per line",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="Prefix of the shard, writes <output>.bin, .idx.npy and .txt",
+    )
+    parser.add_argument("--delimiter", type=str, default="\t")
+    parser.add_argument(
+        "--no_size",
+        action="store_true",
+        help="Do not read the image sizes, which the aspect ratios need",
+    )
+
+    args = parser.parse_args()
+    packed, skipped = pack_label_files(
+        args.label_file_list,
+        args.data_dir,
+        args.output,
+        delimiter=args.delimiter,
+        with_size=not args.no_size,
+    )
+    print("Packed {} images into {}, skipped {}".format(packed, args.output, skipped))